@@ -3,6 +3,9 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import List, Dict, Any
 from models import *
 from auth import require_admin
+from http_cache import bump_catalog_version
+from order_tracking import sync_order_tracking
+from shared_cache import PRINCIPALS_NAMESPACE, shared_cache
 from datetime import datetime, timedelta
 import logging
 
@@ -64,16 +67,17 @@ async def get_dashboard_stats(
         "variants.stock_quantity": {"$lte": 5}
     })
     
-    # Top selling products
+    # Top selling products, from the per-product order summary lines
     top_products_pipeline = [
         {"$match": {"payment_status": "completed"}},
-        {"$unwind": "$items"},
+        {"$project": {"_id": 0, "lines": 1}},
+        {"$unwind": "$lines"},
         {
             "$group": {
-                "_id": "$items.product_id",
-                "product_name": {"$first": "$items.product_name"},
-                "total_sold": {"$sum": "$items.quantity"},
-                "revenue": {"$sum": "$items.total_price"}
+                "_id": "$lines.product_id",
+                "product_name": {"$first": "$lines.product_name"},
+                "total_sold": {"$sum": "$lines.quantity"},
+                "revenue": {"$sum": "$lines.revenue"}
             }
         },
         {"$sort": {"total_sold": -1}},
@@ -128,9 +132,11 @@ async def get_sales_analytics(
                 "created_at": {"$gte": start_date}
             }
         },
+        # Orders with no readable created_at have a null day; keep them out of the totals
+        {"$match": {"day": {"$ne": None}}},
         {
             "$group": {
-                "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "_id": "$day",
                 "orders": {"$sum": 1},
                 "revenue": {"$sum": "$total_amount"}
             }
@@ -222,6 +228,7 @@ async def update_product_stock(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product variant not found")
     
+    await bump_catalog_version(database)
     return {"message": "Stock updated successfully"}
 
 # ============================================================================
@@ -266,6 +273,7 @@ async def update_order_status(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    await sync_order_tracking(database, {"id": order_id})
     return {"message": "Order status updated successfully"}
 
 # ============================================================================
@@ -300,4 +308,5 @@ async def update_user_status(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    await shared_cache.invalidate(PRINCIPALS_NAMESPACE)
     return {"message": "User status updated successfully"}
@@ -0,0 +1,49 @@
+from fastapi.responses import StreamingResponse
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from pathlib import Path
+from typing import Any, AsyncIterator, List
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Admin pages are Jinja2 templates. They are compiled once per process,
+# and the bytecode is cached on disk, so a restart skips the compile too.
+# Pages are streamed: the layout head goes out before any query finishes,
+# and table rows are rendered one cursor batch at a time. A macro renders
+# each batch into a single chunk, so memory stays flat however long the
+# list is, and the client gets a few large writes, not one per row.
+ADMIN_TEMPLATES_DIR = Path(__file__).parent / "templates" / "admin"
+ADMIN_TEMPLATE_CACHE_DIR = os.environ.get("ADMIN_TEMPLATE_CACHE_DIR")
+ADMIN_ROW_BATCH = int(os.environ.get("ADMIN_ROW_BATCH", "100"))
+
+admin_templates = Environment(
+    loader=FileSystemLoader(ADMIN_TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"]),
+    enable_async=True,
+    # Templates ship with the code; never stat them per request
+    auto_reload=False,
+    bytecode_cache=FileSystemBytecodeCache(ADMIN_TEMPLATE_CACHE_DIR) if ADMIN_TEMPLATE_CACHE_DIR else FileSystemBytecodeCache(),
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+
+def precompile_admin_templates():
+    for name in admin_templates.list_templates():
+        admin_templates.get_template(name)
+
+async def cursor_batches(cursor, size: int = ADMIN_ROW_BATCH) -> AsyncIterator[List[dict]]:
+    """Documents from a Motor cursor, ``size`` at a time."""
+    while True:
+        batch = await cursor.to_list(length=size)
+        if not batch:
+            return
+        yield batch
+
+def stream_admin_page(name: str, **context: Any) -> StreamingResponse:
+    return StreamingResponse(
+        admin_templates.get_template(name).generate_async(**context),
+        media_type="text/html; charset=utf-8"
+    )
+
+precompile_admin_templates()
@@ -2,10 +2,9 @@ from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models import User, UserInDB
+from functools import lru_cache
 import os
 import uuid
 
@@ -14,16 +13,23 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer(auto_error=False)
 
+# passlib and jose are imported on first use; catalog requests never need them
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Password hashing context, built on first use."""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
@@ -33,9 +39,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Optional[dict]:
+    """Claims of a valid JWT access token, or None."""
+    from jose import JWTError, jwt
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
 async def get_user_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[UserInDB]:
     """Get user by email from database."""
     user_doc = await db.users.find_one({"email": email})
@@ -60,12 +75,9 @@ async def get_current_user_with_db(
     if not credentials:
         return None
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
+    payload = decode_access_token(credentials.credentials)
+    email: Optional[str] = payload.get("sub") if payload else None
+    if email is None:
         return None
     
     user = await get_user_by_email(db, email)
@@ -118,6 +130,34 @@ def require_admin_with_db(db: AsyncIOMotorDatabase):
         return current_user
     return _require_admin
 
+async def get_db(request: Request) -> AsyncIOMotorDatabase:
+    """The database of the app serving the request, set by server.py at import."""
+    return request.app.state.db
+
+async def require_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+) -> User:
+    """Dependency for routers outside server.py that require an active admin."""
+    current_user = await get_current_user_with_db(credentials, db)
+    if not current_user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is disabled"
+        )
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
 def get_session_id(request: Request) -> str:
     """Get or create session ID for anonymous users."""
     session_id = request.cookies.get("session_id")
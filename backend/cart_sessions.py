@@ -0,0 +1,200 @@
+from fastapi import Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+
+from leases import acquire_lease
+from models import Cart
+
+logger = logging.getLogger(__name__)
+
+# Anonymous carts are keyed by the session cookie. The cookie is only issued
+# on the first cart write, and carts nobody has touched for the cookie's
+# lifetime are expired by a TTL index, so crawlers never create documents.
+SESSION_COOKIE = "session_id"
+ANONYMOUS_CART_TTL = timedelta(days=int(os.environ.get("ANONYMOUS_CART_TTL_DAYS", "30")))
+ANONYMOUS_CART_TTL_INDEX = "anonymous_cart_ttl"
+
+CART_COMPACT_INTERVAL = float(os.environ.get("CART_COMPACT_INTERVAL_SECONDS", "3600"))
+CART_COMPACT_LEASE = timedelta(seconds=2 * CART_COMPACT_INTERVAL)
+CART_COMPACT_BATCH = 500  # referenced product ids checked per products query
+EMPTY_CART_GRACE = timedelta(hours=1)  # keep emptied carts briefly for open tabs
+
+MERGE_RETRIES = 5
+MERGED_CART_IDS_KEPT = 10  # guest carts a user cart remembers merging
+
+INDEX_OPTIONS_CONFLICT = 85
+
+def has_session(request: Request) -> bool:
+    return bool(request.cookies.get(SESSION_COOKIE))
+
+def set_session_cookie(response: Response, session_id: str):
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=int(ANONYMOUS_CART_TTL.total_seconds()))
+
+def clear_session_cookie(response: Response):
+    response.delete_cookie(SESSION_COOKIE)
+
+async def ensure_cart_indexes(database: AsyncIOMotorDatabase):
+    """Owner lookup indexes plus the TTL index that expires anonymous carts."""
+    carts = database.carts
+    await carts.create_index("user_id", partialFilterExpression={"user_id": {"$type": "string"}})
+    await carts.create_index("session_id", partialFilterExpression={"session_id": {"$type": "string"}})
+
+    expire_after = int(ANONYMOUS_CART_TTL.total_seconds())
+    try:
+        await carts.create_index(
+            "updated_at",
+            name=ANONYMOUS_CART_TTL_INDEX,
+            expireAfterSeconds=expire_after,
+            partialFilterExpression={"session_id": {"$type": "string"}}
+        )
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        # ANONYMOUS_CART_TTL_DAYS changed since the index was built
+        await database.command(
+            "collMod", "carts",
+            index={"name": ANONYMOUS_CART_TTL_INDEX, "expireAfterSeconds": expire_after}
+        )
+
+def merge_cart_items(items: List[dict], extra_items: List[dict]) -> List[dict]:
+    """Add extra lines to a cart, summing quantities of matching variants."""
+    merged = [dict(item) for item in items]
+    for extra in extra_items:
+        line = next((item for item in merged if
+                     item["product_id"] == extra["product_id"] and
+                     item["color"] == extra["color"] and
+                     item["size"] == extra["size"]), None)
+        if line:
+            line["quantity"] += extra["quantity"]
+        else:
+            merged.append(dict(extra))
+    return merged
+
+async def merge_guest_cart(database: AsyncIOMotorDatabase, session_id: Optional[str], user_id: str) -> Tuple[Optional[dict], bool]:
+    """Move a guest cart's lines into the user's cart, then delete the guest cart.
+
+    The user cart is updated only if its version is unchanged since it was
+    read, and it records the guest cart's id so concurrent logins merge it
+    once. The guest cart is deleted afterwards, and only at the version that
+    was merged. Returns the user's cart and whether the guest cart is gone;
+    if it is not, the caller keeps the session cookie so its lines stay
+    reachable.
+    """
+    if not session_id:
+        return await database.carts.find_one({"user_id": user_id}), True
+
+    for _ in range(MERGE_RETRIES):
+        guest_cart = await database.carts.find_one({"session_id": session_id})
+        user_cart = await database.carts.find_one({"user_id": user_id})
+        if not guest_cart:
+            return user_cart, True
+
+        already_merged = user_cart and guest_cart["id"] in user_cart.get("merged_cart_ids", [])
+        if guest_cart["items"] and not already_merged:
+            if not user_cart:
+                user_cart = Cart(user_id=user_id, items=guest_cart["items"], merged_cart_ids=[guest_cart["id"]], version=1).dict()
+                await database.carts.insert_one(user_cart)
+            else:
+                user_cart = await database.carts.find_one_and_update(
+                    {"user_id": user_id, "version": user_cart.get("version")},
+                    {
+                        "$set": {"items": merge_cart_items(user_cart["items"], guest_cart["items"]), "updated_at": datetime.utcnow()},
+                        "$push": {"merged_cart_ids": {"$each": [guest_cart["id"]], "$slice": -MERGED_CART_IDS_KEPT}},
+                        "$inc": {"version": 1}
+                    },
+                    return_document=ReturnDocument.AFTER
+                )
+                if not user_cart:
+                    continue
+
+        deleted = await database.carts.delete_one({"_id": guest_cart["_id"], "version": guest_cart.get("version")})
+        if deleted.deleted_count:
+            return user_cart, True
+        # The guest cart changed after it was merged; leave it for the guest session
+        logger.warning(f"Guest cart {guest_cart['id']} changed while merging into cart of user {user_id}")
+        return user_cart, False
+
+    # The user cart kept changing underneath us; the guest cart is untouched
+    logger.warning(f"Could not merge guest cart into cart of user {user_id}")
+    return await database.carts.find_one({"user_id": user_id}), False
+
+async def _prune_missing_products(database: AsyncIOMotorDatabase, product_ids: List[str]) -> int:
+    found = await database.products.find({"id": {"$in": product_ids}}, {"_id": 0, "id": 1}).to_list(length=len(product_ids))
+    missing = list(set(product_ids) - {product["id"] for product in found})
+    if not missing:
+        return 0
+    pruned = await database.carts.update_many(
+        {"items.product_id": {"$in": missing}},
+        {"$pull": {"items": {"product_id": {"$in": missing}}}, "$inc": {"version": 1}}
+    )
+    return pruned.modified_count
+
+async def compact_carts(database: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Delete emptied carts and drop lines whose product no longer exists.
+
+    Only the product ids that carts reference are checked, in batches, and
+    only ids found missing are pulled; products added meanwhile are untouched.
+    """
+    empty = await database.carts.delete_many({
+        "items": {"$size": 0},
+        "updated_at": {"$lt": datetime.utcnow() - EMPTY_CART_GRACE}
+    })
+
+    pruned = 0
+    batch: List[str] = []
+    referenced = database.carts.aggregate(
+        [{"$unwind": "$items"}, {"$group": {"_id": "$items.product_id"}}],
+        allowDiskUse=True
+    )
+    async for row in referenced:
+        batch.append(row["_id"])
+        if len(batch) >= CART_COMPACT_BATCH:
+            pruned += await _prune_missing_products(database, batch)
+            batch = []
+    if batch:
+        pruned += await _prune_missing_products(database, batch)
+
+    return {"deleted_empty": empty.deleted_count, "pruned": pruned}
+
+class CartCompactor:
+    """Background task that runs compact_carts periodically, on one worker at a time."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await ensure_cart_indexes(self.database)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                # The holder renews the lease every sweep; another worker takes over if it stops
+                if await acquire_lease(self.database, "compact_carts", CART_COMPACT_LEASE):
+                    result = await compact_carts(self.database)
+                else:
+                    result = {}
+                if any(result.values()):
+                    logger.info(f"Compacted carts: {result}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cart compaction error: {str(e)}")
+
+            await asyncio.sleep(CART_COMPACT_INTERVAL)
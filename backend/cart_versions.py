@@ -0,0 +1,74 @@
+from typing import Dict, List, Optional
+import asyncio
+import os
+
+from shared_cache import CacheBackend, shared_cache
+
+# Carts carry a version that every write increments. GET /api/cart turns it
+# into an ETag so polling clients get a 304 from a single projected read.
+CART_MAX_WAIT = int(os.environ.get("CART_MAX_WAIT_SECONDS", "30"))
+
+# Writes on other workers arrive over the shared cache's pub/sub. Without
+# Redis they are only seen when the long-poll's final re-read runs.
+CART_EVENTS_TOPIC = "cart"
+
+CART_CACHE_CONTROL = "private, no-cache"
+
+# Only the fields needed to build the ETag
+CART_VERSION_PROJECTION = {"_id": 0, "id": 1, "version": 1}
+
+def cart_key(cart_filter: dict) -> str:
+    if cart_filter.get("user_id"):
+        return f"user:{cart_filter['user_id']}"
+    return f"session:{cart_filter.get('session_id')}"
+
+def cart_etag(cart: Optional[dict], catalog_version: int) -> str:
+    """ETag for the priced cart; prices depend on the catalog, so its version is included."""
+    if not cart:
+        return f'W/"cart-empty-{catalog_version}"'
+    return f'W/"cart-{cart["id"]}-{cart.get("version", 0)}-{catalog_version}"'
+
+class CartChangeNotifier:
+    """Wakes long-polling GET /api/cart requests when any worker writes a cart."""
+
+    def __init__(self, cache: CacheBackend):
+        self._waiters: Dict[str, List] = {}  # key -> [event, waiter count]
+        self.closed = False
+        self.cache = cache
+        cache.subscribe(CART_EVENTS_TOPIC, self.wake)
+
+    async def notify(self, key: str):
+        """Wake this worker's waiters for ``key`` and tell the other workers."""
+        self.wake(key)
+        await self.cache.publish(CART_EVENTS_TOPIC, key)
+
+    def wake(self, key: str):
+        entry = self._waiters.pop(key, None)
+        if entry:
+            entry[0].set()
+
+    def close(self):
+        """Release every waiter; used when the worker starts shutting down."""
+        self.closed = True
+        for entry in self._waiters.values():
+            entry[0].set()
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a change. Returns True if notified."""
+        if self.closed:
+            return False
+        entry = self._waiters.get(key)
+        if entry is None:
+            entry = self._waiters[key] = [asyncio.Event(), 0]
+        entry[1] += 1
+        try:
+            await asyncio.wait_for(entry[0].wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self._waiters.get(key) is entry:
+                del self._waiters[key]
+
+cart_notifier = CartChangeNotifier(shared_cache)
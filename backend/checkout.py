@@ -0,0 +1,391 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import PyMongoError
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import random
+import time
+
+from http_cache import schedule_catalog_bump
+from invoices import assign_invoice_number
+from order_summary import order_summary_fields
+from order_tracking import sync_order_tracking
+
+logger = logging.getLogger(__name__)
+
+# Checkout runs as one unit of work. Every read happens up front: the cart,
+# then all of its products in one query. The writes then commit together in
+# a single short multi-document transaction:
+#
+# - a stock hold per line (one bulk_write)
+# - the order insert
+# - the cart's checkout marker
+#
+# The writes are conditional on what was read (enough stock, same cart
+# version). Contention therefore shows up as a retry of the whole unit, not
+# as long locks. Retries use jittered backoff within a fixed time budget.
+#
+# Holds and releases schedule one shared, delayed catalog bump, so cached
+# product responses catch up on availability within a few seconds. The
+# conditional holds never oversell in the meantime.
+
+CHECKOUT_TRANSACTIONS = os.environ.get("CHECKOUT_TRANSACTIONS", "auto").lower()  # auto, on or off
+CHECKOUT_MAX_ATTEMPTS = int(os.environ.get("CHECKOUT_MAX_ATTEMPTS", "4"))
+CHECKOUT_TIME_BUDGET = float(os.environ.get("CHECKOUT_TIME_BUDGET_SECONDS", "3"))
+CHECKOUT_RETRY_DELAY = 0.05  # base of the exponential backoff, in seconds
+CHECKOUT_MAX_COMMIT_MS = 1000
+
+# Held stock goes back on the shelf if the order is not paid in time
+STOCK_HOLD_TTL = timedelta(minutes=int(os.environ.get("STOCK_HOLD_MINUTES", "30")))
+STOCK_HOLD_SWEEP_INTERVAL = 60.0
+
+BULK_ORDER_QUANTITY = 15
+
+class CheckoutError(Exception):
+    """Checkout cannot go ahead; ``status_code`` is the HTTP status to answer with."""
+    status_code = 400
+
+class InsufficientStockError(CheckoutError):
+    status_code = 409
+
+class CheckoutBusyError(CheckoutError):
+    status_code = 503
+
+class CartChangedError(Exception):
+    """The cart changed between the reads and the commit."""
+
+def is_transient(error: Exception) -> bool:
+    return isinstance(error, PyMongoError) and error.has_error_label("TransientTransactionError")
+
+# ============================================================================
+# READS AND PRICING
+# ============================================================================
+
+async def load_cart_and_products(database: AsyncIOMotorDatabase, cart_filter: dict) -> Tuple[dict, Dict[str, dict]]:
+    cart = await database.carts.find_one(cart_filter)
+    if not cart or not cart["items"]:
+        raise CheckoutError("Cart is empty")
+
+    product_ids = list({item["product_id"] for item in cart["items"]})
+    products = await database.products.find(
+        {"id": {"$in": product_ids}},
+        {"_id": 0, "id": 1, "name": 1, "base_price": 1, "bulk_price": 1}
+    ).to_list(length=len(product_ids))
+    return cart, {product["id"]: product for product in products}
+
+def price_cart_items(items: List[dict], products: Dict[str, dict]) -> Tuple[List[dict], float]:
+    """Order lines and subtotal for cart items; lines for deleted products are dropped."""
+    is_bulk_order = sum(item["quantity"] for item in items) >= BULK_ORDER_QUANTITY
+
+    order_items = []
+    for item in items:
+        product = products.get(item["product_id"])
+        if not product:
+            continue
+        unit_price = product["bulk_price"] if is_bulk_order else product["base_price"]
+        order_items.append({
+            "product_id": item["product_id"],
+            "product_name": product["name"],
+            "color": item["color"],
+            "size": item["size"],
+            "quantity": item["quantity"],
+            "unit_price": unit_price,
+            "total_price": unit_price * item["quantity"]
+        })
+
+    if not order_items:
+        raise CheckoutError("Cart is empty")
+    return order_items, sum(item["total_price"] for item in order_items)
+
+# ============================================================================
+# STOCK HOLDS
+# ============================================================================
+
+def stock_updates(items: List[dict], sign: int = -1) -> List[Tuple[dict, dict]]:
+    """(filter, update) per line moving its quantity out of (sign=-1) or back into stock."""
+    updates = []
+    for item in items:
+        variant = {"color": item["color"], "size": item["size"]}
+        if sign < 0:
+            variant["stock_quantity"] = {"$gte": item["quantity"]}
+        updates.append((
+            {"id": item["product_id"], "variants": {"$elemMatch": variant}},
+            {"$inc": {"variants.$.stock_quantity": sign * item["quantity"]}}
+        ))
+    return updates
+
+def stock_operations(items: List[dict], sign: int = -1) -> List[UpdateOne]:
+    return [UpdateOne(query, update) for query, update in stock_updates(items, sign)]
+
+async def take_stock(database: AsyncIOMotorDatabase, items: List[dict], session=None) -> Optional[dict]:
+    """Take each line out of stock, putting earlier lines back if one is short; returns the short line."""
+    applied = []
+    for (query, update), item in zip(stock_updates(items), items):
+        result = await database.products.update_one(query, update, session=session)
+        if not result.matched_count:
+            if applied:
+                await database.products.bulk_write(stock_operations(applied, sign=1), ordered=False, session=session)
+            return item
+        applied.append(item)
+    return None
+
+async def release_stock_holds(database: AsyncIOMotorDatabase, order_filter: dict, updates: Optional[dict] = None) -> List[str]:
+    """Put held stock back for matching orders; returns their ids. Each order is claimed first, so it is released once."""
+    released = []
+    while True:
+        order = await database.orders.find_one_and_update(
+            {**order_filter, "stock_held": True},
+            {"$set": {"stock_held": False, "updated_at": datetime.utcnow(), **(updates or {})}},
+            projection={"_id": 0, "id": 1, "items": 1}
+        )
+        if not order:
+            if released:
+                schedule_catalog_bump(database)
+            return released
+        await database.products.bulk_write(stock_operations(order["items"], sign=1), ordered=False)
+        released.append(order["id"])
+
+class StockHoldSweeper:
+    """Background task that cancels unpaid orders whose stock hold expired."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.database.orders.create_index(
+            [("stock_held", 1), ("hold_expires_at", 1)],
+            partialFilterExpression={"stock_held": True}
+        )
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                released = await release_stock_holds(
+                    self.database,
+                    # A failed attempt can still be retried on the same order until the hold expires
+                    {"payment_status": {"$in": ["pending", "failed"]}, "hold_expires_at": {"$lt": datetime.utcnow()}},
+                    {"status": "cancelled", "payment_status": "failed"}
+                )
+                if released:
+                    logger.info(f"Released stock held by {len(released)} unpaid orders")
+                    await sync_order_tracking(self.database, {"id": {"$in": released}})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Stock hold sweep error: {str(e)}")
+
+            await asyncio.sleep(STOCK_HOLD_SWEEP_INTERVAL)
+
+# ============================================================================
+# TRANSACTIONS
+# ============================================================================
+
+_transactions_supported: Optional[bool] = {"on": True, "off": False}.get(CHECKOUT_TRANSACTIONS)
+
+async def transactions_supported(client: AsyncIOMotorClient) -> bool:
+    """Transactions need a replica set or sharded cluster; checked once per process."""
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            reply = await client.admin.command("hello")
+            _transactions_supported = "setName" in reply or reply.get("msg") == "isdbgrid"
+        except (NotImplementedError, PyMongoError):
+            _transactions_supported = False
+        if not _transactions_supported:
+            logger.warning("MongoDB transactions unavailable; checkout uses conditional writes with compensation")
+    return _transactions_supported
+
+async def run_in_transaction(client: AsyncIOMotorClient, work: Callable[[Any], Awaitable[Any]]) -> Any:
+    """Run ``work(session)`` in one transaction, retrying transient errors within the time budget.
+
+    Without transaction support ``work`` gets ``session=None`` and runs once;
+    it must then undo its own partial writes before raising.
+    """
+    if not await transactions_supported(client):
+        return await work(None)
+
+    deadline = time.monotonic() + CHECKOUT_TIME_BUDGET
+    for attempt in range(CHECKOUT_MAX_ATTEMPTS):
+        try:
+            async with await client.start_session() as session:
+                session.start_transaction(
+                    read_concern=ReadConcern("snapshot"),
+                    write_concern=WriteConcern("majority"),
+                    max_commit_time_ms=CHECKOUT_MAX_COMMIT_MS
+                )
+                try:
+                    result = await work(session)
+                except BaseException:
+                    await session.abort_transaction()
+                    raise
+                await _commit(session, deadline)
+                return result
+        except PyMongoError as e:
+            if not is_transient(e):
+                raise
+            await _backoff(attempt, deadline, e)
+    raise CheckoutBusyError("Checkout is busy, please try again")
+
+async def _commit(session, deadline: float):
+    while True:
+        try:
+            await session.commit_transaction()
+            return
+        except PyMongoError as e:
+            # The commit may have applied; retrying the commit itself is safe
+            if e.has_error_label("UnknownTransactionCommitResult") and time.monotonic() < deadline:
+                continue
+            raise
+
+async def _backoff(attempt: int, deadline: float, error: Exception):
+    delay = CHECKOUT_RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5)
+    if attempt + 1 >= CHECKOUT_MAX_ATTEMPTS or time.monotonic() + delay > deadline:
+        logger.warning(f"Checkout gave up after {attempt + 1} attempts: {str(error)}")
+        raise CheckoutBusyError("Checkout is busy, please try again")
+    await asyncio.sleep(delay)
+
+# ============================================================================
+# CHECKOUT
+# ============================================================================
+
+async def _write_checkout(database: AsyncIOMotorDatabase, session, order: dict, cart: dict):
+    if session is not None:
+        holds = stock_operations(order["items"])
+        result = await database.products.bulk_write(holds, ordered=True, session=session)
+        if result.matched_count < len(holds):
+            raise InsufficientStockError("Insufficient stock for one or more items")
+    else:
+        # No rollback without a transaction, so take_stock undoes its own partial holds
+        short_item = await take_stock(database, order["items"])
+        if short_item:
+            raise InsufficientStockError(f"Insufficient stock for {short_item['product_name']}")
+
+    await database.orders.bulk_write([InsertOne(order)], session=session)
+
+    cart_result = await database.carts.update_one(
+        {"_id": cart["_id"], "version": cart.get("version")},
+        {"$set": {"checkout_order_id": order["id"], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+        session=session
+    )
+    if not cart_result.matched_count:
+        if session is None:
+            await database.orders.delete_one({"id": order["id"]})
+            await database.products.bulk_write(stock_operations(order["items"], sign=1), ordered=False)
+        raise CartChangedError()
+
+async def place_order(
+    client: AsyncIOMotorClient,
+    database: AsyncIOMotorDatabase,
+    cart_filter: dict,
+    build_order: Callable[[List[dict], float], dict]
+) -> dict:
+    """Turn the cart into an order with its stock held.
+
+    ``build_order(order_items, subtotal)`` returns the order document (ids,
+    totals). It runs once per attempt, so it must not create anything outside
+    the database; create the payment provider's order after this returns, and
+    release the holds if that fails.
+    """
+    deadline = time.monotonic() + CHECKOUT_TIME_BUDGET
+    for attempt in range(CHECKOUT_MAX_ATTEMPTS):
+        cart, products = await load_cart_and_products(database, cart_filter)
+        order_items, subtotal = price_cart_items(cart["items"], products)
+
+        order = build_order(order_items, subtotal)
+        order.update(order_summary_fields(order["items"], order["created_at"]))
+        order["stock_held"] = True
+        order["hold_expires_at"] = order["created_at"] + STOCK_HOLD_TTL
+        # The cart's version once the checkout marker is written; later cart edits move past it
+        order["checkout_cart_version"] = (cart.get("version") or 0) + 1
+
+        async def work(session):
+            await _write_checkout(database, session, order, cart)
+
+        try:
+            await run_in_transaction(client, work)
+            schedule_catalog_bump(database)
+            return order
+        except CartChangedError as e:
+            # Re-read the cart and price it again
+            await _backoff(attempt, deadline, e)
+    raise CheckoutBusyError("Checkout is busy, please try again")
+
+# ============================================================================
+# PAYMENT CONFIRMATION
+# ============================================================================
+
+PAYMENT_CONFIRMED = "confirmed"
+PAYMENT_ALREADY_APPLIED = "already_applied"
+PAYMENT_NEEDS_REVIEW = "needs_review"
+
+async def confirm_order_payment(database: AsyncIOMotorDatabase, order_filter: dict, payment_id: str, session=None) -> str:
+    """Mark the matching order paid and confirmed, but only with its stock held.
+
+    If the hold was already released (it expired before the payment landed),
+    the stock is taken again with the same conditional updates as checkout.
+    If it is gone, the order records the payment and is flagged for a refund
+    instead of being confirmed. Returns one of the ``PAYMENT_*`` outcomes.
+    """
+    now = datetime.utcnow()
+    paid = {"payment_status": "completed", "status": "confirmed", "payment_id": payment_id, "updated_at": now}
+    unpaid = {**order_filter, "payment_status": {"$ne": "completed"}}
+
+    order = await database.orders.find_one_and_update(
+        {**unpaid, "stock_held": True}, {"$set": paid}, projection={"_id": 0, "id": 1}, session=session
+    )
+    if order:
+        await assign_invoice_number(database, order["id"], now, session)
+        return PAYMENT_CONFIRMED
+
+    order = await database.orders.find_one(unpaid, {"_id": 0, "id": 1, "items": 1}, session=session)
+    if not order:
+        return PAYMENT_ALREADY_APPLIED
+
+    if await take_stock(database, order["items"], session) is None:
+        result = await database.orders.update_one(
+            {"id": order["id"], "payment_status": {"$ne": "completed"}, "stock_held": {"$ne": True}},
+            {"$set": {**paid, "stock_held": True}},
+            session=session
+        )
+        if result.matched_count:
+            logger.info(f"Order {order['id']} was paid after its stock hold lapsed; stock taken again")
+            await assign_invoice_number(database, order["id"], now, session)
+            schedule_catalog_bump(database)
+            return PAYMENT_CONFIRMED
+        # Another confirmation got there first
+        await database.products.bulk_write(stock_operations(order["items"], sign=1), ordered=False, session=session)
+        return PAYMENT_ALREADY_APPLIED
+
+    result = await database.orders.update_one(
+        {"id": order["id"], "payment_status": {"$ne": "completed"}},
+        {"$set": {
+            "payment_status": "completed",
+            "status": "cancelled",
+            "payment_id": payment_id,
+            "needs_review": "Paid after its stock hold lapsed and the stock is gone; refund the payment",
+            "updated_at": now
+        }},
+        session=session
+    )
+    if not result.matched_count:
+        return PAYMENT_ALREADY_APPLIED
+    # The payment was taken, so it is invoiced; the refund is a credit note against it
+    await assign_invoice_number(database, order["id"], now, session)
+    logger.error(f"Order {order['id']} was paid but its stock is gone; flagged for refund")
+    return PAYMENT_NEEDS_REVIEW
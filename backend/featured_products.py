@@ -0,0 +1,38 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Each category stores the id of the product the storefront shows when the
+# category is selected, so switching categories is a lookup by product id
+# instead of a filtered products query. Maintained on product and category
+# writes; callers bump the catalog version as usual.
+
+async def pick_featured_product_id(database: AsyncIOMotorDatabase, category: str) -> Optional[str]:
+    """The oldest active product in a category."""
+    product = await database.products.find_one(
+        {"category": category, "is_active": True},
+        {"_id": 0, "id": 1},
+        sort=[("created_at", 1)]
+    )
+    return product["id"] if product else None
+
+async def refresh_featured_products(database: AsyncIOMotorDatabase, categories: Iterable[Optional[str]]) -> int:
+    """Recompute the featured product of the named categories; returns how many changed."""
+    changed = 0
+    for category in {name for name in categories if name}:
+        featured_product_id = await pick_featured_product_id(database, category)
+        result = await database.categories.update_many(
+            {"name": category, "featured_product_id": {"$ne": featured_product_id}},
+            {"$set": {"featured_product_id": featured_product_id}}
+        )
+        changed += result.modified_count
+    return changed
+
+async def refresh_all_featured_products(database: AsyncIOMotorDatabase) -> int:
+    """Backfill every category, e.g. after seeding or a bulk import; returns how many changed."""
+    names = await database.categories.distinct("name")
+    changed = await refresh_featured_products(database, names)
+    logger.info(f"Refreshed featured products for {len(names)} categories, {changed} changed")
+    return changed
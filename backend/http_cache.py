@@ -0,0 +1,117 @@
+from fastapi import HTTPException, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Version counters live in Mongo so every worker derives the same ETags.
+CACHE_VERSIONS_COLLECTION = "cache_versions"
+CATALOG_SCOPE = "catalog"
+
+# How long a worker trusts its copy of a counter before re-reading it
+VERSION_REFRESH_SECONDS = float(os.environ.get("CACHE_VERSION_REFRESH_SECONDS", "1.0"))
+
+CATALOG_CACHE_CONTROL = "public, max-age={}, stale-while-revalidate={}".format(
+    os.environ.get("CATALOG_CACHE_MAX_AGE", "60"),
+    os.environ.get("CATALOG_CACHE_SWR", "300")
+)
+INFO_CACHE_CONTROL = "public, max-age={}, stale-while-revalidate={}".format(
+    os.environ.get("INFO_CACHE_MAX_AGE", "3600"),
+    os.environ.get("INFO_CACHE_SWR", "86400")
+)
+
+_versions: Dict[str, Tuple[int, float]] = {}
+
+# ============================================================================
+# VERSION COUNTERS
+# ============================================================================
+
+async def get_cache_version(database: AsyncIOMotorDatabase, scope: str) -> int:
+    """Current version of a cache scope, refreshed from Mongo at most once per interval."""
+    cached = _versions.get(scope)
+    now = time.monotonic()
+    if cached and now - cached[1] < VERSION_REFRESH_SECONDS:
+        return cached[0]
+
+    document = await database[CACHE_VERSIONS_COLLECTION].find_one({"_id": scope})
+    version = document["version"] if document else 0
+    _versions[scope] = (version, now)
+    return version
+
+async def bump_cache_version(database: AsyncIOMotorDatabase, scope: str) -> int:
+    """Invalidate every ETag issued for a scope. Call after each write."""
+    document = await database[CACHE_VERSIONS_COLLECTION].find_one_and_update(
+        {"_id": scope},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    version = document["version"]
+    _versions[scope] = (version, time.monotonic())
+    return version
+
+async def bump_catalog_version(database: AsyncIOMotorDatabase) -> int:
+    return await bump_cache_version(database, CATALOG_SCOPE)
+
+# Stock changes with every checkout. Bumping on each one would empty the
+# catalog caches under load, so stock writes share one delayed bump.
+CATALOG_STOCK_BUMP_DELAY = float(os.environ.get("CATALOG_STOCK_BUMP_DELAY", "5"))
+
+_pending_bump: Optional["asyncio.Task[None]"] = None
+
+async def _delayed_catalog_bump(database: AsyncIOMotorDatabase, delay: float):
+    await asyncio.sleep(delay)
+    try:
+        await bump_catalog_version(database)
+    except Exception as e:
+        logger.error(f"Catalog version bump failed: {str(e)}")
+
+def schedule_catalog_bump(database: AsyncIOMotorDatabase, delay: float = CATALOG_STOCK_BUMP_DELAY):
+    """Bump the catalog version within ``delay`` seconds; calls in the meantime share the bump."""
+    global _pending_bump
+    if _pending_bump is None or _pending_bump.done():
+        _pending_bump = asyncio.ensure_future(_delayed_catalog_bump(database, delay))
+
+# ============================================================================
+# CONDITIONAL REQUESTS
+# ============================================================================
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def check_not_modified(request: Request, etag: str, cache_control: str):
+    """Short-circuit with 304 when the client already holds this ETag."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": cache_control}
+        )
+
+def set_cache_headers(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
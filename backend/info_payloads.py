@@ -0,0 +1,125 @@
+from pydantic import BaseModel, EmailStr, model_validator
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import json
+import logging
+import os
+
+from http_cache import content_etag
+from json_responses import DefaultJSONResponse
+
+logger = logging.getLogger(__name__)
+
+INFO_PAGES_FILE = Path(os.environ.get(
+    "INFO_PAGES_FILE",
+    Path(__file__).parent / "data" / "info_pages.json"
+))
+
+# ============================================================================
+# CONTENT VALIDATION
+# ============================================================================
+
+class DeliveryZone(BaseModel):
+    id: str
+    state: str
+    city: str
+    pincode_range: str
+    delivery_days: int
+    shipping_cost: float
+    is_cod_available: bool
+    is_express_available: bool
+
+    @model_validator(mode="after")
+    def check_pincode_range(self):
+        start, _, end = self.pincode_range.partition("-")
+        if not (start.isdigit() and end.isdigit() and int(start) <= int(end)):
+            raise ValueError(f"invalid pincode_range {self.pincode_range!r} for {self.city}")
+        return self
+
+class DeliveryPolicies(BaseModel):
+    free_shipping_threshold: float
+    express_delivery_cost: float
+    cod_charges: float
+    return_policy_days: int
+    exchange_policy_days: int
+
+class DeliveryDetails(BaseModel):
+    zones: List[DeliveryZone]
+    policies: DeliveryPolicies
+
+class ContactInfo(BaseModel):
+    company_name: str
+    email: EmailStr
+    phone: str
+    address: Dict[str, str]
+
+class AboutUs(BaseModel):
+    company_name: str
+    about: str
+    key_features: List[str]
+
+class PricingTier(BaseModel):
+    min_qty: int
+    max_qty: Optional[int] = None
+    discount: str
+    label: str
+
+class PricingInfo(BaseModel):
+    minimum_order: int
+    pricing_tiers: List[PricingTier]
+
+    @model_validator(mode="after")
+    def check_tiers(self):
+        previous_max = self.minimum_order - 1
+        for tier in self.pricing_tiers:
+            if previous_max is None or tier.min_qty != previous_max + 1:
+                raise ValueError(f"pricing tier {tier.label!r} does not follow the previous tier")
+            if tier.max_qty is not None and tier.max_qty < tier.min_qty:
+                raise ValueError(f"pricing tier {tier.label!r} has max_qty below min_qty")
+            previous_max = tier.max_qty
+        return self
+
+class InfoPages(BaseModel):
+    delivery_details: DeliveryDetails
+    contact_info: ContactInfo
+    about_us: AboutUs
+    pricing_info: PricingInfo
+
+# ============================================================================
+# PAYLOAD STORE
+# ============================================================================
+
+class InfoPayload:
+    """A static info page serialized once, ready to be sent as-is."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, content: Any):
+        self.body = DefaultJSONResponse(content).body
+        self.etag = content_etag(self.body)
+
+class InfoPayloadStore:
+    """Loads, validates and pre-serializes the static info pages."""
+
+    # Pages served verbatim by the info router
+    PAGES = ("delivery_details", "contact_info", "about_us", "pricing_info")
+
+    def __init__(self, path: Path = INFO_PAGES_FILE):
+        self.path = path
+        self.payloads: Dict[str, InfoPayload] = {}
+
+    def load(self):
+        """(Re)build every payload. Raises and keeps the old ones if the content is invalid."""
+        with open(self.path, encoding="utf-8") as f:
+            content = json.load(f)
+        InfoPages(**content)
+
+        self.payloads = {page: InfoPayload(content[page]) for page in self.PAGES}
+        logger.info(f"Loaded {len(self.payloads)} info pages from {self.path}")
+
+    def get(self, page: str) -> InfoPayload:
+        if not self.payloads:
+            self.load()
+        return self.payloads[page]
+
+info_payloads = InfoPayloadStore()
@@ -0,0 +1,111 @@
+"""GST invoice rendering for paid orders.
+
+Runs inside the invoice process pool, so it imports only the standard
+library (and WeasyPrint for PDFs). Spawned workers then start quickly and
+never touch Mongo or the event loop.
+"""
+from html import escape
+from typing import Any, Dict, List, Tuple
+import hashlib
+import json
+
+# Bump when the layout changes; every invoice then gets a new version
+INVOICE_TEMPLATE_VERSION = 1
+
+GST_RATE = 0.18
+
+# Order fields an invoice is rendered from
+INVOICE_FIELDS = (
+    "id", "email", "phone", "items", "subtotal", "tax_amount", "shipping_amount", "total_amount",
+    "shipping_address", "billing_address", "payment_id", "invoice_number", "created_at"
+)
+
+def invoice_version(order: Dict[str, Any], seller: Dict[str, str]) -> str:
+    """Content address of an order's invoice; changes with the order, the seller details or the template."""
+    data = {field: order.get(field) for field in INVOICE_FIELDS}
+    canonical = json.dumps([INVOICE_TEMPLATE_VERSION, seller, data], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:24]
+
+def invoice_number(order: Dict[str, Any]) -> str:
+    """The serial allocated when the order was paid (see invoices.assign_invoice_number)."""
+    return order["invoice_number"]
+
+def gst_breakdown(order: Dict[str, Any], seller: Dict[str, str]) -> List[Tuple[str, float]]:
+    """CGST + SGST within the seller's state, IGST for other places of supply."""
+    tax = order["tax_amount"]
+    rate = GST_RATE * 100
+    if order["shipping_address"]["state"].strip().lower() == seller["state"].strip().lower():
+        return [(f"CGST ({rate / 2:g}%)", tax / 2), (f"SGST ({rate / 2:g}%)", tax / 2)]
+    return [(f"IGST ({rate:g}%)", tax)]
+
+def _money(value: float) -> str:
+    return f"&#8377;{value:,.2f}"
+
+def _address(address: Dict[str, Any]) -> str:
+    lines = [
+        address["full_name"],
+        address["address_line_1"],
+        address.get("address_line_2"),
+        f"{address['city']}, {address['state']} {address['postal_code']}",
+        address.get("country", "India"),
+        f"Phone: {address['phone']}"
+    ]
+    return "<br>".join(escape(line) for line in lines if line)
+
+def render_invoice_html(order: Dict[str, Any], seller: Dict[str, str]) -> str:
+    rows = "".join(
+        f"<tr><td>{index}</td><td>{escape(item['product_name'])}<br><small>{escape(item['color'])} / {escape(str(item['size']))}</small></td>"
+        f"<td>{escape(seller['hsn_code'])}</td><td class=num>{item['quantity']}</td>"
+        f"<td class=num>{_money(item['unit_price'])}</td><td class=num>{_money(item['total_price'])}</td></tr>"
+        for index, item in enumerate(order["items"], start=1)
+    )
+    taxes = "".join(
+        f"<tr><td colspan=5>{label}</td><td class=num>{_money(amount)}</td></tr>"
+        for label, amount in gst_breakdown(order, seller)
+    )
+    billing = order.get("billing_address") or order["shipping_address"]
+
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>Tax Invoice {invoice_number(order)}</title>
+<style>
+body {{ font-family: Helvetica, Arial, sans-serif; font-size: 12px; color: #222; margin: 32px; }}
+h1 {{ font-size: 20px; margin: 0 0 4px; }}
+table {{ width: 100%; border-collapse: collapse; margin-top: 16px; }}
+th, td {{ border: 1px solid #ccc; padding: 6px; text-align: left; vertical-align: top; }}
+.num {{ text-align: right; }}
+.parties td {{ border: none; width: 50%; padding: 0; }}
+.total td {{ font-weight: bold; }}
+</style></head><body>
+<h1>Tax Invoice</h1>
+<div>Invoice {invoice_number(order)} &middot; Order {escape(order['id'])} &middot; {order['created_at']:%d %b %Y}</div>
+<table class="parties"><tr>
+<td><strong>{escape(seller['name'])}</strong><br>{escape(seller['address'])}<br>GSTIN: {escape(seller['gstin'])}</td>
+<td><strong>Bill to</strong><br>{_address(billing)}<br>{escape(order['email'])}</td>
+</tr><tr>
+<td></td>
+<td><strong>Ship to</strong><br>{_address(order['shipping_address'])}<br>Place of supply: {escape(order['shipping_address']['state'])}</td>
+</tr></table>
+<table>
+<tr><th>#</th><th>Item</th><th>HSN</th><th class=num>Qty</th><th class=num>Rate</th><th class=num>Amount</th></tr>
+{rows}
+<tr><td colspan=5>Taxable value</td><td class=num>{_money(order['subtotal'])}</td></tr>
+{taxes}
+<tr><td colspan=5>Shipping</td><td class=num>{_money(order['shipping_amount'])}</td></tr>
+<tr class="total"><td colspan=5>Total</td><td class=num>{_money(order['total_amount'])}</td></tr>
+</table>
+<p>Payment reference: {escape(order.get('payment_id') or '-')}</p>
+</body></html>"""
+
+def render_invoice(order: Dict[str, Any], seller: Dict[str, str], fmt: str) -> bytes:
+    html = render_invoice_html(order, seller)
+    if fmt == "pdf":
+        from weasyprint import HTML  # optional, checked by invoices.pdf_available()
+        return HTML(string=html).write_pdf()
+    return html.encode()
+
+def render_invoice_batch(orders: List[Dict[str, Any]], seller: Dict[str, str], fmt: str) -> List[Tuple[str, str, str, bytes]]:
+    """(order id, version, invoice number, body) for each order; one pool task per batch."""
+    return [
+        (order["id"], invoice_version(order, seller), invoice_number(order), render_invoice(order, seller, fmt))
+        for order in orders
+    ]
@@ -0,0 +1,247 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson import Binary
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import importlib.util
+import logging
+import multiprocessing
+import os
+
+from invoice_render import invoice_version, render_invoice_batch
+from job_queue import job_queue
+from order_summary import parse_created_at
+
+logger = logging.getLogger(__name__)
+
+# Invoices are rendered in a process pool, off the event loop. They are
+# stored content-addressed: one document per order, invoice version and
+# format. The version is a digest of the order data, the seller details
+# and the template, so a changed order gets a new invoice. The version
+# doubles as the ETag, so a revalidation costs only the order read.
+INVOICES_COLLECTION = "invoices"
+
+# GST invoice numbers are one consecutive series per financial year (April to
+# March), e.g. INV/25-26/000042, which fits the 16 character limit. Each year
+# has a counter document. A number is allocated once, when the order is paid,
+# and stored on the order.
+INVOICE_COUNTERS_COLLECTION = "invoice_counters"
+INVOICE_FORMATS = {"html": "text/html; charset=utf-8", "pdf": "application/pdf"}
+INVOICE_CACHE_CONTROL = f"private, max-age={os.environ.get('INVOICE_CACHE_MAX_AGE', '300')}"
+
+# Pool for on-demand renders in each API worker process. Bulk re-renders
+# get their own pool with one process per core.
+INVOICE_WORKERS = int(os.environ.get("INVOICE_WORKERS", "2"))
+INVOICE_RERENDER_BATCH = 100
+INVOICE_RERENDER_TIMEOUT = 3600.0
+
+SELLER = {
+    "name": os.environ.get("INVOICE_SELLER_NAME", "DRIBBLE"),
+    "address": os.environ.get("INVOICE_SELLER_ADDRESS", ""),
+    "state": os.environ.get("INVOICE_SELLER_STATE", "Maharashtra"),
+    "gstin": os.environ.get("INVOICE_SELLER_GSTIN", ""),
+    "hsn_code": os.environ.get("INVOICE_HSN_CODE", "6109")
+}
+
+RENDER_INVOICE = "render_invoice"
+RERENDER_INVOICES = "rerender_invoices"
+
+class InvoiceUnavailableError(Exception):
+    """No invoice can be served; ``status_code`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status_code: int = 409):
+        super().__init__(message)
+        self.status_code = status_code
+
+_pool: Optional[ProcessPoolExecutor] = None
+_rendering: Dict[Tuple[str, str, str], "asyncio.Future[bytes]"] = {}
+
+def _create_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned, not forked: the parent runs an event loop and Motor's threads
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+def get_invoice_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = _create_pool(INVOICE_WORKERS)
+    return _pool
+
+def shutdown_invoice_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def pdf_available() -> bool:
+    return importlib.util.find_spec("weasyprint") is not None
+
+def invoice_available(order: Dict[str, Any]) -> bool:
+    return order.get("payment_status") == "completed" and bool(order.get("invoice_number"))
+
+def financial_year(moment: datetime) -> str:
+    """Indian financial year label, e.g. "25-26" for April 2025 to March 2026."""
+    start = moment.year if moment.month >= 4 else moment.year - 1
+    return f"{start % 100:02d}-{(start + 1) % 100:02d}"
+
+async def assign_invoice_number(database: AsyncIOMotorDatabase, order_id: str, issued_at: datetime, session=None) -> str:
+    """Give a paid order the next invoice number of its financial year.
+
+    Callers make sure only one of them numbers a given order (the payment
+    flip or the single-worker backfill). Inside a transaction the counter
+    and the order commit together, so the series never has gaps.
+    """
+    year = financial_year(issued_at)
+    counter = await database[INVOICE_COUNTERS_COLLECTION].find_one_and_update(
+        {"_id": year},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    number = f"INV/{year}/{counter['seq']:06d}"
+    await database.orders.update_one(
+        {"id": order_id, "invoice_number": {"$exists": False}},
+        {"$set": {"invoice_number": number}},
+        session=session
+    )
+    return number
+
+async def backfill_invoice_numbers(database: AsyncIOMotorDatabase) -> int:
+    """Number paid orders from before invoice numbers were allocated, oldest first."""
+    numbered = 0
+    cursor = database.orders.find(
+        {"payment_status": "completed", "invoice_number": {"$exists": False}},
+        {"_id": 0, "id": 1, "created_at": 1}
+    ).sort("created_at", ASCENDING)
+    async for order in cursor:
+        await assign_invoice_number(database, order["id"], parse_created_at(order.get("created_at")) or datetime.utcnow())
+        numbered += 1
+    if numbered:
+        logger.info(f"Allocated invoice numbers to {numbered} paid orders")
+    return numbered
+
+async def ensure_invoice_indexes(database: AsyncIOMotorDatabase):
+    await database[INVOICES_COLLECTION].create_index(
+        [("order_id", ASCENDING), ("version", ASCENDING), ("format", ASCENDING)], unique=True
+    )
+
+async def _render(pool: Executor, orders: List[dict], fmt: str) -> List[Tuple[str, str, str, bytes]]:
+    return await asyncio.get_running_loop().run_in_executor(pool, render_invoice_batch, orders, SELLER, fmt)
+
+def _store_operation(order_id: str, version: str, number: str, fmt: str, body: bytes) -> UpdateOne:
+    return UpdateOne(
+        {"order_id": order_id, "version": version, "format": fmt},
+        {"$set": {"invoice_number": number, "body": Binary(body), "rendered_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def _render_and_store(database: AsyncIOMotorDatabase, order: dict, fmt: str) -> bytes:
+    [(order_id, version, number, body)] = await _render(get_invoice_pool(), [order], fmt)
+    try:
+        await database[INVOICES_COLLECTION].bulk_write([_store_operation(order_id, version, number, fmt, body)])
+    except DuplicateKeyError:
+        pass  # another worker stored the same render first
+    return body
+
+# ============================================================================
+# SERVING
+# ============================================================================
+
+async def get_invoice(database: AsyncIOMotorDatabase, order: dict, fmt: str = "html") -> bytes:
+    """Stored invoice body for a paid order, rendered once if missing."""
+    if not invoice_available(order):
+        raise InvoiceUnavailableError("Invoice is available once payment is confirmed and numbered")
+    if fmt == "pdf" and not pdf_available():
+        raise InvoiceUnavailableError("PDF invoices are not enabled on this server", status_code=501)
+
+    version = invoice_version(order, SELLER)
+    document = await database[INVOICES_COLLECTION].find_one(
+        {"order_id": order["id"], "version": version, "format": fmt},
+        {"_id": 0, "body": 1}
+    )
+    if document:
+        return bytes(document["body"])
+
+    # Concurrent requests for the same invoice share one render
+    key = (order["id"], version, fmt)
+    render = _rendering.get(key)
+    if render is None:
+        render = asyncio.ensure_future(_render_and_store(database, order, fmt))
+        _rendering[key] = render
+        render.add_done_callback(lambda _: _rendering.pop(key, None))
+    return await asyncio.shield(render)
+
+def invoice_etag(order: dict, fmt: str) -> str:
+    return f'"invoice-{invoice_version(order, SELLER)}-{fmt}"'
+
+# ============================================================================
+# BACKGROUND RENDERING
+# ============================================================================
+
+@job_queue.job(RENDER_INVOICE)
+async def render_invoice_job(database: AsyncIOMotorDatabase, payload: Dict[str, Any]):
+    """Render a newly paid order's invoice before anyone asks for it."""
+    order = await database.orders.find_one({"id": payload["order_id"]}, {"_id": 0})
+    if order and invoice_available(order):
+        await get_invoice(database, order, payload.get("format", "html"))
+
+async def rerender_invoices(
+    database: AsyncIOMotorDatabase,
+    start: datetime,
+    end: datetime,
+    fmt: str = "html",
+    workers: Optional[int] = None
+) -> int:
+    """Re-render invoices for paid orders created in [start, end), in parallel across cores."""
+    workers = workers or os.cpu_count() or 1
+    pool = _create_pool(workers)
+    rendered = 0
+    pending = set()
+
+    async def render_batch(orders: List[dict]) -> int:
+        results = await _render(pool, orders, fmt)
+        await database[INVOICES_COLLECTION].bulk_write(
+            [_store_operation(order_id, version, number, fmt, body) for order_id, version, number, body in results],
+            ordered=False
+        )
+        return len(results)
+
+    try:
+        batch: List[dict] = []
+        cursor = database.orders.find(
+            {"payment_status": "completed", "invoice_number": {"$exists": True}, "created_at": {"$gte": start, "$lt": end}},
+            {"_id": 0}
+        )
+        async for order in cursor:
+            batch.append(order)
+            if len(batch) < INVOICE_RERENDER_BATCH:
+                continue
+            pending.add(asyncio.create_task(render_batch(batch)))
+            batch = []
+            # Keep every process busy without reading the whole range into memory
+            if len(pending) >= workers * 2:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                rendered += sum(task.result() for task in done)
+        if batch:
+            pending.add(asyncio.create_task(render_batch(batch)))
+        if pending:
+            rendered += sum(await asyncio.gather(*pending))
+    finally:
+        for task in pending:
+            task.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Re-rendered {rendered} invoices from {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+    return rendered
+
+@job_queue.job(RERENDER_INVOICES, timeout=INVOICE_RERENDER_TIMEOUT)
+async def rerender_invoices_job(database: AsyncIOMotorDatabase, payload: Dict[str, Any]):
+    await rerender_invoices(
+        database,
+        datetime.fromisoformat(payload["start"]),
+        datetime.fromisoformat(payload["end"]),
+        payload.get("format", "html")
+    )
@@ -0,0 +1,281 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Side effects that don't have to finish before the response, such as
+# clearing the cart or committing stock after a payment, run as background
+# jobs. They go to a Mongo outbox. A job enqueued with the caller's session
+# commits or aborts with the caller's transaction, and survives restarts.
+# The in-process MemoryJobQueue is for tests only: it cannot join a
+# transaction, so it refuses to. Handlers must be idempotent: a job may run
+# more than once after a retry or a crashed worker.
+JOB_CONCURRENCY = int(os.environ.get("JOB_CONCURRENCY", "4"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5"))
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT_SECONDS", "60"))
+
+JOB_RETRY_DELAY = 2.0  # seconds, doubled after every failed attempt
+JOB_MAX_RETRY_DELAY = 300.0
+JOB_POLL_INTERVAL = 1.0  # seconds between outbox sweeps when idle
+JOB_LEASE = timedelta(minutes=5)  # a running job is retried after this, if its worker died
+JOB_RETENTION = timedelta(days=7)  # finished jobs are then removed; failed ones are kept
+
+JOBS_COLLECTION = "jobs"
+
+JobHandler = Callable[[AsyncIOMotorDatabase, Dict[str, Any]], Awaitable[Any]]
+
+def retry_delay(attempts: int) -> float:
+    return min(JOB_RETRY_DELAY * 2 ** (attempts - 1), JOB_MAX_RETRY_DELAY)
+
+class JobMetrics:
+    def __init__(self):
+        self.enqueued = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        runs = self.succeeded + self.retried + self.failed
+        return {
+            "enqueued": self.enqueued,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_ms": round(self.total_ms / runs, 2) if runs else 0.0,
+            "max_ms": round(self.max_ms, 2)
+        }
+
+class JobQueue:
+    """Named job handlers run by background workers, at most ``concurrency`` at a time."""
+
+    name = "base"
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY):
+        self.concurrency = concurrency
+        self.handlers: Dict[str, JobHandler] = {}
+        self.timeouts: Dict[str, float] = {}
+        self.metrics: Dict[str, JobMetrics] = defaultdict(JobMetrics)
+        self.database: Optional[AsyncIOMotorDatabase] = None
+        self.running = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def job(self, name: str, timeout: float = JOB_TIMEOUT) -> Callable[[JobHandler], JobHandler]:
+        """Register ``handler(database, payload)`` for jobs called ``name``."""
+        def register(handler: JobHandler) -> JobHandler:
+            self.handlers[name] = handler
+            self.timeouts[name] = timeout
+            return handler
+        return register
+
+    async def enqueue(self, name: str, payload: Dict[str, Any], database: Optional[AsyncIOMotorDatabase] = None, session=None):
+        raise NotImplementedError
+
+    async def start(self, database: AsyncIOMotorDatabase):
+        self.database = database
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _execute(self, name: str, payload: Dict[str, Any], attempts: int) -> Optional[str]:
+        """Run one attempt of a job; returns the error if it failed."""
+        handler = self.handlers.get(name)
+        if not handler:
+            logger.error(f"No handler registered for job {name}")
+            return f"No handler registered for job {name}"
+
+        metrics = self.metrics[name]
+        self.running += 1
+        started = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(handler(self.database, payload), timeout=self.timeouts[name])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        finally:
+            self.running -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics.total_ms += elapsed_ms
+            metrics.max_ms = max(metrics.max_ms, elapsed_ms)
+
+        if error is None:
+            metrics.succeeded += 1
+        elif attempts < JOB_MAX_ATTEMPTS:
+            metrics.retried += 1
+            logger.warning(f"Job {name} failed (attempt {attempts}), will retry: {error}")
+        else:
+            metrics.failed += 1
+            logger.error(f"Job {name} failed after {attempts} attempts: {error}")
+        return error
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "jobs": {name: metrics.as_dict() for name, metrics in sorted(self.metrics.items())}
+        }
+
+class MemoryJobQueue(JobQueue):
+    """In-process queue for tests. Queued jobs are lost on exit."""
+
+    name = "memory"
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY):
+        super().__init__(concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def enqueue(self, name: str, payload: Dict[str, Any], database: Optional[AsyncIOMotorDatabase] = None, session=None):
+        # The job would run even if the transaction aborted
+        if session is not None and session.in_transaction:
+            raise RuntimeError(f"Job {name} was enqueued in a transaction, which only the Mongo outbox supports")
+        self.metrics[name].enqueued += 1
+        self._queue.put_nowait((name, payload, 1))
+
+    async def start(self, database: AsyncIOMotorDatabase):
+        await super().start(database)
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def _worker(self):
+        while True:
+            name, payload, attempts = await self._queue.get()
+            error = await self._execute(name, payload, attempts)
+            if error and attempts < JOB_MAX_ATTEMPTS:
+                asyncio.get_running_loop().call_later(
+                    retry_delay(attempts), self._queue.put_nowait, (name, payload, attempts + 1)
+                )
+
+    async def stats(self) -> Dict[str, Any]:
+        return {**await super().stats(), "queued": self._queue.qsize() if self._queue else 0}
+
+class MongoJobQueue(JobQueue):
+    """Durable outbox in the ``jobs`` collection, shared by every worker process."""
+
+    name = "mongo"
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY):
+        super().__init__(concurrency)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def enqueue(self, name: str, payload: Dict[str, Any], database: Optional[AsyncIOMotorDatabase] = None, session=None):
+        if database is None:
+            database = self.database
+        now = datetime.utcnow()
+        await database[JOBS_COLLECTION].insert_one({
+            "name": name,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "run_after": now,
+            "created_at": now
+        }, session=session)
+        self.metrics[name].enqueued += 1
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def start(self, database: AsyncIOMotorDatabase):
+        await super().start(database)
+        jobs = database[JOBS_COLLECTION]
+        await jobs.create_index([("status", ASCENDING), ("run_after", ASCENDING)])
+        await jobs.create_index("finished_at", expireAfterSeconds=int(JOB_RETENTION.total_seconds()))
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._tasks = [asyncio.create_task(self._run())]
+
+    async def stop(self):
+        await super().stop()
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.database[JOBS_COLLECTION].find_one_and_update(
+            {"$or": [
+                {"status": "pending", "run_after": {"$lte": now}},
+                {"status": "running", "lease_expires_at": {"$lt": now}}
+            ]},
+            {"$set": {"status": "running", "lease_expires_at": now + JOB_LEASE}, "$inc": {"attempts": 1}},
+            sort=[("run_after", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}")
+                job = None
+
+            if not job:
+                self._slots.release()
+                # A timer rather than wait_for, which on Python 3.11 swallows stop()'s
+                # cancel when it lands together with an enqueue
+                timer = asyncio.get_running_loop().call_later(JOB_POLL_INTERVAL, self._wakeup.set)
+                try:
+                    await self._wakeup.wait()
+                finally:
+                    timer.cancel()
+                self._wakeup.clear()
+                continue
+
+            task = asyncio.create_task(self._process(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, job: dict):
+        try:
+            timeout = self.timeouts.get(job["name"], JOB_TIMEOUT)
+            if timeout > JOB_LEASE.total_seconds():
+                # Keep long jobs from being claimed again while they still run
+                await self.database[JOBS_COLLECTION].update_one(
+                    {"_id": job["_id"]},
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=timeout) + JOB_LEASE}}
+                )
+            error = await self._execute(job["name"], job.get("payload", {}), job["attempts"])
+            now = datetime.utcnow()
+            if error is None:
+                update = {"$set": {"status": "done", "finished_at": now}, "$unset": {"lease_expires_at": ""}}
+            elif job["attempts"] < JOB_MAX_ATTEMPTS:
+                update = {
+                    "$set": {"status": "pending", "run_after": now + timedelta(seconds=retry_delay(job["attempts"])), "last_error": error},
+                    "$unset": {"lease_expires_at": ""}
+                }
+            else:
+                update = {"$set": {"status": "failed", "failed_at": now, "last_error": error}, "$unset": {"lease_expires_at": ""}}
+            await self.database[JOBS_COLLECTION].update_one({"_id": job["_id"]}, update)
+        except Exception as e:
+            # The lease expires and another sweep picks the job up again
+            logger.error(f"Job {job['name']} could not be recorded: {str(e)}")
+        finally:
+            self._slots.release()
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await self.database[JOBS_COLLECTION].aggregate([
+            {"$match": {"status": {"$in": ["pending", "running", "failed"]}}},
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        return {**await super().stats(), "outbox": {row["_id"]: row["count"] for row in counts}}
+
+job_queue = MongoJobQueue()
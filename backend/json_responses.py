@@ -0,0 +1,38 @@
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import List, Optional, Union
+import os
+
+# Optional orjson fast path, enabled with FAST_JSON=true
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+    ORJSONResponse = None
+
+FAST_JSON_ENABLED = os.environ.get("FAST_JSON", "false").lower() == "true" and orjson is not None
+
+DefaultJSONResponse = ORJSONResponse if FAST_JSON_ENABLED else JSONResponse
+
+def model_response(data: Union[BaseModel, List[BaseModel]], response: Optional[Response] = None):
+    """Return models a handler has already validated.
+
+    With FAST_JSON enabled the models are dumped and sent straight to orjson,
+    skipping FastAPI's response_model re-validation. Otherwise the models are
+    returned unchanged and go through the regular response_model path.
+
+    Pass the injected ``response`` when the handler set headers on it; FastAPI
+    does not copy those onto responses returned directly.
+    """
+    if not FAST_JSON_ENABLED:
+        return data
+
+    if isinstance(data, BaseModel):
+        json_response = ORJSONResponse(content=data.dict())
+    else:
+        json_response = ORJSONResponse(content=[item.dict() for item in data])
+    if response is not None:
+        json_response.headers.raw.extend(response.headers.raw)
+    return json_response
@@ -0,0 +1,32 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+import os
+import uuid
+
+# Maintenance that must not run on every worker at once (startup backfills,
+# periodic sweeps) takes a named lease first. A lease is one document per
+# name; whoever holds an unexpired lease does the work and the other workers
+# skip it. Leases are not released early, so workers starting within the
+# same window skip work that was just done.
+LEASES_COLLECTION = "leases"
+
+# Startup backfills run at most once per window, i.e. once per deploy
+STARTUP_TASK_LEASE = timedelta(minutes=int(os.environ.get("STARTUP_TASK_LEASE_MINUTES", "10")))
+
+# Identifies this process as a lease owner
+WORKER_ID = str(uuid.uuid4())
+
+async def acquire_lease(database: AsyncIOMotorDatabase, name: str, ttl: timedelta, owner: str = WORKER_ID) -> bool:
+    """Take or renew the lease called ``name`` for ``ttl``; False while another owner holds it."""
+    now = datetime.utcnow()
+    try:
+        await database[LEASES_COLLECTION].update_one(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "acquired_at": now, "expires_at": now + ttl}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another owner holds it, so the upsert tried to insert a second document
+        return False
+    return True
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, model_validator
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -89,6 +89,22 @@ class ProductUpdate(BaseModel):
     pricing_rules: Optional[PricingRule] = None
     is_active: Optional[bool] = None
 
+class StockQueryItem(BaseModel):
+    """A variant identified either by SKU or by product_id, color and size."""
+    product_id: Optional[str] = None
+    color: Optional[str] = None
+    size: Optional[SizeEnum] = None
+    sku: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_identifier(self):
+        if not self.sku and not (self.product_id and self.color and self.size):
+            raise ValueError("provide either sku or product_id, color and size")
+        return self
+
+class StockBatchRequest(BaseModel):
+    items: List[StockQueryItem] = Field(..., min_length=1, max_length=200)
+
 # User Models
 class UserBase(BaseModel):
     email: EmailStr
@@ -148,6 +164,8 @@ class Cart(BaseModel):
     user_id: Optional[str] = None
     session_id: Optional[str] = None
     items: List[CartItem]
+    version: int = 0  # incremented on every write
+    merged_cart_ids: List[str] = Field(default_factory=list)  # guest carts already merged in
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -183,6 +201,7 @@ class Order(BaseModel):
     payment_status: PaymentStatusEnum = PaymentStatusEnum.PENDING
     payment_id: Optional[str] = None
     notes: Optional[str] = None
+    needs_review: Optional[str] = None  # why a paid order needs a refund or manual follow-up
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -218,6 +237,7 @@ class Category(BaseModel):
     color: str = "bg-gray-500"  # Tailwind CSS color class for navigation button
     is_active: bool = True
     sort_order: int = 0
+    featured_product_id: Optional[str] = None  # product shown when the category is selected
 
 class CategoryCreate(BaseModel):
     name: str
@@ -239,6 +259,7 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     user: User
+    cart: Optional[Dict[str, Any]] = None  # priced cart, including lines merged from the guest cart
 
 class MessageResponse(BaseModel):
     message: str
@@ -269,4 +290,9 @@ class CheckoutRequest(BaseModel):
     shipping_address: AddressCreate
     billing_address: Optional[AddressCreate] = None
     notes: Optional[str] = None
-    is_bulk_order: bool
\ No newline at end of file
+    is_bulk_order: bool
+
+class InvoiceRerenderRequest(BaseModel):
+    start: datetime
+    end: datetime
+    format: Literal["html", "pdf"] = "html"
@@ -0,0 +1,70 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+from typing import Any, Dict
+import logging
+
+from cart_versions import cart_key, cart_notifier
+from checkout import take_stock
+from http_cache import schedule_catalog_bump
+from job_queue import job_queue
+from order_tracking import sync_order_tracking
+
+logger = logging.getLogger(__name__)
+
+# Work that follows a confirmed payment. The payment endpoints only flip the
+# order's status and enqueue these jobs, so they answer as soon as the order
+# is marked paid. Invoices, emails and analytics rollups belong here too.
+CLEAR_CHECKOUT_CART = "clear_checkout_cart"
+COMMIT_ORDER_STOCK = "commit_order_stock"
+
+@job_queue.job(CLEAR_CHECKOUT_CART)
+async def clear_checkout_cart(database: AsyncIOMotorDatabase, payload: Dict[str, Any]):
+    """Delete the cart a paid order was checked out from, unless it was edited since.
+
+    An edited cart holds lines the buyer still wants, so it is kept and only
+    loses its checkout marker.
+    """
+    cart_filter = {"checkout_order_id": payload["order_id"]}
+    order = await database.orders.find_one({"id": payload["order_id"]}, {"_id": 0, "checkout_cart_version": 1})
+    if order and order.get("checkout_cart_version") is not None:
+        cart_filter["version"] = order["checkout_cart_version"]
+    cart = await database.carts.find_one_and_delete(cart_filter, projection={"_id": 0, "user_id": 1, "session_id": 1})
+    if cart:
+        await cart_notifier.notify(cart_key(cart))
+        return
+    await database.carts.update_one(
+        {"checkout_order_id": payload["order_id"]},
+        {"$unset": {"checkout_order_id": ""}}
+    )
+
+@job_queue.job(COMMIT_ORDER_STOCK)
+async def commit_order_stock(database: AsyncIOMotorDatabase, payload: Dict[str, Any]):
+    """Take a paid order's items out of stock, unless checkout already held them.
+
+    Stock is only taken where there is enough of it. If another buyer got the
+    last units first, the order is flagged for a refund, as confirm_order_payment
+    does, rather than overselling.
+    """
+    # Marking the order as holding its stock first makes a rerun a no-op
+    order = await database.orders.find_one_and_update(
+        {"id": payload["order_id"], "stock_held": {"$ne": True}, "needs_review": None},
+        {"$set": {"stock_held": True}},
+        projection={"_id": 0, "items": 1}
+    )
+    if not order:
+        return
+    if await take_stock(database, order["items"]) is None:
+        schedule_catalog_bump(database)
+        return
+
+    await database.orders.update_one(
+        {"id": payload["order_id"]},
+        {"$set": {
+            "stock_held": False,
+            "status": "cancelled",
+            "needs_review": "Paid but the stock is gone; refund the payment",
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    await sync_order_tracking(database, {"id": payload["order_id"]})
+    logger.error(f"Order {payload['order_id']} was paid but its stock is gone; flagged for refund")
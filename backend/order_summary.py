@@ -0,0 +1,96 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Orders carry compact summary fields next to their items, written once when
+# the order is created. Analytics group on them instead of unwinding every
+# order's items or formatting dates per document, and the indexes below
+# cover the dashboard's revenue and daily sales queries.
+
+SUMMARY_BACKFILL_BATCH = 1000
+
+def order_summary_fields(items: List[Dict[str, Any]], created_at: Optional[datetime]) -> Dict[str, Any]:
+    """Summary fields for an order document, from its item dicts.
+
+    ``lines`` has one entry per product (colors and sizes folded together).
+    The top-products report only unwinds these entries. ``day`` is None
+    when the order has no usable creation time.
+    """
+    lines: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        line = lines.setdefault(item["product_id"], {
+            "product_id": item["product_id"],
+            "product_name": item["product_name"],
+            "quantity": 0,
+            "revenue": 0.0
+        })
+        line["quantity"] += item["quantity"]
+        line["revenue"] += item["total_price"]
+
+    return {
+        "item_count": len(items),
+        "unit_count": sum(item["quantity"] for item in items),
+        "day": created_at.strftime("%Y-%m-%d") if created_at else None,
+        "product_ids": list(lines),
+        "lines": list(lines.values())
+    }
+
+async def ensure_order_indexes(database: AsyncIOMotorDatabase):
+    orders = database.orders
+    await orders.create_index("id")
+    # Customer order history and the admin order list
+    await orders.create_index([("user_id", 1), ("created_at", -1)])
+    await orders.create_index([("created_at", -1)])
+    # Revenue totals and daily sales, answered from the index alone
+    await orders.create_index([("payment_status", 1), ("created_at", 1), ("day", 1), ("total_amount", 1)])
+    await orders.create_index("product_ids")
+
+def parse_created_at(value: Any) -> Optional[datetime]:
+    """An order's created_at as a datetime; imports sometimes store ISO strings."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+def _backfill_fields(order: Dict[str, Any]) -> Dict[str, Any]:
+    created_at = parse_created_at(order.get("created_at"))
+    try:
+        fields = order_summary_fields(order.get("items") or [], created_at)
+    except (KeyError, TypeError) as e:
+        logger.warning(f"Order {order.get('id')} has malformed items, summary left empty: {str(e)}")
+        return {"day": None}
+    if created_at is None:
+        logger.warning(f"Order {order.get('id')} has no usable created_at, so it has no summary day")
+    return fields
+
+async def backfill_order_summaries(database: AsyncIOMotorDatabase) -> int:
+    """Add summary fields to orders written before they existed or outside the API.
+
+    Orders that cannot be summarised are logged and get ``day: None``, so
+    they are not picked up again and do not stop the backfill.
+    """
+    updated = 0
+    while True:
+        orders = await database.orders.find(
+            {"day": {"$exists": False}},
+            {"_id": 1, "id": 1, "items": 1, "created_at": 1}
+        ).limit(SUMMARY_BACKFILL_BATCH).to_list(length=SUMMARY_BACKFILL_BATCH)
+        if not orders:
+            break
+        await database.orders.bulk_write([
+            UpdateOne({"_id": order["_id"]}, {"$set": _backfill_fields(order)})
+            for order in orders
+        ], ordered=False)
+        updated += len(orders)
+
+    if updated:
+        logger.info(f"Backfilled summary fields on {updated} orders")
+    return updated
@@ -0,0 +1,198 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import re
+
+from job_queue import job_queue
+from order_summary import parse_created_at
+from shipping_rates import shipping_engine
+
+logger = logging.getLogger(__name__)
+
+# A compact tracking read model, one document per order. It is derived from
+# the order and refreshed after every status transition. The public payload
+# is stored pre-serialized in ``summary``, and both lookup indexes include
+# it. A lookup by order id, or by email and phone, is therefore a covered
+# index read. It never fetches the order or the tracking document, and the
+# handler sends the stored JSON as is.
+ORDER_TRACKING_COLLECTION = "order_tracking"
+TRACKING_LIST_LIMIT = 20
+TRACKING_SYNC_ATTEMPTS = 3
+
+SYNC_ORDER_TRACKING = "sync_order_tracking"
+
+TRACKING_ORDER_PROJECTION = {
+    "_id": 0, "id": 1, "email": 1, "phone": 1, "status": 1, "payment_status": 1, "total_amount": 1,
+    "item_count": 1, "unit_count": 1, "shipping_address.postal_code": 1, "created_at": 1, "updated_at": 1
+}
+
+def normalize_email(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+def normalize_phone(phone: Optional[str]) -> str:
+    # Last ten digits, so "+91 98765 43210" and "9876543210" match
+    return re.sub(r"\D", "", phone or "")[-10:]
+
+def estimated_delivery(order: Dict[str, Any], timeline: List[Dict[str, Any]]) -> Optional[str]:
+    """Delivery date estimated from confirmation plus the shipping zone's delivery days."""
+    if order["status"] in ("delivered", "cancelled"):
+        return None
+    confirmed_at = next((entry["at"] for entry in timeline if entry["status"] == "confirmed"), None)
+    if not confirmed_at:
+        return None
+    rate = shipping_engine.get_rate((order.get("shipping_address") or {}).get("postal_code") or "")
+    return (confirmed_at + timedelta(days=rate.delivery_days)).strftime("%Y-%m-%d")
+
+def tracking_summary(order: Dict[str, Any], timeline: List[Dict[str, Any]]) -> str:
+    return json.dumps({
+        "order_id": order["id"],
+        "status": order["status"],
+        "payment_status": order["payment_status"],
+        "placed_at": order["created_at"].isoformat(),
+        "total_amount": order["total_amount"],
+        "item_count": order.get("item_count"),
+        "unit_count": order.get("unit_count"),
+        "timeline": [{"status": entry["status"], "at": entry["at"].isoformat()} for entry in timeline],
+        "estimated_delivery": estimated_delivery(order, timeline)
+    }, separators=(",", ":"))
+
+# Lookups hint these, so the planner never prefers the plain order_id index
+ORDER_ID_COVERING_INDEX = [("order_id", ASCENDING), ("summary", ASCENDING)]
+CONTACT_COVERING_INDEX = [("email", ASCENDING), ("phone", ASCENDING), ("placed_at", DESCENDING), ("summary", ASCENDING)]
+
+async def ensure_tracking_indexes(database: AsyncIOMotorDatabase):
+    tracking = database[ORDER_TRACKING_COLLECTION]
+    await tracking.create_index("order_id", unique=True)
+    await tracking.create_index(ORDER_ID_COVERING_INDEX)
+    await tracking.create_index(CONTACT_COVERING_INDEX)
+
+# ============================================================================
+# MAINTENANCE
+# ============================================================================
+
+def _tracking_fields(order: Dict[str, Any], current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    timeline = list(current["timeline"]) if current else []
+    if not timeline:
+        timeline.append({"status": "pending", "at": order["created_at"]})
+    if timeline[-1]["status"] != order["status"]:
+        timeline.append({"status": order["status"], "at": order.get("updated_at") or datetime.utcnow()})
+
+    return {
+        "email": normalize_email(order.get("email")),
+        "phone": normalize_phone(order.get("phone")),
+        "placed_at": order["created_at"],
+        "timeline": timeline,
+        "summary": tracking_summary(order, timeline)
+    }
+
+def _tracking_operation(order_id: str, fields: Dict[str, Any], current: Optional[Dict[str, Any]]) -> UpdateOne:
+    if current:
+        # The revision guard turns a concurrent refresh into a retry
+        return UpdateOne(
+            {"order_id": order_id, "revision": current["revision"]},
+            {"$set": fields, "$inc": {"revision": 1}}
+        )
+    return UpdateOne({"order_id": order_id}, {"$setOnInsert": {**fields, "revision": 1}}, upsert=True)
+
+async def sync_order_tracking(database: AsyncIOMotorDatabase, order_filter: Dict[str, Any]):
+    """Bring the tracking documents of matching orders up to date with the orders."""
+    for _ in range(TRACKING_SYNC_ATTEMPTS):
+        orders = await database.orders.find(order_filter, TRACKING_ORDER_PROJECTION).to_list(length=None)
+        order_ids = [order["id"] for order in orders]
+        current = {
+            document["order_id"]: document
+            for document in await database[ORDER_TRACKING_COLLECTION].find(
+                {"order_id": {"$in": order_ids}},
+                {"_id": 0, "order_id": 1, "timeline": 1, "revision": 1, "summary": 1}
+            ).to_list(length=None)
+        }
+
+        operations, inserts = [], 0
+        for order in orders:
+            created_at = parse_created_at(order.get("created_at"))
+            if created_at is None:
+                logger.warning(f"Order {order['id']} has no usable created_at, so it is not tracked")
+                continue
+            order["created_at"] = created_at
+            existing = current.get(order["id"])
+            fields = _tracking_fields(order, existing)
+            if existing and existing["summary"] == fields["summary"]:
+                continue
+            operations.append(_tracking_operation(order["id"], fields, existing))
+            inserts += existing is None
+        if not operations:
+            return
+
+        try:
+            result = await database[ORDER_TRACKING_COLLECTION].bulk_write(operations, ordered=False)
+            # An insert that matched, or an update that didn't, lost a race
+            if result.upserted_count == inserts and result.matched_count == len(operations) - inserts:
+                return
+        except BulkWriteError:
+            pass  # a concurrent insert won; the next pass updates it
+        order_filter = {"id": {"$in": order_ids}}
+    logger.warning(f"Order tracking still contended after {TRACKING_SYNC_ATTEMPTS} attempts")
+
+@job_queue.job(SYNC_ORDER_TRACKING)
+async def sync_order_tracking_job(database: AsyncIOMotorDatabase, payload: Dict[str, Any]):
+    await sync_order_tracking(database, {"id": {"$in": payload["order_ids"]}})
+
+async def backfill_order_tracking(database: AsyncIOMotorDatabase, batch_size: int = 500) -> int:
+    """Create tracking documents for orders placed before the read model existed."""
+    if await database[ORDER_TRACKING_COLLECTION].estimated_document_count() >= await database.orders.estimated_document_count():
+        return 0
+
+    created = 0
+    batch: List[str] = []
+
+    async def flush():
+        nonlocal created
+        tracked = {
+            document["order_id"]
+            for document in await database[ORDER_TRACKING_COLLECTION].find(
+                {"order_id": {"$in": batch}}, {"_id": 0, "order_id": 1}
+            ).to_list(length=None)
+        }
+        missing = [order_id for order_id in batch if order_id not in tracked]
+        if missing:
+            await sync_order_tracking(database, {"id": {"$in": missing}})
+            created += len(missing)
+
+    async for order in database.orders.find({}, {"_id": 0, "id": 1}):
+        batch.append(order["id"])
+        if len(batch) == batch_size:
+            await flush()
+            batch = []
+    if batch:
+        await flush()
+
+    if created:
+        logger.info(f"Backfilled tracking for {created} orders")
+    return created
+
+# ============================================================================
+# LOOKUPS
+# ============================================================================
+
+async def find_tracking_summaries(
+    database: AsyncIOMotorDatabase,
+    order_id: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None
+) -> List[str]:
+    """Stored tracking JSON, newest order first, read from the index alone."""
+    tracking = database[ORDER_TRACKING_COLLECTION]
+    if not order_id and not (normalize_email(email) and normalize_phone(phone)):
+        return []
+    if order_id:
+        cursor = tracking.find({"order_id": order_id}, {"_id": 0, "summary": 1}).hint(ORDER_ID_COVERING_INDEX).limit(1)
+    else:
+        cursor = tracking.find(
+            {"email": normalize_email(email), "phone": normalize_phone(phone)},
+            {"_id": 0, "summary": 1}
+        ).sort("placed_at", DESCENDING).hint(CONTACT_COVERING_INDEX).limit(TRACKING_LIST_LIMIT)
+    return [document["summary"] for document in await cursor.to_list(length=TRACKING_LIST_LIMIT)]
@@ -0,0 +1,19 @@
+from functools import lru_cache
+import os
+
+# The payment SDKs are slow to import (razorpay pulls in requests) and only
+# checkout needs them, so clients are created on first use rather than at
+# startup.
+
+@lru_cache(maxsize=None)
+def get_razorpay_client():
+    import razorpay
+    return razorpay.Client(auth=(
+        os.environ.get('RAZORPAY_KEY_ID'),
+        os.environ.get('RAZORPAY_KEY_SECRET')
+    ))
+
+@lru_cache(maxsize=None)
+def get_stripe_client():
+    from emergentintegrations.payments.stripe.checkout import StripeCheckout
+    return StripeCheckout(api_key=os.getenv("STRIPE_SECRET_KEY", ""))
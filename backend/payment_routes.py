@@ -3,8 +3,11 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from typing import Optional
 from models import PaymentTransaction, PaymentStatusEnum, User
 from auth import get_current_user_dep
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionRequest
-import os
+from job_queue import job_queue
+from order_jobs import COMMIT_ORDER_STOCK
+from invoices import RENDER_INVOICE
+from order_tracking import SYNC_ORDER_TRACKING
+from payment_clients import get_stripe_client
 from datetime import datetime
 import logging
 
@@ -13,9 +16,6 @@ logger = logging.getLogger(__name__)
 # Payment router
 payment_router = APIRouter(prefix="/payments", tags=["payments"])
 
-# Initialize payment clients
-stripe_client = StripeCheckout(api_key=os.getenv("STRIPE_SECRET_KEY", ""))
-
 # Payment package definitions (server-side only for security)
 PAYMENT_PACKAGES = {
     "custom": {"name": "Custom Amount", "description": "Custom payment amount"},
@@ -47,6 +47,7 @@ async def create_stripe_session(
         cancel_url = f"{origin}/payment/cancel"
         
         # Create checkout session request
+        from emergentintegrations.payments.stripe.checkout import CheckoutSessionRequest
         checkout_request = CheckoutSessionRequest(
             amount=amount,
             currency=currency,
@@ -60,7 +61,7 @@ async def create_stripe_session(
         )
         
         # Create Stripe session
-        session_response = await stripe_client.create_checkout_session(checkout_request)
+        session_response = await get_stripe_client().create_checkout_session(checkout_request)
         
         # Create payment transaction record
         payment_transaction = PaymentTransaction(
@@ -96,7 +97,7 @@ async def get_stripe_payment_status(
     """Check Stripe payment status and update database."""
     try:
         # Get payment status from Stripe
-        checkout_status = await stripe_client.get_checkout_status(session_id)
+        checkout_status = await get_stripe_client().get_checkout_status(session_id)
         
         # Find payment transaction in database
         payment_transaction = await database.payment_transactions.find_one({"session_id": session_id})
@@ -137,26 +138,10 @@ async def get_stripe_payment_status(
                     }
                 )
                 
-                # Update product stock
-                order = await database.orders.find_one({"id": payment_transaction["order_id"]})
-                if order:
-                    for item in order["items"]:
-                        await database.products.update_one(
-                            {
-                                "id": item["product_id"],
-                                "variants": {
-                                    "$elemMatch": {
-                                        "color": item["color"],
-                                        "size": item["size"]
-                                    }
-                                }
-                            },
-                            {
-                                "$inc": {
-                                    "variants.$.stock_quantity": -item["quantity"]
-                                }
-                            }
-                        )
+                # Stock, the invoice and tracking are handled in the background
+                await job_queue.enqueue(COMMIT_ORDER_STOCK, {"order_id": payment_transaction["order_id"]}, database)
+                await job_queue.enqueue(RENDER_INVOICE, {"order_id": payment_transaction["order_id"]}, database)
+                await job_queue.enqueue(SYNC_ORDER_TRACKING, {"order_ids": [payment_transaction["order_id"]]}, database)
         
         return {
             "status": checkout_status.status,
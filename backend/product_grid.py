@@ -0,0 +1,162 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+import base64
+import binascii
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The admin product grid: one page of table rows per request, sorted and
+# filtered by the database. Pages are keyset paginated on (sort field, id),
+# so page 200 costs the same as page 1. Each sort has two indexes, with and
+# without a category prefix. ``is_active`` is always matched, with $in for
+# "all", so the planner merges the two sorted runs instead of sorting.
+GridSort = Literal["created_at", "name", "base_price"]
+GridOrder = Literal["asc", "desc"]
+GridActive = Literal["active", "inactive", "all"]
+StockStatus = Literal["in_stock", "low_stock", "out_of_stock"]
+
+GRID_SORTS = ("created_at", "name", "base_price")
+GRID_PAGE_SIZE = 50
+GRID_MAX_PAGE_SIZE = 200
+LOW_STOCK_THRESHOLD = 5
+
+# Only the columns the table shows
+GRID_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "category": 1, "gsm": 1, "base_price": 1, "bulk_price": 1,
+    "pricing_rules.regular_price": 1, "pricing_rules.bulk_price": 1, "is_active": 1, "created_at": 1,
+    "variants.stock_quantity": 1
+}
+
+# The three statuses split the catalog: all variants above the threshold,
+# some variant at or below it, or nothing left at all
+STOCK_STATUS_FILTERS: Dict[str, Dict[str, Any]] = {
+    "in_stock": {"$and": [
+        {"variants.stock_quantity": {"$gt": LOW_STOCK_THRESHOLD}},
+        {"variants.stock_quantity": {"$not": {"$lte": LOW_STOCK_THRESHOLD}}}
+    ]},
+    "low_stock": {"$and": [
+        {"variants.stock_quantity": {"$lte": LOW_STOCK_THRESHOLD}},
+        {"variants.stock_quantity": {"$gt": 0}}
+    ]},
+    "out_of_stock": {"variants.stock_quantity": {"$not": {"$gt": 0}}}
+}
+
+# Built before the grid existed; (category, is_active, created_at, id) covers it
+SUPERSEDED_PRODUCT_INDEX = "category_1_is_active_1_created_at_1"
+
+async def ensure_product_grid_indexes(database: AsyncIOMotorDatabase):
+    if SUPERSEDED_PRODUCT_INDEX in await database.products.index_information():
+        await database.products.drop_index(SUPERSEDED_PRODUCT_INDEX)
+    for sort in GRID_SORTS:
+        await database.products.create_index([("is_active", ASCENDING), (sort, ASCENDING), ("id", ASCENDING)])
+        await database.products.create_index([("category", ASCENDING), ("is_active", ASCENDING), (sort, ASCENDING), ("id", ASCENDING)])
+
+def stock_status(quantities: List[int]) -> str:
+    if not any(quantity > 0 for quantity in quantities):
+        return "out_of_stock"
+    if min(quantities) <= LOW_STOCK_THRESHOLD:
+        return "low_stock"
+    return "in_stock"
+
+def grid_row(product: Dict[str, Any]) -> Dict[str, Any]:
+    quantities = [variant.get("stock_quantity", 0) for variant in product.get("variants", [])]
+    pricing = product.get("pricing_rules") or {}
+    return {
+        "id": product["id"],
+        "name": product["name"],
+        "category": product["category"],
+        "gsm": product.get("gsm"),
+        "regular_price": pricing.get("regular_price", product["base_price"]),
+        "bulk_price": pricing.get("bulk_price", product["bulk_price"]),
+        "is_active": product["is_active"],
+        "created_at": product["created_at"],
+        "variant_count": len(quantities),
+        "total_stock": sum(quantities),
+        "stock_status": stock_status(quantities)
+    }
+
+# ============================================================================
+# KEYSET CURSORS
+# ============================================================================
+
+def encode_grid_cursor(sort: str, product: Dict[str, Any]) -> str:
+    value = product[sort]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort, value, product["id"]]).encode()).decode()
+
+def decode_grid_cursor(sort: str, cursor: str) -> tuple:
+    """(sort value, id) of the row a page continues after; ValueError if the cursor is not for this sort."""
+    try:
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid page cursor")
+    if cursor_sort != sort:
+        raise ValueError("Page cursor belongs to a different sort")
+    if sort == "created_at":
+        value = datetime.fromisoformat(value)
+    return value, product_id
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+class ProductGridPage:
+    """One page of grid rows, read in batches; ``next_cursor`` is set once the rows are exhausted."""
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        sort: str = "created_at",
+        order: str = "desc",
+        category: Optional[str] = None,
+        active: str = "active",
+        stock: Optional[str] = None,
+        limit: int = GRID_PAGE_SIZE,
+        after: Optional[str] = None
+    ):
+        self.sort = sort
+        self.limit = max(1, min(limit, GRID_MAX_PAGE_SIZE))
+        self.next_cursor: Optional[str] = None
+
+        query: Dict[str, Any] = {"is_active": {"$in": [True, False]} if active == "all" else active == "active"}
+        if category:
+            query["category"] = category
+        if stock:
+            if stock not in STOCK_STATUS_FILTERS:
+                raise ValueError(f"Unknown stock status: {stock}")
+            query.update(STOCK_STATUS_FILTERS[stock])
+        if after:
+            value, product_id = decode_grid_cursor(sort, after)
+            past, through = ("$lt", "$lte") if order == "desc" else ("$gt", "$gte")
+            # The plain bound lets the planner scan the index from the cursor on
+            query[sort] = {through: value}
+            query["$or"] = [{sort: {past: value}}, {"id": {past: product_id}}]
+
+        direction = DESCENDING if order == "desc" else ASCENDING
+        # One extra row tells whether there is a next page
+        self._cursor = database.products.find(query, GRID_PROJECTION).sort(
+            [(sort, direction), ("id", direction)]
+        ).limit(self.limit + 1)
+
+    async def batches(self, size: int = GRID_PAGE_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+        served, last = 0, None
+        while True:
+            products = await self._cursor.to_list(length=size)
+            if not products:
+                return
+            page = products[:self.limit - served]
+            served += len(page)
+            if page:
+                last = page[-1]
+                yield [grid_row(product) for product in page]
+            if len(page) < len(products):
+                self.next_cursor = encode_grid_cursor(self.sort, last)
+                return
+
+    async def rows(self) -> List[Dict[str, Any]]:
+        return [row async for batch in self.batches(self.limit) for row in batch]
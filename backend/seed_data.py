@@ -10,6 +10,9 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
+from http_cache import bump_catalog_version
+from featured_products import refresh_all_featured_products
+
 # Load environment
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -208,6 +211,11 @@ async def seed_database():
         await db.products.insert_one(product.dict())
     
     print("👕 Created products with variants and stock")
+
+    # Categories were inserted before their products, so pick their featured products now
+    await refresh_all_featured_products(db)
+    # Running servers must not keep serving the old catalog from cache
+    await bump_catalog_version(db)
     
     print("✅ Database seeding completed successfully!")
     print("\n📋 Summary:")
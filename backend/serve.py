@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Production entry point: runs the API in several uvicorn worker processes.
+
+    python backend/serve.py --workers 4 --port 8001
+
+The parent process binds the socket once and supervises the workers. Each
+worker runs the app's startup hooks (index creation, Mongo pool and cache
+warm-up) before it accepts connections. On SIGTERM/SIGINT the workers stop
+accepting, release long-polling cart requests and finish in-flight requests
+within the drain timeout.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that wakes long-polling cart requests as soon as shutdown starts."""
+
+    def handle_exit(self, sig, frame):
+        if not self.should_exit:
+            from cart_versions import cart_notifier
+            cart_notifier.close()
+        super().handle_exit(sig, frame)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with multiple workers")
+    parser.add_argument("--app", default="server:app", help="ASGI app import string")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--drain-timeout", type=int, default=int(os.environ.get("DRAIN_TIMEOUT_SECONDS", "30")),
+                        help="seconds to wait for in-flight requests on shutdown")
+    parser.add_argument("--log-level", default=os.environ.get("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    # Worker processes are spawned and inherit this path
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    config = uvicorn.Config(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        proxy_headers=True,
+        forwarded_allow_ips=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        timeout_graceful_shutdown=args.drain_timeout,
+        log_level=args.log_level
+    )
+    server = DrainingServer(config=config)
+
+    if args.workers <= 1:
+        server.run()
+        return
+
+    sock = config.bind_socket()
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,13 @@ from dotenv import load_dotenv
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime, timedelta
 import uuid
 import hmac
 import hashlib
-import json
+import time
+import asyncio
 
 # Import local modules using absolute imports
 import sys
@@ -20,30 +21,53 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from models import *
 from auth import *
 from simple_info_routes import info_router
-
-# Import payment integrations
-from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
-import razorpay
+from admin_ui_routes import admin_ui_router
+from info_payloads import info_payloads
+from shipping_rates import shipping_engine
+from json_responses import DefaultJSONResponse, model_response
+from http_cache import CATALOG_CACHE_CONTROL, CATALOG_SCOPE, bump_catalog_version, check_not_modified, etag_matches, get_cache_version, make_etag, set_cache_headers
+from cart_sessions import SESSION_COOKIE, CartCompactor, clear_session_cookie, has_session, merge_guest_cart, set_session_cookie
+from cart_versions import CART_CACHE_CONTROL, CART_MAX_WAIT, CART_VERSION_PROJECTION, cart_etag, cart_key, cart_notifier
+from featured_products import pick_featured_product_id, refresh_all_featured_products, refresh_featured_products
+from order_summary import backfill_order_summaries, ensure_order_indexes, order_summary_fields
+from checkout import PAYMENT_CONFIRMED, PAYMENT_NEEDS_REVIEW, CheckoutError, StockHoldSweeper, confirm_order_payment, place_order, release_stock_holds, run_in_transaction
+from job_queue import job_queue
+from leases import STARTUP_TASK_LEASE, acquire_lease
+from order_jobs import CLEAR_CHECKOUT_CART
+from invoices import INVOICE_CACHE_CONTROL, INVOICE_FORMATS, RENDER_INVOICE, RERENDER_INVOICES, InvoiceUnavailableError, backfill_invoice_numbers, ensure_invoice_indexes, get_invoice, invoice_etag, shutdown_invoice_pool
+from invoice_render import invoice_number
+from product_grid import GridActive, GridOrder, GridSort, ProductGridPage, StockStatus, ensure_product_grid_indexes
+from order_tracking import SYNC_ORDER_TRACKING, backfill_order_tracking, ensure_tracking_indexes, find_tracking_summaries, normalize_phone
+from shared_cache import INFO_NAMESPACE, PRINCIPALS_NAMESPACE, PRINCIPAL_CACHE_TTL, cached_json_response, shared_cache
+from webhook_queue import WebhookConsumer, get_webhook_event_id, parse_webhook_payload, record_malformed_webhook_event, record_webhook_event
+from payment_clients import get_razorpay_client
+from pymongo import ReturnDocument
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection. Each worker process has its own pool, so the server
+# sees up to workers x MONGO_MAX_POOL_SIZE connections.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=int(os.environ['MONGO_MAX_IDLE_TIME_MS']) if os.environ.get('MONGO_MAX_IDLE_TIME_MS') else None
+)
 db = client[os.environ['DB_NAME']]
 
-# Razorpay client setup
-razorpay_client = razorpay.Client(auth=(
-    os.environ.get('RAZORPAY_KEY_ID'),
-    os.environ.get('RAZORPAY_KEY_SECRET')
-))
-
-# Payment clients
-stripe_client = StripeCheckout(api_key=os.getenv("STRIPE_SECRET_KEY", ""))
+# Applies recorded Razorpay webhook events in the background
+webhook_consumer = WebhookConsumer(db)
+cart_compactor = CartCompactor(db)
+# Returns stock held by orders that were never paid
+stock_hold_sweeper = StockHoldSweeper(db)
 
 # Create the main app
-app = FastAPI(title="DRIBBLE E-Commerce API", version="1.0.0")
+app = FastAPI(title="DRIBBLE E-Commerce API", version="1.0.0", default_response_class=DefaultJSONResponse)
+# Routers outside this module reach the database through auth.get_db
+app.state.db = db
 api_router = APIRouter(prefix="/api")
 
 # CORS middleware
@@ -53,6 +77,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Dependency to get database
@@ -68,20 +93,22 @@ async def get_current_user_db(
     if not credentials:
         return None
     
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
+    payload = decode_access_token(credentials.credentials)
+    email: Optional[str] = payload.get("sub") if payload else None
+    if email is None:
         return None
     
+    # Principals are cached briefly so most requests skip the users lookup
+    cached = await shared_cache.get(PRINCIPALS_NAMESPACE, email)
+    if cached is not None:
+        return User.model_validate_json(cached)
+    
     user = await get_user_by_email(database, email)
     if user is None:
         return None
     
     # Convert to User (remove hashed_password)
-    return User(
+    principal = User(
         id=user.id,
         email=user.email,
         full_name=user.full_name,
@@ -90,15 +117,52 @@ async def get_current_user_db(
         is_admin=user.is_admin,
         created_at=user.created_at
     )
+    await shared_cache.set(PRINCIPALS_NAMESPACE, email, principal.model_dump_json().encode(), PRINCIPAL_CACHE_TTL)
+    return principal
 
 # Removed get_current_user_with_db function as it's no longer needed
 
+async def current_catalog_etag(database: AsyncIOMotorDatabase) -> str:
+    return make_etag(CATALOG_SCOPE, await get_cache_version(database, CATALOG_SCOPE))
+
+async def catalog_cache(
+    request: Request,
+    response: Response,
+    database: AsyncIOMotorDatabase = Depends(get_database)
+) -> str:
+    """Conditional GET support for catalog reads, keyed on the catalog version.
+
+    The ETag also covers the URL, so one resource's ETag never validates
+    another. The returned catalog-wide tag keys the shared cache entries.
+    """
+    catalog_etag = await current_catalog_etag(database)
+    etag = make_etag(catalog_etag, request.url.path, request.url.query)
+    check_not_modified(request, etag, CATALOG_CACHE_CONTROL)
+    set_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
+    return catalog_etag
+
 # ============================================================================
 # AUTHENTICATION ROUTES
 # ============================================================================
 
+async def adopt_guest_cart(database: AsyncIOMotorDatabase, request: Request, response: Response, user_id: str) -> dict:
+    """Merge the visitor's guest cart into the user's cart and end the guest session once it is merged."""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    cart, merged = await merge_guest_cart(database, session_id, user_id)
+    if session_id:
+        if merged:
+            clear_session_cookie(response)
+        await cart_notifier.notify(cart_key({"session_id": session_id}))
+    await cart_notifier.notify(cart_key({"user_id": user_id}))
+    return await build_priced_cart(database, cart)
+
 @api_router.post("/auth/register", response_model=TokenResponse)
-async def register(user_data: UserCreate, database: AsyncIOMotorDatabase = Depends(get_database)):
+async def register(
+    user_data: UserCreate,
+    request: Request,
+    response: Response,
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
     # Check if user already exists
     existing_user = await get_user_by_email(database, user_data.email)
     if existing_user:
@@ -115,15 +179,21 @@ async def register(user_data: UserCreate, database: AsyncIOMotorDatabase = Depen
     await database.users.insert_one(user_in_db.dict())
     
     # Create access token
-    access_token = create_access_token(data={"sub": user_data.email})
+    access_token = create_access_token(data={"sub": user_data.email, "uid": user_in_db.id})
     
     # Convert to User for response
     user = User(**user_in_db.dict(exclude={"hashed_password"}))
     
-    return TokenResponse(access_token=access_token, user=user)
+    cart = await adopt_guest_cart(database, request, response, user.id)
+    return TokenResponse(access_token=access_token, user=user, cart=cart)
 
 @api_router.post("/auth/login", response_model=TokenResponse)
-async def login(login_data: UserLogin, database: AsyncIOMotorDatabase = Depends(get_database)):
+async def login(
+    login_data: UserLogin,
+    request: Request,
+    response: Response,
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
     user = await authenticate_user(database, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
@@ -131,12 +201,13 @@ async def login(login_data: UserLogin, database: AsyncIOMotorDatabase = Depends(
             detail="Incorrect email or password"
         )
     
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     
     # Convert to User for response
     user_response = User(**user.dict(exclude={"hashed_password"}))
     
-    return TokenResponse(access_token=access_token, user=user_response)
+    cart = await adopt_guest_cart(database, request, response, user.id)
+    return TokenResponse(access_token=access_token, user=user_response, cart=cart)
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user_db)):
@@ -148,13 +219,23 @@ async def get_me(current_user: User = Depends(get_current_user_db)):
 # PRODUCT ROUTES
 # ============================================================================
 
+# Product list requests are clamped to these before they are queried or cached
+PRODUCT_LIST_MAX_LIMIT = 100
+PRODUCT_SEARCH_MAX_LENGTH = 100
+
 @api_router.get("/products", response_model=List[Product])
 async def get_products(
+    response: Response,
     category: Optional[str] = None,
     search: Optional[str] = None,
     limit: int = 50,
+    catalog_etag: str = Depends(catalog_cache),
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
+    # Normalised so equivalent requests share one cache entry and the key space stays bounded
+    limit = max(1, min(limit, PRODUCT_LIST_MAX_LIMIT))
+    search = " ".join((search or "").split()).lower()[:PRODUCT_SEARCH_MAX_LENGTH] or None
+    
     filter_query = {"is_active": True}
     
     if category:
@@ -166,39 +247,99 @@ async def get_products(
             {"description": {"$regex": search, "$options": "i"}}
         ]
     
-    products = await database.products.find(filter_query).limit(limit).to_list(length=limit)
-    return [Product(**product) for product in products]
+    async def load():
+        products = await database.products.find(filter_query).limit(limit).to_list(length=limit)
+        return [Product(**product) for product in products]
+    
+    # Keyed on the catalog ETag, so catalog writes retire old entries
+    key = f"products:{catalog_etag}:{category!r}:{search!r}:{limit}"
+    return await cached_json_response(CATALOG_SCOPE, key, response, load)
 
-@api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str, database: AsyncIOMotorDatabase = Depends(get_database)):
-    product = await database.products.find_one({"id": product_id, "is_active": True})
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**product)
+@api_router.get("/products/view")
+async def get_product_view(
+    response: Response,
+    product_id: Optional[str] = None,
+    category: Optional[str] = None,
+    catalog_etag: str = Depends(catalog_cache),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Everything the product page needs in one response.
 
-@api_router.get("/products/{product_id}/sizechart")
-async def get_product_sizechart(product_id: str, database: AsyncIOMotorDatabase = Depends(get_database)):
-    """Get size chart and pricing for a specific product."""
-    product = await database.products.find_one({"id": product_id, "is_active": True})
+    Picks the product by id, else the category's featured (oldest) product,
+    else the first active product.
+    """
+    key = f"view:{catalog_etag}:{product_id!r}:{category!r}"
+    return await cached_json_response(CATALOG_SCOPE, key, response, lambda: build_product_view(database, product_id, category))
+
+async def build_product_view(database: AsyncIOMotorDatabase, product_id: Optional[str], category: Optional[str]) -> dict:
+    product = None
+    if product_id:
+        product = await database.products.find_one({"id": product_id, "is_active": True})
+    elif category:
+        product = await database.products.find_one(
+            {"category": category, "is_active": True},
+            sort=[("created_at", 1)]
+        )
+    if not product and not product_id:
+        product = await database.products.find_one({"is_active": True})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    # color -> size -> stock_quantity
+    stock = {}
+    for variant in product["variants"]:
+        stock.setdefault(variant["color"], {})[variant["size"]] = variant["stock_quantity"]
+    
     return {
-        "colors": product.get("size_chart", {}).get("colors", ["Black", "White", "Lavender", "Beige", "Red", "Sage Green", "Brown", "Maroon", "Orange", "Navy"]),
-        "sizes": product.get("size_chart", {}).get("sizes", ["S", "M", "L", "XL", "XXL"]),
-        "chart_code": product.get("size_chart", {}).get("chart_code", "OS210"),
+        "product": Product(**product),
+        "size_chart": product_size_chart(product),
+        "stock": stock
+    }
+
+@api_router.get("/products/{product_id}", response_model=Product)
+async def get_product(
+    product_id: str,
+    response: Response,
+    catalog_etag: str = Depends(catalog_cache),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    async def load():
+        product = await database.products.find_one({"id": product_id, "is_active": True})
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return Product(**product)
+    
+    return await cached_json_response(CATALOG_SCOPE, f"product:{catalog_etag}:{product_id}", response, load)
+
+def product_size_chart(product: dict) -> dict:
+    """Size chart and pricing labels for a product document, with storefront defaults."""
+    size_chart = product.get("size_chart") or {}
+    pricing_rules = product.get("pricing_rules") or {}
+    return {
+        "colors": size_chart.get("colors", ["Black", "White", "Lavender", "Beige", "Red", "Sage Green", "Brown", "Maroon", "Orange", "Navy"]),
+        "sizes": size_chart.get("sizes", ["S", "M", "L", "XL", "XXL"]),
+        "chart_code": size_chart.get("chart_code", "OS210"),
         "pricing": {
             "bulk": {
-                "quantity": product.get("pricing_rules", {}).get("bulk_label", "More than 15pcs"),
-                "price": f"{product.get('pricing_rules', {}).get('bulk_price', 279)}₹"
+                "quantity": pricing_rules.get("bulk_label", "More than 15pcs"),
+                "price": f"{pricing_rules.get('bulk_price', 279)}₹"
             },
             "regular": {
-                "quantity": product.get("pricing_rules", {}).get("regular_label", "Less than 15pcs"),
-                "price": f"{product.get('pricing_rules', {}).get('regular_price', 319)}₹"
+                "quantity": pricing_rules.get("regular_label", "Less than 15pcs"),
+                "price": f"{pricing_rules.get('regular_price', 319)}₹"
             }
         }
     }
 
+@api_router.get("/products/{product_id}/sizechart", dependencies=[Depends(catalog_cache)])
+async def get_product_sizechart(product_id: str, database: AsyncIOMotorDatabase = Depends(get_database)):
+    """Get size chart and pricing for a specific product."""
+    product = await database.products.find_one({"id": product_id, "is_active": True})
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    return product_size_chart(product)
+
 @api_router.put("/products/{product_id}/sizechart")
 async def update_product_sizechart(
     product_id: str,
@@ -224,6 +365,7 @@ async def update_product_sizechart(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    await bump_catalog_version(database)
     return {"message": "Size chart and pricing updated successfully"}
 
 @api_router.post("/products", response_model=Product)
@@ -237,6 +379,8 @@ async def create_product(
     
     product = Product(**product_data.dict())
     await database.products.insert_one(product.dict())
+    await refresh_featured_products(database, [product.category])
+    await bump_catalog_version(database)
     return product
 
 @api_router.put("/products/{product_id}", response_model=Product)
@@ -252,14 +396,18 @@ async def update_product(
     update_data = {k: v for k, v in product_data.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
     
-    result = await database.products.update_one(
+    previous_product = await database.products.find_one_and_update(
         {"id": product_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection={"_id": 0, "category": 1}
     )
     
-    if result.matched_count == 0:
+    if not previous_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    if "category" in update_data or "is_active" in update_data:
+        await refresh_featured_products(database, [previous_product["category"], update_data.get("category")])
+    await bump_catalog_version(database)
     updated_product = await database.products.find_one({"id": product_id})
     return Product(**updated_product)
 
@@ -272,11 +420,16 @@ async def delete_product(
     if not current_user or not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    result = await database.products.delete_one({"id": product_id})
+    deleted_product = await database.products.find_one_and_delete(
+        {"id": product_id},
+        projection={"_id": 0, "category": 1}
+    )
     
-    if result.deleted_count == 0:
+    if not deleted_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    await refresh_featured_products(database, [deleted_product["category"]])
+    await bump_catalog_version(database)
     return {"message": "Product deleted successfully"}
 
 # ============================================================================
@@ -284,9 +437,16 @@ async def delete_product(
 # ============================================================================
 
 @api_router.get("/categories", response_model=List[Category])
-async def get_categories(database: AsyncIOMotorDatabase = Depends(get_database)):
-    categories = await database.categories.find({"is_active": True}).sort("sort_order").to_list(length=100)
-    return [Category(**category) for category in categories]
+async def get_categories(
+    response: Response,
+    catalog_etag: str = Depends(catalog_cache),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    async def load():
+        categories = await database.categories.find({"is_active": True}).sort("sort_order").to_list(length=100)
+        return [Category(**category) for category in categories]
+    
+    return await cached_json_response(CATALOG_SCOPE, f"categories:{catalog_etag}", response, load)
 
 @api_router.post("/categories", response_model=Category)
 async def create_category(
@@ -298,7 +458,9 @@ async def create_category(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     category = Category(**category_data.dict())
+    category.featured_product_id = await pick_featured_product_id(database, category.name)
     await database.categories.insert_one(category.dict())
+    await bump_catalog_version(database)
     return category
 
 # ============================================================================
@@ -311,52 +473,115 @@ def get_session_id(request: Request) -> str:
         session_id = str(uuid.uuid4())
     return session_id
 
-@api_router.get("/cart")
-async def get_cart(
+async def get_cart_filter(
     request: Request,
-    response: Response,
-    current_user: Optional[User] = Depends(get_current_user_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     database: AsyncIOMotorDatabase = Depends(get_database)
-):
-    if current_user:
-        cart = await database.carts.find_one({"user_id": current_user.id})
-    else:
-        session_id = get_session_id(request)
-        response.set_cookie("session_id", session_id, max_age=30*24*3600)  # 30 days
-        cart = await database.carts.find_one({"session_id": session_id})
+) -> dict:
+    """Resolve the cart owner from the cached principal; deactivated accounts are refused."""
+    if credentials:
+        user = await get_current_user_db(credentials, database)
+        if user:
+            if not user.is_active:
+                raise HTTPException(status_code=403, detail="Account is disabled")
+            return {"user_id": user.id}
+    return {"session_id": get_session_id(request)}
+
+async def build_priced_cart(database: AsyncIOMotorDatabase, cart: Optional[dict]) -> dict:
+    """Price a cart document with one product query, including per-line stock."""
+    if not cart or not cart["items"]:
+        return {"items": [], "total": 0, "version": cart.get("version", 0) if cart else 0}
     
-    if not cart:
-        return {"items": [], "total": 0}
+    product_ids = list({item["product_id"] for item in cart["items"]})
+    products = await database.products.find({"id": {"$in": product_ids}}).to_list(length=len(product_ids))
+    products_by_id = {product["id"]: product for product in products}
+    
+    # Bulk pricing applies to 15+ pieces of any combination
+    total_quantity = sum(item["quantity"] for item in cart["items"])
+    is_bulk_order = total_quantity >= 15
     
-    # Calculate cart total
     total = 0
     enriched_items = []
-    
     for item in cart["items"]:
-        product = await database.products.find_one({"id": item["product_id"]})
-        if product:
-            # Determine price based on total quantity
-            total_quantity = sum(cart_item["quantity"] for cart_item in cart["items"] if cart_item["product_id"] == item["product_id"])
-            price = product["bulk_price"] if total_quantity >= 15 else product["base_price"]
-            
-            item_total = price * item["quantity"]
-            total += item_total
-            
-            enriched_items.append({
-                **item,
-                "product_name": product["name"],
-                "product_image": product["images"][0] if product["images"] else None,
-                "unit_price": price,
-                "total_price": item_total
-            })
+        product = products_by_id.get(item["product_id"])
+        if not product:
+            continue
+        
+        price = product["bulk_price"] if is_bulk_order else product["base_price"]
+        item_total = price * item["quantity"]
+        total += item_total
+        
+        variant = next((v for v in product.get("variants", []) if v["color"] == item["color"] and v["size"] == item["size"]), None)
+        stock_quantity = variant["stock_quantity"] if variant else 0
+        
+        enriched_items.append({
+            **item,
+            "product_name": product["name"],
+            "product_image": product["images"][0] if product["images"] else None,
+            "unit_price": price,
+            "total_price": item_total,
+            "stock_quantity": stock_quantity,
+            "in_stock": stock_quantity >= item["quantity"]
+        })
     
-    return {"items": enriched_items, "total": total}
+    return {"items": enriched_items, "total": total, "version": cart.get("version", 0)}
+
+async def cart_mutation_response(
+    database: AsyncIOMotorDatabase,
+    response: Response,
+    cart: Optional[dict],
+    message: str,
+    return_cart: bool
+) -> dict:
+    """Mutation result, optionally with the repriced cart and its new ETag."""
+    if not return_cart:
+        return {"message": message}
+    set_cache_headers(response, cart_etag(cart, await get_cache_version(database, CATALOG_SCOPE)), CART_CACHE_CONTROL)
+    return {"message": message, "cart": await build_priced_cart(database, cart)}
+
+@api_router.get("/cart")
+async def get_cart(
+    request: Request,
+    response: Response,
+    wait: int = 0,
+    cart_filter: dict = Depends(get_cart_filter),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get the priced cart.
+
+    With If-None-Match, an unchanged cart costs one projected read and a 304.
+    Adding ``wait`` (seconds) long-polls until the cart changes or time runs out.
+    Reads never issue a session cookie; visitors without one have no cart.
+    """
+    has_cart = "session_id" not in cart_filter or has_session(request)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        key = cart_key(cart_filter)
+        deadline = time.monotonic() + min(max(wait, 0), CART_MAX_WAIT)
+        while True:
+            cart_state = await database.carts.find_one(cart_filter, CART_VERSION_PROJECTION) if has_cart else None
+            etag = cart_etag(cart_state, await get_cache_version(database, CATALOG_SCOPE))
+            if not etag_matches(if_none_match, etag):
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or cart_notifier.closed:
+                not_modified = Response(status_code=304)
+                not_modified.headers.raw.extend(response.headers.raw)
+                set_cache_headers(not_modified, etag, CART_CACHE_CONTROL)
+                return not_modified
+            await cart_notifier.wait(key, remaining)
+    
+    cart = await database.carts.find_one(cart_filter) if has_cart else None
+    set_cache_headers(response, cart_etag(cart, await get_cache_version(database, CATALOG_SCOPE)), CART_CACHE_CONTROL)
+    return await build_priced_cart(database, cart)
 
 @api_router.post("/cart/add")
 async def add_to_cart(
     cart_item: CartAdd,
     request: Request,
     response: Response,
+    return_cart: bool = False,
     current_user: Optional[User] = Depends(get_current_user_db),
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
@@ -375,7 +600,7 @@ async def add_to_cart(
         cart_filter = {"user_id": current_user.id}
     else:
         session_id = get_session_id(request)
-        response.set_cookie("session_id", session_id, max_age=30*24*3600)
+        set_session_cookie(response, session_id)  # first write creates the session
         cart = await database.carts.find_one({"session_id": session_id})
         cart_filter = {"session_id": session_id}
     
@@ -391,26 +616,31 @@ async def add_to_cart(
         else:
             cart["items"].append(cart_item.dict())
         
-        await database.carts.update_one(
+        cart = await database.carts.find_one_and_update(
             cart_filter,
-            {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}}
+            {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
         )
     else:
         # Create new cart
         new_cart = Cart(
             user_id=current_user.id if current_user else None,
             session_id=session_id if not current_user else None,
-            items=[cart_item.dict()]
+            items=[cart_item.dict()],
+            version=1
         )
-        await database.carts.insert_one(new_cart.dict())
+        cart = new_cart.dict()
+        await database.carts.insert_one(cart)
     
-    return {"message": "Item added to cart"}
+    await cart_notifier.notify(cart_key(cart_filter))
+    return await cart_mutation_response(database, response, cart, "Item added to cart", return_cart)
 
 @api_router.put("/cart/update")
 async def update_cart_item(
     cart_item: CartAdd,
     request: Request,
     response: Response,
+    return_cart: bool = False,
     current_user: Optional[User] = Depends(get_current_user_db),
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
@@ -464,38 +694,19 @@ async def update_cart_item(
         
         if not updated and cart_item.quantity > 0:
             # Add new item if it doesn't exist and quantity > 0
-            # Calculate pricing
-            total_quantity = sum(item["quantity"] for item in cart["items"]) + cart_item.quantity
-            unit_price = product["bulk_price"] if total_quantity >= 15 else product["base_price"]
-            
-            new_item = {
-                "product_id": cart_item.product_id,
-                "color": cart_item.color,
-                "size": cart_item.size,
-                "quantity": cart_item.quantity,
-                "product_name": product["name"],
-                "product_image": product.get("images", [None])[0],
-                "unit_price": unit_price,
-                "total_price": unit_price * cart_item.quantity
-            }
-            cart["items"].append(new_item)
+            cart["items"].append(cart_item.dict())
         
-        # Recalculate all prices (bulk pricing might have changed)
-        total_quantity = sum(item["quantity"] for item in cart["items"])
-        for item in cart["items"]:
-            product = await database.products.find_one({"id": item["product_id"]})
-            if product:
-                unit_price = product["bulk_price"] if total_quantity >= 15 else product["base_price"]
-                item["unit_price"] = unit_price
-                item["total_price"] = unit_price * item["quantity"]
+        # Prices are derived from the current products whenever the cart is read
         
         # Update cart in database
-        await database.carts.update_one(
+        cart = await database.carts.find_one_and_update(
             cart_filter,
-            {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}}
+            {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
         )
         
-        return {"message": "Cart updated successfully"}
+        await cart_notifier.notify(cart_key(cart_filter))
+        return await cart_mutation_response(database, response, cart, "Cart updated successfully", return_cart)
     
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -508,6 +719,8 @@ async def remove_from_cart(
     color: str,
     size: str,
     request: Request,
+    response: Response,
+    return_cart: bool = False,
     current_user: Optional[User] = Depends(get_current_user_db),
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
@@ -527,12 +740,14 @@ async def remove_from_cart(
         item["size"] == size
     )]
     
-    await database.carts.update_one(
+    cart = await database.carts.find_one_and_update(
         cart_filter,
-        {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}}
+        {"$set": {"items": cart["items"], "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+        return_document=ReturnDocument.AFTER
     )
     
-    return {"message": "Item removed from cart"}
+    await cart_notifier.notify(cart_key(cart_filter))
+    return await cart_mutation_response(database, response, cart, "Item removed from cart", return_cart)
 
 @api_router.get("/products/{product_id}/stock")
 async def get_product_stock(
@@ -561,6 +776,59 @@ async def get_product_stock(
         "variants": stock_info
     }
 
+@api_router.post("/products/stock/batch")
+async def get_stock_batch(
+    query: StockBatchRequest,
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get stock for many variants with a single product query"""
+    product_ids = list({item.product_id for item in query.items if not item.sku})
+    skus = list({item.sku for item in query.items if item.sku})
+    
+    clauses = []
+    if product_ids:
+        clauses.append({"id": {"$in": product_ids}})
+    if skus:
+        clauses.append({"variants.sku": {"$in": skus}})
+    
+    by_variant = {}
+    by_sku = {}
+    async for product in database.products.find(
+        {"is_active": True, "$or": clauses},
+        {"_id": 0, "id": 1, "variants": 1}
+    ):
+        for variant in product["variants"]:
+            entry = {
+                "product_id": product["id"],
+                "color": variant["color"],
+                "size": variant["size"],
+                "sku": variant["sku"],
+                "stock_quantity": variant["stock_quantity"]
+            }
+            by_variant[(product["id"], variant["color"], variant["size"])] = entry
+            by_sku[variant["sku"]] = entry
+    
+    # One result per requested item, in request order
+    results = []
+    for item in query.items:
+        if item.sku:
+            entry = by_sku.get(item.sku)
+        else:
+            entry = by_variant.get((item.product_id, item.color, item.size.value))
+        if entry:
+            results.append({**entry, "found": True})
+        else:
+            results.append({
+                "product_id": item.product_id,
+                "color": item.color,
+                "size": item.size.value if item.size else None,
+                "sku": item.sku,
+                "stock_quantity": 0,
+                "found": False
+            })
+    
+    return {"items": results}
+
 # ============================================================================
 # ORDER ROUTES
 # ============================================================================
@@ -568,6 +836,7 @@ async def get_product_stock(
 @api_router.post("/orders/calculate", response_model=OrderSummary)
 async def calculate_order(
     items: List[CartItem],
+    pincode: Optional[str] = None,
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
     subtotal = 0
@@ -583,7 +852,7 @@ async def calculate_order(
         subtotal += price * item.quantity
     
     tax_amount = subtotal * 0.18  # 18% GST
-    shipping_amount = 0 if subtotal > 500 else 50  # Free shipping above ₹500
+    shipping_amount = shipping_engine.order_shipping_amount(pincode, subtotal)
     total_amount = subtotal + tax_amount + shipping_amount
     
     return OrderSummary(
@@ -631,7 +900,7 @@ async def create_order(
         ))
     
     tax_amount = subtotal * 0.18
-    shipping_amount = 0 if subtotal > 500 else 50
+    shipping_amount = shipping_engine.order_shipping_amount(order_data.shipping_address.postal_code, subtotal)
     total_amount = subtotal + tax_amount + shipping_amount
     
     # Create shipping address
@@ -651,7 +920,10 @@ async def create_order(
         notes=order_data.notes
     )
     
-    await database.orders.insert_one(order.dict())
+    order_document = order.dict()
+    order_document.update(order_summary_fields(order_document["items"], order.created_at))
+    await database.orders.insert_one(order_document)
+    await job_queue.enqueue(SYNC_ORDER_TRACKING, {"order_ids": [order.id]}, database)
     return order
 
 @api_router.get("/orders", response_model=List[Order])
@@ -667,7 +939,7 @@ async def get_orders(
     else:
         orders = await database.orders.find({"user_id": current_user.id}).sort("created_at", -1).to_list(length=100)
     
-    return [Order(**order) for order in orders]
+    return model_response([Order(**order) for order in orders])
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(
@@ -675,18 +947,72 @@ async def get_order(
     database: AsyncIOMotorDatabase = Depends(get_database),
     current_user: Optional[User] = Depends(get_current_user_db)
 ):
+    # The full order (address, contact, items) is for its owner or an admin;
+    # guests read the status summary from /tracking instead
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Sign in to view this order, or track it at /api/tracking")
+    
     order = await database.orders.find_one({"id": order_id})
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Check permissions
-    if current_user and (current_user.is_admin or order["user_id"] == current_user.id):
-        return Order(**order)
-    elif not current_user:
-        # Allow anonymous access with email verification could be added here
-        return Order(**order)
-    else:
+    if not (current_user.is_admin or (order.get("user_id") and order["user_id"] == current_user.id)):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return model_response(Order(**order))
+
+@api_router.get("/orders/{order_id}/invoice")
+async def get_order_invoice(
+    order_id: str,
+    request: Request,
+    format: Literal["html", "pdf"] = "html",
+    database: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: Optional[User] = Depends(get_current_user_db)
+):
+    """GST invoice for a paid order, rendered once and then served from storage"""
+    order = await database.orders.find_one({"id": order_id}, {"_id": 0})
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    # Only the buyer's account or an admin; guest orders are invoiced to admins only
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if not (current_user.is_admin or (order.get("user_id") and order["user_id"] == current_user.id)):
         raise HTTPException(status_code=403, detail="Access denied")
+    
+    etag = invoice_etag(order, format)
+    check_not_modified(request, etag, INVOICE_CACHE_CONTROL)
+    
+    try:
+        body = await get_invoice(database, order, format)
+    except InvoiceUnavailableError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    response = Response(content=body, media_type=INVOICE_FORMATS[format])
+    set_cache_headers(response, etag, INVOICE_CACHE_CONTROL)
+    response.headers["Content-Disposition"] = f'inline; filename="{invoice_number(order).replace("/", "-")}.{format}"'
+    return response
+
+@api_router.get("/tracking")
+async def track_orders(
+    order_id: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Order status, payment status and delivery estimate, by order id or by email and phone"""
+    if not order_id and not (email and normalize_phone(phone)):
+        raise HTTPException(status_code=400, detail="Provide an order id, or the email and phone used at checkout")
+    
+    summaries = await find_tracking_summaries(database, order_id=order_id, email=email, phone=phone)
+    if order_id and not summaries:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
+    # The summaries are stored as JSON, so they are sent without decoding
+    return Response(
+        content=f'{{"orders":[{",".join(summaries)}]}}',
+        media_type="application/json",
+        headers={"Cache-Control": "private, max-age=30"}
+    )
 
 # ============================================================================
 # PAYMENT ROUTES (RAZORPAY)
@@ -710,83 +1036,62 @@ async def create_razorpay_order(
                 raise HTTPException(status_code=400, detail="No cart session found")
             cart_filter = {"session_id": session_id}
         
-        cart = await database.carts.find_one(cart_filter)
-        if not cart or not cart["items"]:
-            raise HTTPException(status_code=400, detail="Cart is empty")
-        
-        # Calculate order total
-        subtotal = 0
-        total_quantity = sum(item["quantity"] for item in cart["items"])
-        is_bulk_order = total_quantity >= 15
-        
-        order_items = []
-        for item in cart["items"]:
-            product = await database.products.find_one({"id": item["product_id"]})
-            if not product:
-                continue
+        def build_order(order_items, subtotal):
+            # Calculate taxes and shipping
+            tax_amount = subtotal * 0.18  # 18% GST
+            shipping_amount = shipping_engine.order_shipping_amount(checkout_request.shipping_address.postal_code, subtotal)
+            total_amount = subtotal + tax_amount + shipping_amount
             
-            unit_price = product["bulk_price"] if is_bulk_order else product["base_price"]
-            total_price = unit_price * item["quantity"]
-            subtotal += total_price
+            receipt_id = f"order_{int(datetime.utcnow().timestamp())}"
             
-            order_items.append({
-                "product_id": item["product_id"],
-                "product_name": product["name"],
-                "color": item["color"],
-                "size": item["size"],
-                "quantity": item["quantity"],
-                "unit_price": unit_price,
-                "total_price": total_price
-            })
-        
-        # Calculate taxes and shipping
-        tax_amount = subtotal * 0.18  # 18% GST
-        shipping_amount = 0 if subtotal > 500 else 50  # Free shipping above ₹500
-        total_amount = subtotal + tax_amount + shipping_amount
-        
-        # Create order in our database first
-        order_id = str(uuid.uuid4())
-        receipt_id = f"order_{int(datetime.utcnow().timestamp())}"
-        
-        order_data = {
-            "id": order_id,
-            "user_id": current_user.id if current_user else None,
-            "email": checkout_request.customer_email,
-            "phone": checkout_request.customer_phone,
-            "items": order_items,
-            "subtotal": subtotal,
-            "tax_amount": tax_amount,
-            "shipping_amount": shipping_amount,
-            "total_amount": total_amount,
-            "shipping_address": checkout_request.shipping_address.dict(),
-            "billing_address": checkout_request.billing_address.dict() if checkout_request.billing_address else checkout_request.shipping_address.dict(),
-            "status": "pending",
-            "payment_status": "pending",
-            "notes": checkout_request.notes,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+            return {
+                "id": str(uuid.uuid4()),
+                "user_id": current_user.id if current_user else None,
+                "email": checkout_request.customer_email,
+                "phone": checkout_request.customer_phone,
+                "items": order_items,
+                "subtotal": subtotal,
+                "tax_amount": tax_amount,
+                "shipping_amount": shipping_amount,
+                "total_amount": total_amount,
+                "shipping_address": Address(**checkout_request.shipping_address.dict(), user_id="").dict(),
+                "billing_address": Address(**(checkout_request.billing_address or checkout_request.shipping_address).dict(), user_id="").dict(),
+                "status": "pending",
+                "payment_status": "pending",
+                "notes": checkout_request.notes,
+                "razorpay_receipt": receipt_id,
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
         
-        # Create Razorpay order
-        razorpay_order = razorpay_client.order.create({
-            "amount": int(total_amount * 100),  # Amount in paise
-            "currency": "INR",
-            "receipt": receipt_id,
-            "payment_capture": 1
-        })
+        # Holds stock, saves the order and marks the cart in one unit of work
+        order_data = await place_order(client, database, cart_filter, build_order)
+        await cart_notifier.notify(cart_key(cart_filter))
         
-        # Update order with Razorpay details
+        # The Razorpay order is created once, after the holds committed. The
+        # SDK call blocks, so it runs in a thread instead of on the event loop.
+        try:
+            razorpay_order = await asyncio.get_running_loop().run_in_executor(None, get_razorpay_client().order.create, {
+                "amount": int(order_data["total_amount"] * 100),  # Amount in paise
+                "currency": "INR",
+                "receipt": order_data["razorpay_receipt"],
+                "payment_capture": 1
+            })
+        except Exception:
+            await release_stock_holds(database, {"id": order_data["id"]}, {"status": "cancelled", "payment_status": "failed"})
+            raise
         order_data["razorpay_order_id"] = razorpay_order["id"]
-        order_data["razorpay_receipt"] = receipt_id
-        
-        # Save order to database
-        await database.orders.insert_one(order_data)
+        await database.orders.update_one(
+            {"id": order_data["id"]},
+            {"$set": {"razorpay_order_id": razorpay_order["id"], "updated_at": datetime.utcnow()}}
+        )
+        await job_queue.enqueue(SYNC_ORDER_TRACKING, {"order_ids": [order_data["id"]]}, database)
         
         # Return order details for frontend
         return {
-            "order_id": order_id,
-            "razorpay_order_id": razorpay_order["id"],
-            "amount": total_amount,
+            "order_id": order_data["id"],
+            "razorpay_order_id": order_data["razorpay_order_id"],
+            "amount": order_data["total_amount"],
             "currency": "INR",
             "key_id": os.environ.get('RAZORPAY_KEY_ID'),
             "customer_details": {
@@ -795,14 +1100,18 @@ async def create_razorpay_order(
                 "contact": checkout_request.customer_phone
             },
             "order_details": {
-                "items": order_items,
-                "subtotal": subtotal,
-                "tax_amount": tax_amount,
-                "shipping_amount": shipping_amount,
-                "total_amount": total_amount
+                "items": order_data["items"],
+                "subtotal": order_data["subtotal"],
+                "tax_amount": order_data["tax_amount"],
+                "shipping_amount": order_data["shipping_amount"],
+                "total_amount": order_data["total_amount"]
             }
         }
         
+    except HTTPException:
+        raise
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating Razorpay order: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
@@ -829,22 +1138,25 @@ async def verify_payment(
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        # Update order status
-        await database.orders.update_one(
-            {"razorpay_order_id": verification.razorpay_order_id},
-            {
-                "$set": {
-                    "payment_status": "completed",
-                    "status": "confirmed",
-                    "payment_id": verification.razorpay_payment_id,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
+        async def confirm_order(session):
+            # Mark the order paid, only with its stock held; the outbox jobs commit with it
+            outcome = await confirm_order_payment(
+                database,
+                {"razorpay_order_id": verification.razorpay_order_id},
+                verification.razorpay_payment_id,
+                session
+            )
+            if outcome == PAYMENT_CONFIRMED:
+                await job_queue.enqueue(CLEAR_CHECKOUT_CART, {"order_id": order["id"]}, database, session=session)
+                await job_queue.enqueue(RENDER_INVOICE, {"order_id": order["id"]}, database, session=session)
+            await job_queue.enqueue(SYNC_ORDER_TRACKING, {"order_ids": [order["id"]]}, database, session=session)
+            return outcome
         
-        # Clear the cart after successful payment
-        if order.get("user_id"):
-            await database.carts.delete_one({"user_id": order["user_id"]})
+        if await run_in_transaction(client, confirm_order) == PAYMENT_NEEDS_REVIEW:
+            raise HTTPException(
+                status_code=409,
+                detail="Payment received, but some items sold out before it completed. The payment will be refunded."
+            )
         
         return {
             "status": "success",
@@ -855,6 +1167,8 @@ async def verify_payment(
         
     except HTTPException:
         raise
+    except CheckoutError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Error verifying payment: {str(e)}")
         raise HTTPException(status_code=500, detail="Payment verification failed")
@@ -864,7 +1178,11 @@ async def razorpay_webhook(
     request: Request,
     database: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Handle Razorpay webhooks"""
+    """Handle Razorpay webhooks.
+
+    Only verifies and records the event; status changes are applied by the
+    background webhook consumer so retries are deduplicated and fast.
+    """
     try:
         # Get webhook signature
         signature = request.headers.get("X-Razorpay-Signature")
@@ -883,63 +1201,205 @@ async def razorpay_webhook(
                 hashlib.sha256
             ).hexdigest()
             
-            if generated_signature != signature:
+            if not hmac.compare_digest(generated_signature, signature):
                 raise HTTPException(status_code=400, detail="Invalid webhook signature")
         
-        # Parse webhook payload
-        payload = json.loads(body.decode())
-        event = payload.get("event")
+        event_id = get_webhook_event_id(request.headers, body)
+        try:
+            payload = parse_webhook_payload(body)
+        except ValueError as e:
+            # Retrying cannot fix the body, so it is parked for inspection and acknowledged
+            logger.error(f"Webhook event {event_id} rejected: {str(e)}")
+            await record_malformed_webhook_event(database, event_id, body, str(e))
+            return {"status": "rejected"}
         
-        if event == "payment.captured":
-            # Payment was captured successfully
-            payment_data = payload.get("payload", {}).get("payment", {}).get("entity", {})
-            order_id = payment_data.get("order_id")
-            payment_id = payment_data.get("id")
-            
-            if order_id and payment_id:
-                await database.orders.update_one(
-                    {"razorpay_order_id": order_id},
-                    {
-                        "$set": {
-                            "payment_status": "completed",
-                            "status": "confirmed",
-                            "payment_id": payment_id,
-                            "updated_at": datetime.utcnow()
-                        }
-                    }
-                )
-        
-        elif event == "payment.failed":
-            # Payment failed
-            payment_data = payload.get("payload", {}).get("payment", {}).get("entity", {})
-            order_id = payment_data.get("order_id")
-            
-            if order_id:
-                await database.orders.update_one(
-                    {"razorpay_order_id": order_id},
-                    {
-                        "$set": {
-                            "payment_status": "failed",
-                            "status": "cancelled",
-                            "updated_at": datetime.utcnow()
-                        }
-                    }
-                )
-        
-        return {"status": "processed"}
+        if not await record_webhook_event(database, event_id, payload):
+            return {"status": "duplicate"}
         
+        webhook_consumer.notify()
+        return {"status": "queued"}
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Webhook processing error: {str(e)}")
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
+# ============================================================================
+# INFO PAGE ADMINISTRATION
+# ============================================================================
+
+@api_router.post("/admin/info/reload")
+async def reload_info_pages(current_user: Optional[User] = Depends(get_current_user_db)):
+    """Re-read and re-validate the static info pages and shipping rates (Admin only)."""
+    if not current_user or not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        info_payloads.load()
+        shipping_engine.load()
+    except Exception as e:
+        logger.error(f"Info pages reload failed: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid info pages, keeping previous content: {str(e)}")
+    
+    # Other workers reload when they receive the invalidation
+    await shared_cache.invalidate(INFO_NAMESPACE)
+    
+    return {
+        "message": "Info pages reloaded successfully",
+        "pages": list(info_payloads.payloads),
+        "shipping_rates": shipping_engine.trie.size
+    }
+
+@api_router.get("/admin/cache/stats")
+async def get_cache_stats(current_user: Optional[User] = Depends(get_current_user_db)):
+    """Hit rate of this worker's view of the shared cache (Admin only)."""
+    if not current_user or not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return shared_cache.stats()
+
+@api_router.post("/admin/invoices/rerender")
+async def rerender_order_invoices(
+    rerender: InvoiceRerenderRequest,
+    current_user: Optional[User] = Depends(get_current_user_db),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Re-render invoices of paid orders created in a date range, in the background (Admin only)."""
+    if not current_user or not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if rerender.end <= rerender.start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    await job_queue.enqueue(RERENDER_INVOICES, {
+        "start": rerender.start.isoformat(),
+        "end": rerender.end.isoformat(),
+        "format": rerender.format
+    }, database)
+    return {"status": "queued"}
+
+@api_router.get("/admin/jobs/stats")
+async def get_job_stats(current_user: Optional[User] = Depends(get_current_user_db)):
+    """Background job counts and run times in this worker, plus the outbox backlog (Admin only)."""
+    if not current_user or not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await job_queue.stats()
+
+@api_router.get("/admin/products/grid")
+async def get_product_grid(
+    sort: GridSort = "created_at",
+    order: GridOrder = "desc",
+    category: Optional[str] = None,
+    active: GridActive = "active",
+    stock: Optional[StockStatus] = None,
+    limit: int = 50,
+    after: Optional[str] = None,
+    current_user: Optional[User] = Depends(get_current_user_db),
+    database: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """One page of the admin product table; pass ``next_cursor`` back as ``after`` for the next (Admin only)."""
+    if not current_user or not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        page = ProductGridPage(database, sort, order, category, active, stock, limit, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    items = await page.rows()
+    return {"items": items, "next_cursor": page.next_cursor}
+
 # Include all routers
 app.include_router(api_router)
 app.include_router(info_router)
+app.include_router(admin_ui_router)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def load_info_pages():
+    # Fails startup if the info page content or rate table does not validate
+    info_payloads.load()
+    shipping_engine.load()
+
+@app.on_event("startup")
+async def prepare_catalog():
+    # Product lookups by id and SKU (cart pricing, stock queries) and by category
+    await db.products.create_index("id")
+    await db.products.create_index("variants.sku")
+    # The admin product table's indexes; (category, is_active, created_at, id) also serves
+    # category lookups, so the old (category, is_active, created_at) index is dropped
+    await ensure_product_grid_indexes(db)
+    # Backfill featured products for data written outside the API (seeding,
+    # imports). One worker per deploy does it, and only a change is a new version.
+    if await acquire_lease(db, "refresh_featured_products", STARTUP_TASK_LEASE):
+        if await refresh_all_featured_products(db):
+            await bump_catalog_version(db)
+
+@app.on_event("startup")
+async def prepare_orders():
+    await ensure_order_indexes(db)
+    await ensure_invoice_indexes(db)
+    await ensure_tracking_indexes(db)
+    # Orders imported or created before the summary fields existed. These are
+    # full scans, so one worker per deploy runs them.
+    if await acquire_lease(db, "backfill_orders", STARTUP_TASK_LEASE):
+        await backfill_order_summaries(db)
+        # Tracking is derived from the summary fields, so it is backfilled after them
+        await backfill_order_tracking(db)
+        # Paid orders from before invoice numbers were allocated at payment
+        await backfill_invoice_numbers(db)
+
+@app.on_event("startup")
+async def start_webhook_consumer():
+    await webhook_consumer.start()
+
+def reload_info_content():
+    """Reload info pages and shipping rates after another worker changed them."""
+    try:
+        info_payloads.load()
+        shipping_engine.load()
+    except Exception as e:
+        logger.error(f"Info pages reload failed, keeping previous content: {str(e)}")
+
+@app.on_event("startup")
+async def start_shared_cache():
+    shared_cache.on_invalidate(INFO_NAMESPACE, reload_info_content)
+    await shared_cache.start()
+
+@app.on_event("startup")
+async def start_cart_compactor():
+    await cart_compactor.start()
+
+@app.on_event("startup")
+async def start_stock_hold_sweeper():
+    await stock_hold_sweeper.start()
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start(db)
+
+@app.on_event("startup")
+async def warm_up():
+    # Runs before the worker accepts connections: open pooled connections
+    # and fill the catalog cache so the first requests don't pay for it
+    await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+    
+    catalog_etag = await current_catalog_etag(db)
+    await get_categories(Response(), catalog_etag=catalog_etag, database=db)
+    await get_products(Response(), catalog_etag=catalog_etag, database=db)
+    try:
+        await get_product_view(Response(), catalog_etag=catalog_etag, database=db)
+    except HTTPException:
+        pass  # empty catalog
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await webhook_consumer.stop()
+    await cart_compactor.stop()
+    await stock_hold_sweeper.stop()
+    await job_queue.stop()
+    shutdown_invoice_pool()
+    await shared_cache.stop()
     client.close()
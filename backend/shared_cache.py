@@ -0,0 +1,345 @@
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+
+from json_responses import DefaultJSONResponse
+
+# Optional Redis backend, enabled with CACHE_BACKEND=redis. The client is
+# slow to import, so it is only loaded when that backend is selected.
+aioredis = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").lower()
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+# Bounded by the size of the cached bodies, since one product list can
+# outweigh thousands of principals
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DEFAULT_TTL = float(os.environ.get("CACHE_DEFAULT_TTL_SECONDS", "300"))
+
+# With Redis, each worker keeps a short-lived local copy in front of the
+# shared one. Invalidations are pushed over pub/sub; this bounds staleness
+# if a message is missed.
+CACHE_LOCAL_TTL = float(os.environ.get("CACHE_LOCAL_TTL_SECONDS", "5"))
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Small messages between workers, such as cart change notifications
+EVENTS_CHANNEL = "cache:events"
+
+# Namespaces shared across modules (the catalog uses http_cache.CATALOG_SCOPE)
+PRINCIPALS_NAMESPACE = "principals"
+INFO_NAMESPACE = "info"
+
+# Authenticated users are re-read from Mongo at least this often
+PRINCIPAL_CACHE_TTL = float(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+Listener = Callable[[], Any]
+Subscriber = Callable[[str], Any]
+
+class CacheBackend:
+    """Namespaced byte cache shared by the API handlers.
+
+    ``invalidate`` drops a whole namespace. Listeners registered with
+    ``on_invalidate`` run when another worker invalidates the namespace, so
+    per-process state (like the info payloads) can be rebuilt. ``publish``
+    hands a message to the other workers' ``subscribe`` callbacks for a topic.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._listeners: Dict[str, List[Listener]] = {}
+        self._subscribers: Dict[str, List[Subscriber]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    async def invalidate(self, namespace: str):
+        raise NotImplementedError
+
+    async def publish(self, topic: str, message: str):
+        """Deliver ``message`` to other workers; a process-local cache has none."""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def on_invalidate(self, namespace: str, listener: Listener):
+        self._listeners.setdefault(namespace, []).append(listener)
+
+    def subscribe(self, topic: str, subscriber: Subscriber):
+        self._subscribers.setdefault(topic, []).append(subscriber)
+
+    async def _run_listeners(self, namespace: str):
+        for listener in self._listeners.get(namespace, []):
+            try:
+                result = listener()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Cache invalidation listener for {namespace} failed: {str(e)}")
+
+    async def _deliver(self, topic: str, message: str):
+        for subscriber in self._subscribers.get(topic, []):
+            try:
+                result = subscriber(message)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Cache event subscriber for {topic} failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache bounded in bytes. Invalidation bumps a namespace generation, so it is O(1)."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0  # bytes held by the cached values
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[bytes, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    def _entry_key(self, namespace: str, key: str) -> Tuple[str, int, str]:
+        return (namespace, self._generations.get(namespace, 0), key)
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        entry_key = self._entry_key(namespace, key)
+        entry = self._entries.get(entry_key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._discard(entry_key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entry_key)
+        self.hits += 1
+        return entry[0]
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        entry_key = self._entry_key(namespace, key)
+        self._discard(entry_key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[entry_key] = (value, time.monotonic() + (ttl or CACHE_DEFAULT_TTL))
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def _discard(self, entry_key: Tuple[str, int, str]):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def drop_namespace(self, namespace: str):
+        # Old entries become unreachable and age out of the LRU
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def invalidate(self, namespace: str):
+        self.drop_namespace(namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._entries), "bytes": self.size}
+
+class RedisCache(CacheBackend):
+    """Redis-backed cache shared by every worker, with a local LRU in front.
+
+    Keys embed a per-namespace generation stored in Redis. Invalidating
+    increments it and publishes the namespace so other workers drop their
+    local copies and run their listeners. Redis errors count as misses.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, local_ttl: float = CACHE_LOCAL_TTL, max_bytes: int = CACHE_MAX_BYTES):
+        super().__init__()
+        self.client = client
+        self.local = MemoryCache(max_bytes)
+        self.local_ttl = local_ttl
+        self.worker_id = str(uuid.uuid4())
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _generation(self, namespace: str) -> int:
+        cached = self._generations.get(namespace)
+        now = time.monotonic()
+        if cached and now - cached[1] < self.local_ttl:
+            return cached[0]
+        generation = int(await self.client.get(f"cache-gen:{namespace}") or 0)
+        if cached and cached[0] != generation:
+            # Missed an invalidation message
+            self.local.drop_namespace(namespace)
+        self._generations[namespace] = (generation, now)
+        return generation
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        value = await self.local.get(namespace, key)
+        if value is not None:
+            self.hits += 1
+            return value
+        try:
+            generation = await self._generation(namespace)
+            value = await self.client.get(f"cache:{namespace}:{generation}:{key}")
+        except aioredis.RedisError as e:
+            logger.warning(f"Redis cache read failed: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        await self.local.set(namespace, key, value, self.local_ttl)
+        self.hits += 1
+        return value
+
+    async def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        ttl = ttl or CACHE_DEFAULT_TTL
+        await self.local.set(namespace, key, value, min(ttl, self.local_ttl))
+        try:
+            generation = await self._generation(namespace)
+            await self.client.set(f"cache:{namespace}:{generation}:{key}", value, ex=max(1, int(ttl)))
+        except aioredis.RedisError as e:
+            logger.warning(f"Redis cache write failed: {str(e)}")
+
+    async def invalidate(self, namespace: str):
+        self.local.drop_namespace(namespace)
+        try:
+            generation = await self.client.incr(f"cache-gen:{namespace}")
+            self._generations[namespace] = (generation, time.monotonic())
+            await self.client.publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({"namespace": namespace, "origin": self.worker_id})
+            )
+        except aioredis.RedisError as e:
+            # Other workers catch up when their local TTL runs out and they re-read the generation
+            self._generations.pop(namespace, None)
+            logger.warning(f"Redis cache invalidation failed: {str(e)}")
+
+    async def publish(self, topic: str, message: str):
+        try:
+            await self.client.publish(
+                EVENTS_CHANNEL,
+                json.dumps({"topic": topic, "message": message, "origin": self.worker_id})
+            )
+        except aioredis.RedisError as e:
+            logger.warning(f"Redis event publish failed: {str(e)}")
+
+    async def start(self):
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL, EVENTS_CHANNEL)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        if message["channel"] in (EVENTS_CHANNEL, EVENTS_CHANNEL.encode()):
+                            await self._handle_event(message["data"])
+                        else:
+                            await self._handle_invalidation(message["data"])
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation subscriber error: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    async def _handle_invalidation(self, data):
+        event = json.loads(data)
+        if event.get("origin") == self.worker_id:
+            return
+        namespace = event["namespace"]
+        self._generations.pop(namespace, None)
+        self.local.drop_namespace(namespace)
+        await self._run_listeners(namespace)
+
+    async def _handle_event(self, data):
+        event = json.loads(data)
+        if event.get("origin") != self.worker_id:
+            await self._deliver(event["topic"], event["message"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "local_entries": len(self.local._entries), "local_bytes": self.local.size}
+
+def load_redis() -> bool:
+    """Import redis.asyncio on demand; False if the package is not installed."""
+    global aioredis
+    if aioredis is None:
+        try:
+            import redis.asyncio as module
+        except ImportError:  # pragma: no cover - redis is optional
+            return False
+        aioredis = module
+    return True
+
+def connect_redis(url: str):
+    """Redis client for a URL; ``fakeredis://`` gives an in-process stand-in for tests."""
+    load_redis()
+    if url.startswith("fakeredis://"):
+        import fakeredis
+        return fakeredis.FakeAsyncRedis()
+    return aioredis.from_url(url)
+
+def create_cache() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        if not load_redis():
+            logger.warning("CACHE_BACKEND=redis but the redis package is not installed; using the memory cache")
+            return MemoryCache()
+        return RedisCache(connect_redis(REDIS_URL))
+    return MemoryCache()
+
+shared_cache = create_cache()
+
+async def cached_json_response(
+    namespace: str,
+    key: str,
+    response: Response,
+    build: Callable[[], Awaitable[Any]],
+    ttl: Optional[float] = None
+) -> Response:
+    """Serve a JSON body from the shared cache, building and storing it on a miss.
+
+    ``response`` is the handler's injected response; its headers (ETag,
+    Cache-Control) are copied onto the returned one.
+    """
+    body = await shared_cache.get(namespace, key)
+    if body is None:
+        body = DefaultJSONResponse(jsonable_encoder(await build())).body
+        await shared_cache.set(namespace, key, body, ttl)
+    cached = Response(content=body, media_type="application/json")
+    cached.headers.raw.extend(response.headers.raw)
+    return cached
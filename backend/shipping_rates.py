@@ -0,0 +1,140 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import csv
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SHIPPING_RATES_FILE = Path(os.environ.get(
+    "SHIPPING_RATES_FILE",
+    Path(__file__).parent / "data" / "shipping_rates.csv"
+))
+
+FREE_SHIPPING_THRESHOLD = 500
+EXPRESS_SHIPPING_COST = 100
+ADDITIONAL_WEIGHT_RATE = 20  # per kg above the first kg
+
+class ShippingRate(BaseModel):
+    prefix: str
+    zone: str
+    shipping_cost: float
+    delivery_days: int
+    is_cod_available: bool
+    is_express_available: bool
+
+class _TrieNode:
+    __slots__ = ("children", "rate")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.rate: Optional[ShippingRate] = None
+
+class PincodeTrie:
+    """Longest-prefix match over pincode digits, O(len(pincode)) per lookup."""
+
+    def __init__(self):
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, prefix: str, rate: ShippingRate):
+        node = self.root
+        for digit in prefix:
+            node = node.children.setdefault(digit, _TrieNode())
+        if node.rate is not None:
+            raise ValueError(f"duplicate shipping rate for prefix {prefix!r}")
+        node.rate = rate
+        self.size += 1
+
+    def lookup(self, pincode: str) -> Optional[ShippingRate]:
+        node = self.root
+        best = node.rate
+        for digit in pincode:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            if node.rate is not None:
+                best = node.rate
+        return best
+
+def _parse_bool(value: str) -> bool:
+    value = value.strip().lower()
+    if value not in ("true", "false"):
+        raise ValueError(f"expected true/false, got {value!r}")
+    return value == "true"
+
+class ShippingRateEngine:
+    """Pincode → zone rate table shared by the shipping calculator and checkout."""
+
+    def __init__(self, path: Path = SHIPPING_RATES_FILE):
+        self.path = path
+        self.trie: Optional[PincodeTrie] = None
+
+    def load(self):
+        """(Re)build the rate trie. Raises and keeps the old table if the file is invalid."""
+        trie = PincodeTrie()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    prefix = row["prefix"].strip()
+                    if prefix and not prefix.isdigit():
+                        raise ValueError(f"prefix {prefix!r} is not numeric")
+                    trie.insert(prefix, ShippingRate(
+                        prefix=prefix,
+                        zone=row["zone"].strip(),
+                        shipping_cost=float(row["shipping_cost"]),
+                        delivery_days=int(row["delivery_days"]),
+                        is_cod_available=_parse_bool(row["is_cod_available"]),
+                        is_express_available=_parse_bool(row["is_express_available"])
+                    ))
+                except (KeyError, ValueError) as e:
+                    raise ValueError(f"{self.path}:{line_number}: {e}") from e
+
+        if trie.root.rate is None:
+            raise ValueError(f"{self.path}: missing default rate (row with an empty prefix)")
+
+        self.trie = trie
+        logger.info(f"Loaded {trie.size} shipping rates from {self.path}")
+
+    def get_rate(self, pincode: str) -> ShippingRate:
+        if self.trie is None:
+            self.load()
+        return self.trie.lookup(pincode.strip())
+
+    def quote(self, pincode: str, weight: float = 1.0, is_express: bool = False) -> Dict[str, Any]:
+        """Shipping quote in the shipping calculator's response format."""
+        rate = self.get_rate(pincode)
+
+        shipping_cost = rate.shipping_cost
+        delivery_days = rate.delivery_days
+        if weight > 1.0:
+            shipping_cost += (weight - 1.0) * ADDITIONAL_WEIGHT_RATE
+
+        express_cost = 0
+        if is_express and rate.is_express_available:
+            express_cost = EXPRESS_SHIPPING_COST
+            delivery_days = max(1, delivery_days - 1)
+
+        return {
+            "pincode": pincode,
+            "weight": weight,
+            "base_shipping_cost": shipping_cost,
+            "express_cost": express_cost,
+            "total_shipping_cost": shipping_cost + express_cost,
+            "delivery_days": delivery_days,
+            "is_cod_available": rate.is_cod_available,
+            "is_express_available": rate.is_express_available,
+            "free_shipping_threshold": FREE_SHIPPING_THRESHOLD
+        }
+
+    def quote_many(self, pincodes: List[str], weight: float = 1.0, is_express: bool = False) -> List[Dict[str, Any]]:
+        return [self.quote(pincode, weight, is_express) for pincode in pincodes]
+
+    def order_shipping_amount(self, pincode: Optional[str], subtotal: float) -> float:
+        """Shipping charged at checkout: free above the threshold, else the zone rate."""
+        if subtotal > FREE_SHIPPING_THRESHOLD:
+            return 0
+        return self.get_rate(pincode or "").shipping_cost
+
+shipping_engine = ShippingRateEngine()
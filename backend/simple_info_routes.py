@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 import uuid
 
+from http_cache import INFO_CACHE_CONTROL, etag_matches
+from info_payloads import info_payloads
+from shipping_rates import shipping_engine
+
 info_router = APIRouter(prefix="/api/info")
 
+def info_response(request: Request, page: str) -> Response:
+    """Serve a pre-serialized info page with its ETag and 304 support."""
+    payload = info_payloads.get(page)
+    headers = {"ETag": payload.etag, "Cache-Control": INFO_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 # Simple models for info routes
 class ContactMessage(BaseModel):
     name: str
@@ -24,57 +36,20 @@ class ShippingCalculation(BaseModel):
     weight: float = 1.0  # kg
     is_express: bool = False
 
+class ShippingBatchCalculation(BaseModel):
+    pincodes: List[str] = Field(..., max_length=1000)
+    weight: float = 1.0  # kg, applied to every pincode
+    is_express: bool = False
+
 # ============================================================================
 # DELIVERY DETAILS ROUTES
 # ============================================================================
 
 @info_router.get("/delivery-details")
-async def get_delivery_details():
+async def get_delivery_details(request: Request):
     """Get delivery zones and policies"""
     try:
-        default_zones = [
-            {
-                "id": str(uuid.uuid4()),
-                "state": "Maharashtra", 
-                "city": "Mumbai",
-                "pincode_range": "400001-400097",
-                "delivery_days": 2,
-                "shipping_cost": 50.0,
-                "is_cod_available": True,
-                "is_express_available": True
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "state": "Karnataka", 
-                "city": "Bangalore",
-                "pincode_range": "560001-560097", 
-                "delivery_days": 3,
-                "shipping_cost": 75.0,
-                "is_cod_available": True,
-                "is_express_available": False
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "state": "Delhi", 
-                "city": "New Delhi",
-                "pincode_range": "110001-110097",
-                "delivery_days": 2,
-                "shipping_cost": 60.0,
-                "is_cod_available": True,
-                "is_express_available": True
-            }
-        ]
-        
-        return {
-            "zones": default_zones,
-            "policies": {
-                "free_shipping_threshold": 500,
-                "express_delivery_cost": 100,
-                "cod_charges": 25,
-                "return_policy_days": 7,
-                "exchange_policy_days": 15
-            }
-        }
+        return info_response(request, "delivery_details")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -86,47 +61,15 @@ async def get_delivery_details():
 async def calculate_shipping(calculation: ShippingCalculation):
     """Calculate shipping cost based on pincode and weight"""
     try:
-        zones = [
-            {"pincode_prefix": "400", "shipping_cost": 50.0, "delivery_days": 2, "is_cod_available": True, "is_express_available": True},
-            {"pincode_prefix": "560", "shipping_cost": 75.0, "delivery_days": 3, "is_cod_available": True, "is_express_available": False},
-            {"pincode_prefix": "110", "shipping_cost": 60.0, "delivery_days": 2, "is_cod_available": True, "is_express_available": True}
-        ]
-        
-        shipping_cost = 75.0
-        delivery_days = 5
-        is_cod_available = True
-        is_express_available = False
-        
-        for zone in zones:
-            if calculation.pincode.startswith(zone["pincode_prefix"]):
-                shipping_cost = zone["shipping_cost"]
-                delivery_days = zone["delivery_days"]
-                is_cod_available = zone["is_cod_available"]
-                is_express_available = zone["is_express_available"]
-                break
-        
-        if calculation.weight > 1.0:
-            additional_weight = calculation.weight - 1.0
-            shipping_cost += additional_weight * 20
-        
-        express_cost = 0
-        if calculation.is_express and is_express_available:
-            express_cost = 100
-            delivery_days = max(1, delivery_days - 1)
-        
-        total_cost = shipping_cost + express_cost
-        
-        return {
-            "pincode": calculation.pincode,
-            "weight": calculation.weight,
-            "base_shipping_cost": shipping_cost,
-            "express_cost": express_cost,
-            "total_shipping_cost": total_cost,
-            "delivery_days": delivery_days,
-            "is_cod_available": is_cod_available,
-            "is_express_available": is_express_available,
-            "free_shipping_threshold": 500
-        }
+        return shipping_engine.quote(calculation.pincode, calculation.weight, calculation.is_express)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@info_router.post("/shipping-calculator/batch")
+async def calculate_shipping_batch(calculation: ShippingBatchCalculation):
+    """Calculate shipping for many pincodes at once"""
+    try:
+        return {"quotes": shipping_engine.quote_many(calculation.pincodes, calculation.weight, calculation.is_express)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -183,29 +126,9 @@ async def submit_contact_message(contact: ContactMessage):
         raise HTTPException(status_code=500, detail=str(e))
 
 @info_router.get("/contact-info")
-async def get_contact_info():
+async def get_contact_info(request: Request):
     """Get company contact information"""
-    return {
-        "company_name": "DRIBBLE",
-        "tagline": "bulk t-shirts for Brands & Agency",
-        "email": "orders@dribble-sports.com",
-        "phone": "+91 98765 43210", 
-        "whatsapp": "+91 98765 43210",
-        "address": {
-            "line1": "123 Business Park",
-            "line2": "Sector 15, Industrial Area",
-            "city": "Mumbai",
-            "state": "Maharashtra", 
-            "pincode": "400001",
-            "country": "India"
-        },
-        "business_hours": "Monday - Saturday: 9:00 AM - 6:00 PM",
-        "social_media": {
-            "instagram": "@dribble_sports",
-            "facebook": "DribbleSportsOfficial",
-            "linkedin": "dribble-sports"
-        }
-    }
+    return info_response(request, "contact_info")
 
 # ============================================================================
 # SUGGESTIONS ROUTES
@@ -228,69 +151,14 @@ async def submit_suggestion(suggestion: Suggestion):
 # ============================================================================
 
 @info_router.get("/about-us")
-async def get_about_us():
+async def get_about_us(request: Request):
     """Get company about us information"""
-    return {
-        "company_name": "DRIBBLE",
-        "tagline": "bulk t-shirts for Brands & Agency",
-        "about": "DRIBBLE is India's leading bulk t-shirt manufacturer, specializing in premium quality blank apparel for brands, agencies, and printing businesses. With over 2,86,352 pieces sold last month, we're the trusted choice for bulk orders.",
-        "mission": "To provide high-quality, affordable blank apparel that empowers brands and businesses to create amazing custom products.",
-        "vision": "To be the #1 bulk apparel manufacturer in India, known for quality, reliability, and customer satisfaction.",
-        "founded": "2020",
-        "location": "Mumbai, Maharashtra, India",
-        "key_features": [
-            "Premium quality 100% cotton fabrics",
-            "Minimum order quantity: 15 pieces",
-            "GSM options: 180gsm, 210gsm, 240gsm",
-            "Wide range of colors and sizes",
-            "Fast delivery across India",
-            "Competitive bulk pricing",
-            "Perfect for DTG, Screen, and DTF printing"
-        ],
-        "certifications": [
-            "ISO 9001:2015 Quality Management",
-            "OEKO-TEX Standard 100",
-            "GOTS Certified Organic Cotton"
-        ]
-    }
+    return info_response(request, "about_us")
 
 @info_router.get("/pricing-info")
-async def get_pricing_info():
+async def get_pricing_info(request: Request):
     """Get detailed pricing information"""
     try:
-        pricing_tiers = [
-            {"min_qty": 15, "max_qty": 49, "discount": "5%", "label": "Bulk Pricing"},
-            {"min_qty": 50, "max_qty": 99, "discount": "10%", "label": "Volume Pricing"},
-            {"min_qty": 100, "max_qty": 249, "discount": "15%", "label": "Wholesale Pricing"},
-            {"min_qty": 250, "max_qty": 499, "discount": "20%", "label": "Corporate Pricing"},
-            {"min_qty": 500, "max_qty": None, "discount": "25%", "label": "Enterprise Pricing"}
-        ]
-        
-        return {
-            "minimum_order": 15,
-            "pricing_tiers": pricing_tiers,
-            "sample_products": [
-                {
-                    "name": "Oversized Drop-shoulder, 210gsm",
-                    "category": "Oversize 210gsm",
-                    "regular_price": 319,
-                    "bulk_price": 299,
-                    "savings": 20
-                },
-                {
-                    "name": "Classic Polo Shirt",
-                    "category": "Polo Shirts",
-                    "regular_price": 450,
-                    "bulk_price": 420,
-                    "savings": 30
-                }
-            ],
-            "additional_info": {
-                "gst": "18% GST applicable on all orders",
-                "shipping": "Free shipping on orders above ₹500",
-                "payment_terms": "50% advance, 50% before dispatch for new customers",
-                "delivery_time": "3-7 business days depending on location"
-            }
-        }
+        return info_response(request, "pricing_info")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
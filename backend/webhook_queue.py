@@ -0,0 +1,247 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+
+from checkout import confirm_order_payment
+from job_queue import retry_delay
+from order_tracking import sync_order_tracking
+
+logger = logging.getLogger(__name__)
+
+# Razorpay retries deliveries until it sees a 2xx, so every event is recorded
+# once (unique event_id) and applied later by the background consumer.
+WEBHOOK_EVENTS_COLLECTION = "webhook_events"
+
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_POLL_INTERVAL = 1.0  # seconds between sweeps when idle
+WEBHOOK_CLAIM_LEASE = timedelta(minutes=5)  # a processing batch is reclaimed after this, if its worker died
+WEBHOOK_MAX_ATTEMPTS = 5  # then the event is parked as failed for inspection
+
+# ============================================================================
+# FAST PATH (INGESTION)
+# ============================================================================
+
+async def ensure_webhook_indexes(database: AsyncIOMotorDatabase):
+    """Create the dedupe and work-queue indexes for webhook events."""
+    collection = database[WEBHOOK_EVENTS_COLLECTION]
+    await collection.create_index("event_id", unique=True)
+    await collection.create_index([("status", ASCENDING), ("received_at", ASCENDING)])
+
+def get_webhook_event_id(headers, body: bytes) -> str:
+    """Razorpay's event id header, or a digest of the body if it is missing."""
+    event_id = headers.get("X-Razorpay-Event-Id")
+    if event_id:
+        return event_id
+    return hashlib.sha256(body).hexdigest()
+
+def parse_webhook_payload(body: bytes) -> Dict[str, Any]:
+    """The event in a webhook body; ValueError if it is not shaped like a Razorpay event."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise ValueError("Webhook body is not JSON")
+    if not isinstance(payload, dict) or not isinstance(payload.get("event"), str) or not isinstance(payload.get("payload"), dict):
+        raise ValueError("Webhook body has no event and payload")
+    return payload
+
+async def _insert_webhook_event(database: AsyncIOMotorDatabase, document: Dict[str, Any]) -> bool:
+    try:
+        await database[WEBHOOK_EVENTS_COLLECTION].insert_one({**document, "received_at": datetime.utcnow()})
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def record_webhook_event(
+    database: AsyncIOMotorDatabase,
+    event_id: str,
+    payload: Dict[str, Any]
+) -> bool:
+    """Store a webhook event for processing. Returns False for duplicates."""
+    return await _insert_webhook_event(database, {
+        "event_id": event_id,
+        "event": payload.get("event"),
+        "payload": payload.get("payload", {}),
+        "status": "pending",
+        "attempts": 0
+    })
+
+async def record_malformed_webhook_event(database: AsyncIOMotorDatabase, event_id: str, body: bytes, error: str) -> bool:
+    """Park a signed event that cannot be parsed as failed, with its raw body. Returns False for duplicates."""
+    return await _insert_webhook_event(database, {
+        "event_id": event_id,
+        "body": body.decode("utf-8", errors="replace"),
+        "status": "failed",
+        "attempts": 0,
+        "last_error": error,
+        "failed_at": datetime.utcnow()
+    })
+
+# ============================================================================
+# EVENT APPLICATION
+# ============================================================================
+
+def build_order_update(event: Optional[str], payload: Dict[str, Any]) -> Optional[UpdateOne]:
+    """Translate a payment.failed event into an idempotent order update.
+
+    The buyer can retry on the same Razorpay order, so a failure only records
+    itself; the order and its stock hold stay open until the hold expires.
+    Captured payments go through confirm_order_payment instead.
+    """
+    payment_data = payload.get("payment", {}).get("entity", {})
+    order_id = payment_data.get("order_id")
+    if not order_id or event != "payment.failed":
+        return None
+
+    # A late failure must never undo a captured payment
+    return UpdateOne(
+        {"razorpay_order_id": order_id, "payment_status": "pending"},
+        {"$set": {"payment_status": "failed", "updated_at": datetime.utcnow()}}
+    )
+
+async def apply_webhook_events(database: AsyncIOMotorDatabase, events: List[Dict[str, Any]]):
+    """Apply the order updates for these events; raises if any of them fails."""
+    operations: List[UpdateOne] = []
+    captured: List[Tuple[str, str]] = []
+    order_ids = []
+    for event in events:
+        payment_data = event.get("payload", {}).get("payment", {}).get("entity", {})
+        if event.get("event") == "payment.captured" and payment_data.get("order_id") and payment_data.get("id"):
+            captured.append((payment_data["order_id"], payment_data["id"]))
+            order_ids.append(payment_data["order_id"])
+            continue
+        operation = build_order_update(event.get("event"), event.get("payload", {}))
+        if operation:
+            operations.append(operation)
+            order_ids.append(payment_data["order_id"])
+
+    if operations:
+        await database.orders.bulk_write(operations, ordered=True)
+    # Applied after the failures, so a capture wins whatever order the events arrived in
+    for razorpay_order_id, payment_id in captured:
+        await confirm_order_payment(database, {"razorpay_order_id": razorpay_order_id}, payment_id)
+    if order_ids:
+        await sync_order_tracking(database, {"razorpay_order_id": {"$in": order_ids}})
+
+async def _record_failure(database: AsyncIOMotorDatabase, event: Dict[str, Any], error: str):
+    attempts = event.get("attempts", 0) + 1
+    now = datetime.utcnow()
+    if attempts >= WEBHOOK_MAX_ATTEMPTS:
+        logger.error(f"Webhook event {event.get('event_id')} failed {attempts} times, giving up: {error}")
+        update = {"status": "failed", "failed_at": now}
+    else:
+        logger.warning(f"Webhook event {event.get('event_id')} failed, will retry: {error}")
+        update = {"status": "pending", "retry_after": now + timedelta(seconds=retry_delay(attempts))}
+    await database[WEBHOOK_EVENTS_COLLECTION].update_one(
+        {"_id": event["_id"]},
+        {"$set": {**update, "attempts": attempts, "last_error": error}, "$unset": {"claim_id": "", "claimed_at": ""}}
+    )
+
+async def _mark_processed(database: AsyncIOMotorDatabase, events: List[Dict[str, Any]]):
+    await database[WEBHOOK_EVENTS_COLLECTION].update_many(
+        {"_id": {"$in": [event["_id"] for event in events]}},
+        {"$set": {"status": "processed", "processed_at": datetime.utcnow()}, "$unset": {"claim_id": ""}}
+    )
+
+async def process_webhook_batch(database: AsyncIOMotorDatabase, claim_id: str) -> int:
+    """Claim up to WEBHOOK_BATCH_SIZE pending events and apply them."""
+    events_collection = database[WEBHOOK_EVENTS_COLLECTION]
+    now = datetime.utcnow()
+
+    # Pending events that are due, and batches whose worker died mid-processing
+    claimable = {"$or": [
+        {"status": "pending", "retry_after": {"$not": {"$gt": now}}},
+        {"status": "processing", "claimed_at": {"$lt": now - WEBHOOK_CLAIM_LEASE}}
+    ]}
+    candidates = await events_collection.find(claimable, {"_id": 1}).sort(
+        "received_at", ASCENDING
+    ).limit(WEBHOOK_BATCH_SIZE).to_list(length=WEBHOOK_BATCH_SIZE)
+    if not candidates:
+        return 0
+
+    # Claim the batch so other workers skip it
+    await events_collection.update_many(
+        {"$and": [{"_id": {"$in": [event["_id"] for event in candidates]}}, claimable]},
+        {"$set": {"status": "processing", "claim_id": claim_id, "claimed_at": now}}
+    )
+    events = await events_collection.find({"claim_id": claim_id, "status": "processing"}).sort(
+        "received_at", ASCENDING
+    ).to_list(length=WEBHOOK_BATCH_SIZE)
+    if not events:
+        return 0
+
+    try:
+        await apply_webhook_events(database, events)
+    except Exception as e:
+        logger.warning(f"Webhook batch failed, applying its events one at a time: {str(e)}")
+    else:
+        await _mark_processed(database, events)
+        return len(events)
+
+    # A bad event must not hold back the rest of its batch
+    for event in events:
+        try:
+            await apply_webhook_events(database, [event])
+        except Exception as e:
+            await _record_failure(database, event, str(e))
+        else:
+            await _mark_processed(database, [event])
+    return len(events)
+
+# ============================================================================
+# BACKGROUND CONSUMER
+# ============================================================================
+
+class WebhookConsumer:
+    """Background task that drains pending webhook events in batches."""
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self.database = database
+        self.claim_prefix = str(uuid.uuid4())
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake the consumer after a new event was recorded."""
+        self._wakeup.set()
+
+    async def start(self):
+        await ensure_webhook_indexes(self.database)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await process_webhook_batch(self.database, f"{self.claim_prefix}:{uuid.uuid4()}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Webhook consumer error: {str(e)}")
+                processed = 0
+
+            if processed:
+                continue
+
+            # A timer rather than wait_for, which on Python 3.11 swallows stop()'s
+            # cancel when it lands together with a notify()
+            timer = asyncio.get_running_loop().call_later(WEBHOOK_POLL_INTERVAL, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                timer.cancel()
+            self._wakeup.clear()
@@ -0,0 +1,29 @@
+"""The API app with catalog reads served from a static fixture, for multi-worker load tests.
+
+    python backend/serve.py --app bench_app:app --workers 4
+
+(with the benchmarks directory on PYTHONPATH). Startup hooks that need a
+running MongoDB are skipped, so the numbers reflect the app's own CPU cost.
+"""
+import os
+import sys
+
+from fixtures import BACKEND_DIR, StaticDatabase, build_categories, build_products
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+import server  # noqa: E402
+
+products = build_products(int(os.environ.get("BENCH_PRODUCTS", "50")))
+database = StaticDatabase(
+    products=[product.dict() for product in products],
+    categories=[category.dict() for category in build_categories()],
+    cache_versions=[]
+)
+
+server.app.dependency_overrides[server.get_database] = lambda: database
+server.app.router.on_startup.clear()
+
+app = server.app
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Compare two bench_load.py result files and fail on regressions.
+
+    python benchmarks/bench_compare.py baseline.json candidate.json
+
+Timing metrics (p50, p95, rps) are compared on the median of the runs in
+each file. A change counts as a regression only past a noise-aware
+threshold: the larger of --threshold and --noise-factor times the run-to-run
+spread seen in either file. Record both files with --repeat 5 or more, so
+the spread is measured rather than assumed.
+
+MongoDB round-trips per request do not depend on timing. Any increase past
+--round-trip-tolerance is reported, which catches N+1 queries even on a
+noisy machine. New errors on an endpoint are also a regression.
+
+Exits 1 if anything regressed, 0 otherwise.
+"""
+import argparse
+import json
+import statistics
+import sys
+
+# metric -> True if higher is better
+TIMING_METRICS = {"p50_ms": False, "p95_ms": False, "rps": True}
+
+def load(path):
+    with open(path) as f:
+        results = json.load(f)
+    # Files written without --repeat hold a single run
+    results.setdefault("runs", [{"endpoints": results["endpoints"], "total": results["total"]}])
+    return results
+
+def spread(runs, label, metric):
+    """Largest relative deviation of a run from the median of the runs."""
+    values = [run["endpoints"][label][metric] for run in runs if label in run["endpoints"]]
+    if len(values) < 2:
+        return 0.0
+    median = statistics.median(values)
+    if not median:
+        return 0.0
+    return max(abs(value - median) / median for value in values)
+
+def compare(baseline, candidate, args):
+    rows, regressions = [], []
+    for label in sorted(set(baseline["endpoints"]) & set(candidate["endpoints"])):
+        before, after = baseline["endpoints"][label], candidate["endpoints"][label]
+
+        if after["errors"] > 0 and before["errors"] == 0:
+            regressions.append(f"{label}: {after['errors']:.0f} errors (baseline had none)")
+
+        trips_before, trips_after = before["db_round_trips"], after["db_round_trips"]
+        if trips_after > trips_before + args.round_trip_tolerance:
+            regressions.append(f"{label}: DB round-trips per request {trips_before:.2f} -> {trips_after:.2f}")
+        rows.append((label, "db/req", trips_before, trips_after, trips_after - trips_before, None, ""))
+
+        if min(before["requests"], after["requests"]) < args.min_requests:
+            continue
+        for metric, higher_is_better in TIMING_METRICS.items():
+            old, new = before[metric], after[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            noise = max(spread(baseline["runs"], label, metric), spread(candidate["runs"], label, metric))
+            threshold = max(args.threshold, args.noise_factor * noise)
+            worse = -change if higher_is_better else change
+            verdict = ""
+            if worse > threshold:
+                verdict = "REGRESSION"
+                regressions.append(f"{label}: {metric} {old:.2f} -> {new:.2f} ({change:+.1%}, threshold {threshold:.0%})")
+            elif -worse > threshold:
+                verdict = "improved"
+            rows.append((label, metric, old, new, change, threshold, verdict))
+    return rows, regressions
+
+def print_rows(rows):
+    print(f"{'endpoint':<40}{'metric':>8}{'baseline':>11}{'candidate':>11}{'change':>10}{'thresh':>8}  verdict")
+    for label, metric, old, new, change, threshold, verdict in rows:
+        if threshold is None:
+            if abs(change) < 0.005:
+                continue
+            delta, thresh = f"{change:+.2f}", ""
+        else:
+            delta, thresh = f"{change:+.1%}", f"{threshold:.0%}"
+        print(f"{label:<40}{metric:>8}{old:>11.2f}{new:>11.2f}{delta:>10}{thresh:>8}  {verdict}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two bench_load.py result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="minimum relative change to flag (default 0.10)")
+    parser.add_argument("--noise-factor", type=float, default=2.0, help="multiple of run-to-run spread to tolerate")
+    parser.add_argument("--round-trip-tolerance", type=float, default=0.25,
+                        help="allowed increase in mean DB round-trips per request")
+    parser.add_argument("--min-requests", type=int, default=20, help="skip timing checks for endpoints with fewer samples")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for key in ("database", "concurrency", "mix", "dataset"):
+        if baseline["meta"].get(key) != candidate["meta"].get(key):
+            print(f"warning: runs differ in {key}: {baseline['meta'].get(key)} vs {candidate['meta'].get(key)}", file=sys.stderr)
+    for label in sorted(set(baseline["endpoints"]) ^ set(candidate["endpoints"])):
+        print(f"warning: {label} only appears in one run", file=sys.stderr)
+
+    rows, regressions = compare(baseline, candidate, args)
+    print(f"baseline {baseline['meta'].get('git_commit')} ({len(baseline['runs'])} runs), "
+          f"candidate {candidate['meta'].get('git_commit')} ({len(candidate['runs'])} runs)\n")
+    print_rows(rows)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions.")
+
+if __name__ == "__main__":
+    main()
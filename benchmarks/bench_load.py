@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""In-process load test of the API.
+
+Boots server.app in this process against mongomock-motor (or a real mongod
+with --mongo-url), seeds a catalog, users, carts and past orders with the
+seed_data.py models, then runs virtual users that repeatedly pick a scenario
+from a weighted mix:
+
+- browse: categories, a category's products, a product view
+- search: product search
+- cart: anonymous cart churn (add, update, read, remove)
+- checkout: signed-in cart, order calculation and payment order creation
+- admin: order list and cache stats as an admin
+
+Reports throughput, p50/p95/p99 latency and MongoDB round-trips per
+request for each endpoint. With --repeat N the measurement runs N times
+and the report shows the median of the runs. --output writes everything,
+per-run numbers included, as JSON for bench_compare.py.
+
+    python benchmarks/bench_load.py --concurrency 16 --duration 20 --repeat 5 --output results.json
+
+Payment orders are created against an offline Razorpay stand-in, so no
+network access or payment keys are needed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from db_trace import CountingDatabase, RoundTrips, current_round_trips
+from fixtures import BACKEND_DIR, CATEGORY_NAMES, COLORS, SIZES, build_orders
+
+SEARCH_TERMS = ["oversized", "polo", "hoodie", "cotton", "heavy", "premium"]
+
+DEFAULT_MIX = "browse=50,search=15,cart=20,checkout=10,admin=5"
+
+SHIPPING_ADDRESS = {
+    "full_name": "Bench Buyer",
+    "phone": "+91 9876543210",
+    "address_line_1": "123 Business Park",
+    "city": "Mumbai",
+    "state": "Maharashtra",
+    "postal_code": "400001"
+}
+
+# ============================================================================
+# APP SETUP
+# ============================================================================
+
+def load_server(mongo_url, db_name):
+    """Import the backend with its database pointed at mongomock or a real mongod."""
+    os.environ["MONGO_URL"] = mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("RAZORPAY_KEY_ID", "rzp_bench")
+    os.environ.setdefault("RAZORPAY_KEY_SECRET", "bench")
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    if not mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        import motor.motor_asyncio
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    import server
+    server.get_razorpay_client = lambda: OfflineRazorpay()
+    return server
+
+class OfflineRazorpay:
+    """Razorpay client stand-in that creates orders locally."""
+
+    class order:
+        @staticmethod
+        def create(data):
+            return {"id": f"order_bench{random.getrandbits(48):012x}", "amount": data["amount"], "status": "created"}
+
+async def seed(server, args, rng):
+    """Replace the bench database contents; returns ids the scenarios need."""
+    from seed_data import Category, PricingRule, Product, ProductVariant, SizeChart, UserInDB
+    from auth import create_access_token, get_password_hash
+
+    db = server.db
+    for name in ["users", "categories", "products", "carts", "orders", "payment_transactions", "cache_versions"]:
+        await db[name].delete_many({})
+
+    categories = [
+        Category(name=CATEGORY_NAMES[index % len(CATEGORY_NAMES)] + ("" if index < len(CATEGORY_NAMES) else f" {index}"),
+                 sort_order=index)
+        for index in range(args.categories)
+    ]
+    await db.categories.insert_many([category.dict() for category in categories])
+
+    products = []
+    for index in range(args.products):
+        category = categories[index % len(categories)]
+        products.append(Product(
+            name=f"{rng.choice(['Oversized', 'Heavy Gauge', 'Premium', 'Classic'])} {category.name} Tee {index}, 100% Cotton",
+            description="Super fine stitched premium quality fabric, perfect for bulk orders.",
+            category=category.name,
+            base_price=319.0,
+            bulk_price=279.0,
+            material="100% Cotton",
+            variants=[
+                ProductVariant(color=color, size=size, stock_quantity=1_000_000, sku=f"BENCH-{index}-{color[:3].upper()}-{size}")
+                for color in COLORS for size in SIZES
+            ],
+            images=["https://example.com/front.jpg", "https://example.com/back.jpg"],
+            size_chart=SizeChart(colors=COLORS, sizes=SIZES, chart_code="OS210"),
+            pricing_rules=PricingRule(bulk_threshold=15, bulk_price=279.0, regular_price=319.0,
+                                      bulk_label="More than 15pcs", regular_label="Less than 15pcs"),
+            created_at=datetime.utcnow() - timedelta(minutes=args.products - index)
+        ))
+    await db.products.insert_many([product.dict() for product in products])
+
+    # One bcrypt hash for everyone; hashing per user would dominate seeding
+    hashed_password = get_password_hash("bench123")
+    users = [
+        UserInDB(email=f"bench{index}@example.com", full_name=f"Bench User {index}", hashed_password=hashed_password)
+        for index in range(args.users)
+    ]
+    admin = UserInDB(email="admin@example.com", full_name="Bench Admin", is_admin=True, hashed_password=hashed_password)
+    await db.users.insert_many([user.dict() for user in users + [admin]])
+
+    # Half the users start with a few lines in their cart
+    await db.carts.insert_many([
+        {
+            "id": f"bench-cart-{index}",
+            "user_id": user.id,
+            "session_id": None,
+            "items": [
+                {"product_id": rng.choice(products).id, "color": rng.choice(COLORS), "size": rng.choice(SIZES), "quantity": rng.randint(1, 10)}
+                for _ in range(3)
+            ],
+            "version": 1,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }
+        for index, user in enumerate(users[::2])
+    ])
+
+    if args.orders:
+        orders = [order.dict() for order in build_orders(args.orders, products)]
+        for order in orders:
+            order["user_id"] = rng.choice(users).id
+            order["created_at"] = datetime.utcnow() - timedelta(days=rng.uniform(0, 90))
+        await db.orders.insert_many(orders)
+
+    return {
+        "categories": [category.name for category in categories],
+        "products": [product.id for product in products],
+        "user_tokens": [create_access_token({"sub": user.email, "uid": user.id}) for user in users],
+        "admin_token": create_access_token({"sub": admin.email, "uid": admin.id})
+    }
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+class Recorder:
+    """Latencies per endpoint label for requests started after ``measure_from``."""
+
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies: Dict[str, List[float]] = {}
+        self.round_trips: Dict[str, List[int]] = {}
+        self.errors: Dict[str, int] = {}
+        self.scenarios: Dict[str, int] = {}
+
+    def record(self, label, started, elapsed, round_trips, ok):
+        if started < self.measure_from:
+            return
+        self.latencies.setdefault(label, []).append(elapsed)
+        self.round_trips.setdefault(label, []).append(round_trips)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(recorder, duration):
+    endpoints = {}
+    for label, values in sorted(recorder.latencies.items()):
+        ordered = sorted(values)
+        round_trips = recorder.round_trips[label]
+        endpoints[label] = {
+            "requests": len(ordered),
+            "errors": recorder.errors.get(label, 0),
+            "rps": round(len(ordered) / duration, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "db_round_trips": round(sum(round_trips) / len(round_trips), 3),
+            "db_round_trips_max": max(round_trips)
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "total": {
+            "requests": total,
+            "errors": sum(recorder.errors.values()),
+            "rps": round(total / duration, 2),
+            "scenarios_per_sec": round(sum(recorder.scenarios.values()) / duration, 2)
+        },
+        "scenarios": dict(sorted(recorder.scenarios.items())),
+        "endpoints": endpoints
+    }
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+class VirtualUser:
+    def __init__(self, client, recorder, world, rng):
+        self.client = client
+        self.recorder = recorder
+        self.world = world
+        self.rng = rng
+
+    async def call(self, label, method, url, **kwargs):
+        round_trips = RoundTrips()
+        token = current_round_trips.set(round_trips)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        finally:
+            current_round_trips.reset(token)
+        self.recorder.record(label, started, time.perf_counter() - started, round_trips.count, response.status_code < 400)
+        # mongomock never suspends, so give the other virtual users a turn
+        await asyncio.sleep(0)
+        return response
+
+    def random_line(self, quantity=None):
+        return {
+            "product_id": self.rng.choice(self.world["products"]),
+            "color": self.rng.choice(COLORS),
+            "size": self.rng.choice(SIZES),
+            "quantity": quantity or self.rng.randint(1, 20)
+        }
+
+    async def browse(self):
+        await self.call("GET /api/categories", "GET", "/api/categories")
+        category = self.rng.choice(self.world["categories"])
+        await self.call("GET /api/products", "GET", "/api/products", params={"category": category, "limit": 20})
+        await self.call("GET /api/products/view", "GET", "/api/products/view",
+                        params={"product_id": self.rng.choice(self.world["products"])})
+
+    async def search(self):
+        await self.call("GET /api/products?search", "GET", "/api/products",
+                        params={"search": self.rng.choice(SEARCH_TERMS), "limit": 20})
+
+    async def cart(self):
+        line = self.random_line()
+        await self.call("POST /api/cart/add", "POST", "/api/cart/add", params={"return_cart": "true"}, json=line)
+        await self.call("POST /api/cart/add", "POST", "/api/cart/add", params={"return_cart": "true"}, json=self.random_line())
+        await self.call("PUT /api/cart/update", "PUT", "/api/cart/update", params={"return_cart": "true"},
+                        json={**line, "quantity": line["quantity"] + 5})
+        await self.call("GET /api/cart", "GET", "/api/cart")
+        await self.call("DELETE /api/cart/remove/{product_id}", "DELETE", f"/api/cart/remove/{line['product_id']}",
+                        params={"color": line["color"], "size": line["size"], "return_cart": "true"})
+
+    async def checkout(self):
+        headers = {"Authorization": f"Bearer {self.rng.choice(self.world['user_tokens'])}"}
+        line = self.random_line(quantity=self.rng.choice([5, 15, 30]))
+        await self.call("POST /api/cart/add", "POST", "/api/cart/add", json=line, headers=headers)
+        await self.call("POST /api/orders/calculate", "POST", "/api/orders/calculate",
+                        params={"pincode": SHIPPING_ADDRESS["postal_code"]}, json=[line])
+        await self.call("POST /api/payment/create-order", "POST", "/api/payment/create-order", headers=headers, json={
+            "customer_name": "Bench Buyer",
+            "customer_email": "buyer@example.com",
+            "customer_phone": SHIPPING_ADDRESS["phone"],
+            "shipping_address": SHIPPING_ADDRESS,
+            "is_bulk_order": line["quantity"] >= 15
+        })
+        # Keep carts from growing without bound
+        await self.call("DELETE /api/cart/remove/{product_id}", "DELETE", f"/api/cart/remove/{line['product_id']}",
+                        params={"color": line["color"], "size": line["size"]}, headers=headers)
+
+    async def admin(self):
+        headers = {"Authorization": f"Bearer {self.world['admin_token']}"}
+        await self.call("GET /api/orders (admin)", "GET", "/api/orders", headers=headers)
+        await self.call("GET /api/admin/cache/stats", "GET", "/api/admin/cache/stats", headers=headers)
+
+async def run_user(app, recorder, world, mix, deadline, seed):
+    import httpx
+
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        user = VirtualUser(client, recorder, world, rng)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            await getattr(user, name)()
+            if started >= recorder.measure_from:
+                recorder.scenarios[name] = recorder.scenarios.get(name, 0) + 1
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(VirtualUser, name.strip()):
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def median_of_runs(runs):
+    """Per-field median across runs, for the endpoints and totals present in every run."""
+    def median_fields(items):
+        return {key: round(statistics.median(item[key] for item in items), 3) for key in items[0]}
+
+    labels = set.intersection(*(set(run["endpoints"]) for run in runs))
+    return {
+        "total": median_fields([run["total"] for run in runs]),
+        "endpoints": {label: median_fields([run["endpoints"][label] for run in runs]) for label in sorted(labels)}
+    }
+
+async def measure(app, world, args, round_index):
+    warmup_end = time.perf_counter() + args.warmup
+    deadline = warmup_end + args.duration
+    recorder = Recorder(warmup_end)
+
+    seed = args.seed + round_index * args.concurrency
+    await asyncio.gather(
+        *(run_user(app, recorder, world, args.mix, deadline, seed + index) for index in range(args.concurrency))
+    )
+    return summarize(recorder, time.perf_counter() - warmup_end)
+
+async def run(args):
+    rng = random.Random(args.seed)
+    server = load_server(args.mongo_url, args.db_name)
+    world = await seed(server, args, rng)
+
+    # Handlers get the database through this dependency; background tasks
+    # keep the plain one, so only request work is counted
+    counting_db = CountingDatabase(server.db)
+
+    async def get_counting_database():
+        return counting_db
+
+    server.app.dependency_overrides[server.get_database] = get_counting_database
+
+    await server.app.router.startup()
+    try:
+        runs = []
+        for round_index in range(args.repeat):
+            runs.append(await measure(server.app, world, args, round_index))
+            if args.repeat > 1:
+                print(f"  run {round_index + 1}/{args.repeat}: {runs[-1]['total']['rps']} req/s", file=sys.stderr)
+    finally:
+        await server.app.router.shutdown()
+
+    return {
+        "meta": {
+            "benchmark": "bench_load",
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "database": "mongod" if args.mongo_url else "mongomock",
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "mix": args.mix,
+            "dataset": {
+                "categories": args.categories,
+                "products": args.products,
+                "users": args.users,
+                "orders": args.orders
+            }
+        },
+        **median_of_runs(runs),
+        "runs": runs
+    }
+
+def print_report(results):
+    meta, total = results["meta"], results["total"]
+    runs = f" (median of {meta['repeat']} runs)" if meta["repeat"] > 1 else ""
+    print(f"{total['requests']:.0f} requests, {total['errors']:.0f} errors, {total['rps']} req/s, "
+          f"{total['scenarios_per_sec']} scenarios/s over {meta['duration']}s{runs}")
+    print(f"\n{'endpoint':<40}{'reqs':>8}{'err':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'db/req':>8}")
+    for label, stats in results["endpoints"].items():
+        print(f"{label:<40}{stats['requests']:>8.0f}{stats['errors']:>6.0f}{stats['rps']:>9.1f}"
+              f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['db_round_trips']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the API")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--repeat", type=int, default=1, help="measured runs; the report shows their median")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", help="use this mongod instead of mongomock (its bench database is wiped)")
+    parser.add_argument("--db-name", default="dribble_bench")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
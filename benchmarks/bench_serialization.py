@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Compare requests/sec on /api/products and /api/orders with and without FAST_JSON.
+
+The app is driven in-process through httpx's ASGI transport and database
+reads are answered from a static in-memory fixture, so the numbers reflect
+handler, validation and serialization cost rather than MongoDB latency.
+
+    python benchmarks/bench_serialization.py --products 50 --orders 100
+
+Requires the backend requirements plus httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fixtures import BACKEND_DIR, StaticDatabase, build_orders, build_products
+
+async def drive(client, path, total, concurrency):
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+async def run_mode(args):
+    import httpx
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    from models import User
+
+    products = build_products(args.products)
+    orders = build_orders(args.orders, products)
+    database = StaticDatabase(
+        products=[product.dict() for product in products],
+        orders=[order.dict() for order in orders],
+        cache_versions=[]
+    )
+
+    admin = User(email="admin@dribble-sports.com", full_name="Bench Admin", is_admin=True)
+    server.app.dependency_overrides[server.get_database] = lambda: database
+    server.app.dependency_overrides[server.get_current_user_db] = lambda: admin
+
+    transport = httpx.ASGITransport(app=server.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in (f"/api/products?limit={args.products}", "/api/orders"):
+            await drive(client, path, args.warmup, args.concurrency)
+            results[path.split("?")[0]] = await drive(client, path, args.requests, args.concurrency)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["default", "fast"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    # FAST_JSON is read at import time, so each mode runs in its own process
+    results = {}
+    for mode in ("default", "fast"):
+        # CACHE_MAX_BYTES=0 disables the response cache so every request serializes
+        env = dict(os.environ, FAST_JSON="true" if mode == "fast" else "false", CACHE_MAX_BYTES="0")
+        env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        env.setdefault("DB_NAME", "bench")
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode] + sys.argv[1:],
+            env=env, check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'endpoint':<16}{'default rps':>14}{'FAST_JSON rps':>16}{'speedup':>10}")
+    for endpoint, default_rps in results["default"].items():
+        fast_rps = results["fast"][endpoint]
+        print(f"{endpoint:<16}{default_rps:>14.1f}{fast_rps:>16.1f}{fast_rps / default_rps:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
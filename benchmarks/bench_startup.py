@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Profile backend cold start.
+
+Two measurements, each repeated and reported as the median:
+
+- import time of ``server`` from ``python -X importtime``, with the heaviest
+  modules by cumulative and by self time
+- wall time from launching backend/serve.py (single worker, static-fixture
+  app from bench_app.py) to the first 200 from /api/categories
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from fixtures import BACKEND_DIR
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+def bench_env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BENCH_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "bench")
+    return env
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) for each line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+def profile_imports(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+def time_to_first_200(env, port, timeout=60):
+    url = f"http://127.0.0.1:{port}/api/categories"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "serve.py"), "--app", "bench_app:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        env=env
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise RuntimeError("server did not become ready")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile backend cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    env = bench_env()
+    profiles = [profile_imports(env) for _ in range(args.runs)]
+    import_ms = statistics.median(
+        next(cumulative for name, _, cumulative, _ in profile if name == "server") / 1000
+        for profile in profiles
+    )
+    first_200_ms = statistics.median(time_to_first_200(env, args.port) * 1000 for _ in range(args.runs))
+
+    # Module breakdown from the run closest to the median
+    profile = min(profiles, key=lambda p: abs(next(c for n, _, c, _ in p if n == "server") / 1000 - import_ms))
+    direct = sorted((m for m in profile if m[3] == 1), key=lambda m: m[2], reverse=True)[:args.top]
+    by_self = sorted(profile, key=lambda m: m[1], reverse=True)[:args.top]
+
+    print(f"import server:           {import_ms:8.1f} ms")
+    print(f"process start to 200:    {first_200_ms:8.1f} ms")
+    print(f"\nImported by server (cumulative ms):")
+    for name, _, cumulative, _ in direct:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+    print(f"\nHeaviest modules (self ms):")
+    for name, self_us, _, _ in by_self:
+        print(f"  {self_us / 1000:8.1f}  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "runs": args.runs,
+                "import_ms": round(import_ms, 1),
+                "first_200_ms": round(first_200_ms, 1),
+                "direct_imports": [{"module": m[0], "cumulative_ms": m[2] / 1000} for m in direct],
+                "self_time": [{"module": m[0], "self_ms": m[1] / 1000} for m in by_self]
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Measure how throughput scales with the number of uvicorn workers.
+
+For each worker count this starts backend/serve.py with the static-fixture
+app (bench_app.py) and drives a browse mix (categories, product list,
+product view) from several client processes for a fixed time. It then
+reports requests/sec and the scaling efficiency relative to one worker.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+
+Requires the backend requirements plus httpx. Use a machine with more cores
+than the largest worker count, since the client processes need CPU too.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from fixtures import BACKEND_DIR
+
+BENCH_DIR = Path(__file__).resolve().parent
+SCENARIO = ["/api/categories", "/api/products?limit=20", "/api/products/view"]
+
+def client_process(base_url, duration, concurrency, results):
+    import httpx
+
+    async def run():
+        counts = {"ok": 0, "errors": 0}
+        deadline = time.perf_counter() + duration
+
+        async def worker(client, offset):
+            index = offset
+            while time.perf_counter() < deadline:
+                response = await client.get(SCENARIO[index % len(SCENARIO)])
+                counts["ok" if response.status_code == 200 else "errors"] += 1
+                index += 1
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+            await asyncio.gather(*(worker(client, offset) for offset in range(concurrency)))
+        return counts
+
+    results.put(asyncio.run(run()))
+
+def drive(base_url, duration, clients, concurrency):
+    """Requests/sec summed over all client processes."""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client_process, args=(base_url, duration, concurrency, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    errors = sum(total["errors"] for total in totals)
+    if errors:
+        print(f"  warning: {errors} non-200 responses", file=sys.stderr)
+    return sum(total["ok"] for total in totals) / duration
+
+def wait_until_ready(base_url, timeout=60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/categories").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+def measure(workers, args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BENCH_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "bench")
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "serve.py"), "--app", "bench_app:app",
+         "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(workers), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        wait_until_ready(base_url)
+        drive(base_url, args.warmup, args.clients, args.concurrency)
+        return drive(base_url, args.duration, args.clients, args.concurrency)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per client process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        rps = measure(workers, args)
+        results.append({"workers": workers, "rps": round(rps, 1)})
+        print(f"  {workers} worker(s): {rps:.1f} rps", file=sys.stderr)
+
+    baseline = results[0]["rps"] / results[0]["workers"]
+    print(f"{'workers':>8}{'rps':>12}{'speedup':>10}{'efficiency':>12}")
+    for result in results:
+        speedup = result["rps"] / results[0]["rps"]
+        result["efficiency"] = round(result["rps"] / (baseline * result["workers"]), 3)
+        print(f"{result['workers']:>8}{result['rps']:>12.1f}{speedup:>9.2f}x{result['efficiency']:>11.0%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "scenario": SCENARIO, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Count MongoDB round-trips per request.
+
+``CountingDatabase`` wraps a Motor (or mongomock-motor) database. Every
+awaited collection or database call counts as one round-trip, and so does
+each cursor ``to_list`` or ``async for``. Counts go to the ``RoundTrips``
+set in ``current_round_trips``. The load test sets it around each request,
+so work in background tasks is not attributed to requests.
+
+A cursor read that needs several getMore batches still counts once. Counts
+measure how many queries a handler issues, which is what catches N+1
+regressions.
+"""
+import inspect
+from contextvars import ContextVar
+from typing import Optional
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+
+current_round_trips: ContextVar[Optional[RoundTrips]] = ContextVar("current_round_trips", default=None)
+
+def count_round_trip():
+    counter = current_round_trips.get()
+    if counter is not None:
+        counter.count += 1
+
+async def _counted(awaitable):
+    count_round_trip()
+    return await awaitable
+
+def _is_cursor(value):
+    return hasattr(value, "to_list") and not inspect.isawaitable(value)
+
+class CountingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # sort(), limit(), skip() ... return the cursor itself
+            return self if result is self._cursor else result
+        return call
+
+    async def to_list(self, *args, **kwargs):
+        count_round_trip()
+        return await self._cursor.to_list(*args, **kwargs)
+
+    def __aiter__(self):
+        count_round_trip()
+        return self._cursor.__aiter__()
+
+class CountingCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if _is_cursor(result):
+                return CountingCursor(result)
+            if inspect.isawaitable(result):
+                return _counted(result)
+            return result
+        return call
+
+class CountingDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._database, name)
+        if hasattr(attr, "find_one"):
+            return CountingCollection(attr)
+        if callable(attr):
+            def call(*args, **kwargs):
+                result = attr(*args, **kwargs)
+                return _counted(result) if inspect.isawaitable(result) else result
+            return call
+        return attr
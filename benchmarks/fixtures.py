@@ -0,0 +1,110 @@
+"""Shared benchmark fixtures: static stand-ins for Motor and catalog/order builders."""
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+COLORS = ["Black", "White", "Lavender", "Beige", "Red", "Sage Green", "Brown", "Maroon", "Orange", "Navy"]
+SIZES = ["S", "M", "L", "XL", "XXL"]
+CATEGORY_NAMES = [
+    "Oversize 210gsm", "Oversize 240gsm", "Kids Kneck", "Oversize 190gsm", "Polo Shirts",
+    "Premium Polo", "Hoodie 320gsm", "Sweatshirt", "Varsity", "Shorts"
+]
+
+class StaticCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        return StaticCursor(self.documents[:count])
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+class StaticCollection:
+    """Read-only stand-in for a Motor collection that ignores filters."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, *args, **kwargs):
+        return StaticCursor(self.documents)
+
+    async def find_one(self, *args, **kwargs):
+        return self.documents[0] if self.documents else None
+
+class StaticDatabase:
+    def __init__(self, **collections):
+        for name, documents in collections.items():
+            setattr(self, name, StaticCollection(documents))
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+def build_products(count):
+    from models import Product, ProductVariant
+
+    products = []
+    for index in range(count):
+        products.append(Product(
+            name=f"Oversized Drop-shoulder {index}, 210gsm",
+            description="Premium quality oversized t-shirt perfect for bulk orders.",
+            category="Oversize 210gsm",
+            base_price=319.0,
+            bulk_price=279.0,
+            gsm="210gsm",
+            variants=[
+                ProductVariant(color=color, size=size, stock_quantity=100, sku=f"OS210-{index}-{color[:3].upper()}-{size}")
+                for color in COLORS for size in SIZES
+            ],
+            images=["https://example.com/front.jpg", "https://example.com/back.jpg"]
+        ))
+    return products
+
+def build_orders(count, products):
+    from models import Address, Order, OrderItem
+
+    orders = []
+    for index in range(count):
+        product = products[index % len(products)]
+        items = [
+            OrderItem(
+                product_id=product.id,
+                product_name=product.name,
+                color=COLORS[line % len(COLORS)],
+                size=SIZES[line % len(SIZES)],
+                quantity=5,
+                unit_price=279.0,
+                total_price=1395.0
+            )
+            for line in range(4)
+        ]
+        address = Address(
+            user_id="",
+            full_name="Bench Buyer",
+            phone="+91 9876543210",
+            address_line_1="123 Business Park",
+            city="Mumbai",
+            state="Maharashtra",
+            postal_code="400001"
+        )
+        orders.append(Order(
+            email=f"buyer{index}@example.com",
+            phone="+91 9876543210",
+            items=items,
+            subtotal=5580.0,
+            tax_amount=1004.4,
+            shipping_amount=0,
+            total_amount=6584.4,
+            shipping_address=address,
+            billing_address=address
+        ))
+    return orders
+
+def build_categories():
+    from models import Category
+
+    names = ["Oversize 210gsm", "Oversize 240gsm", "Kids Rneck", "Premium Polo", "Hoodie 320gsm-1", "Sweatshirt"]
+    return [Category(name=name, sort_order=index) for index, name in enumerate(names)]
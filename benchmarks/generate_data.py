@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""Generate a large synthetic dataset for scale testing.
+
+Writes users, categories, products with many variants, carts and orders
+straight to MongoDB with insert_many. Volumes are configurable, and
+1M+ orders are the intended use:
+
+    python benchmarks/generate_data.py --mongo-url mongodb://localhost:27017 \\
+        --db-name dribble_scale --orders 1000000 --users 100000 --workers 8
+
+Distributions are meant to look like the store's real traffic:
+
+- order volume grows toward the present, with daytime and evening peaks
+- order status follows order age (recent orders pending or in progress,
+  older ones delivered, a few cancelled)
+- sizes peak at M/L, and about a quarter of orders are bulk (15+ pieces)
+- popular products get most of the orders
+
+Users, carts and orders are generated in fixed-size chunks across worker
+processes. Each chunk has its own RNG seeded from --seed, and ids are
+derived from the seed too. Timestamps count back from --now, which has a
+fixed default, so a given seed gives the same data on any day and whatever
+the worker count.
+
+The target collections are dropped first. The API creates its indexes when
+it starts, which is faster than maintaining them during the load.
+--dry-run generates and validates everything without connecting.
+"""
+import argparse
+import math
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fixtures import BACKEND_DIR, CATEGORY_NAMES, COLORS
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+CHUNK_SIZE = 10_000
+ID_NAMESPACE = uuid.UUID("5b0c4f7e-6a36-4f0e-9d53-0f3c2b1d9a10")
+DEFAULT_NOW = datetime(2025, 1, 1, 23, 59, 59)  # default --now, so the dataset does not change daily
+
+ALL_SIZES = ["XS", "S", "M", "L", "XL", "XXL"]
+SIZE_WEIGHTS = [3, 14, 30, 28, 17, 8]
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 3, 4, 6, 8, 10, 10, 9, 8, 7, 7, 8, 10, 12, 12, 10, 6, 3]
+LINE_COUNT_WEIGHTS = [50, 25, 15, 10]
+
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Rohan", "Saanvi", "Arjun",
+               "Meera", "Kabir", "Priya", "Rahul", "Sneha", "Vikram", "Neha", "Karan", "Pooja", "Aditi"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Reddy", "Patel", "Gupta", "Nair", "Singh", "Das", "Mehta",
+              "Joshi", "Kulkarni", "Rao", "Bose", "Khan", "Menon", "Chopra", "Pillai", "Shah", "Kapoor"]
+CITIES = [
+    ("Mumbai", "Maharashtra", "400"), ("Pune", "Maharashtra", "411"), ("New Delhi", "Delhi", "110"),
+    ("Bengaluru", "Karnataka", "560"), ("Chennai", "Tamil Nadu", "600"), ("Hyderabad", "Telangana", "500"),
+    ("Kolkata", "West Bengal", "700"), ("Ahmedabad", "Gujarat", "380"), ("Jaipur", "Rajasthan", "302"),
+    ("Lucknow", "Uttar Pradesh", "226"), ("Kochi", "Kerala", "682"), ("Guwahati", "Assam", "781")
+]
+CITY_WEIGHTS = [18, 8, 16, 15, 9, 9, 7, 5, 4, 4, 3, 2]
+
+def stable_id(seed, kind, index):
+    return str(uuid.uuid5(ID_NAMESPACE, f"{seed}:{kind}:{index}"))
+
+def chunk_rng(seed, kind, chunk):
+    # String seeds hash deterministically across runs and processes
+    return random.Random(f"{seed}:{kind}:{chunk}")
+
+def random_datetime(rng, now, days, growth=True):
+    """A timestamp in the last ``days`` days, denser toward now and in busy hours."""
+    fraction = math.sqrt(rng.random()) if growth else rng.random()
+    day = now - timedelta(days=math.floor(days * (1 - fraction)))
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+def random_address(rng, user_id, full_name, phone):
+    city, state, prefix = rng.choices(CITIES, CITY_WEIGHTS)[0]
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "user_id": user_id or "",
+        "full_name": full_name,
+        "phone": phone,
+        "address_line_1": f"{rng.randint(1, 999)}, {rng.choice(['MG Road', 'Station Road', 'Park Street', 'Link Road', 'Main Street'])}",
+        "address_line_2": None,
+        "city": city,
+        "state": state,
+        "postal_code": f"{prefix}{rng.randint(1, 99):03d}",
+        "country": "India",
+        "is_default": True
+    }
+
+def user_profile(seed, index):
+    """Name, email and phone for user ``index``; orders reuse it without a lookup."""
+    rng = random.Random(f"{seed}:profile:{index}")
+    full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return full_name, f"user{index}@example.com", f"+91 9{rng.randint(100000000, 999999999)}"
+
+# ============================================================================
+# CATALOG (generated in the parent process, shared with workers)
+# ============================================================================
+
+def generate_catalog(args, now):
+    rng = chunk_rng(args.seed, "catalog", 0)
+    categories = []
+    for index in range(args.categories):
+        suffix = "" if index < len(CATEGORY_NAMES) else f" {index // len(CATEGORY_NAMES) + 1}"
+        categories.append({
+            "id": stable_id(args.seed, "category", index),
+            "name": CATEGORY_NAMES[index % len(CATEGORY_NAMES)] + suffix,
+            "description": None,
+            "image": None,
+            "is_active": True,
+            "sort_order": index,
+            "featured_product_id": None
+        })
+
+    products = []
+    for index in range(args.products):
+        category = categories[index % len(categories)]
+        base_price = float(rng.choice([249, 299, 319, 349, 399, 499, 599, 799, 999]))
+        bulk_price = round(base_price * rng.uniform(0.8, 0.9))
+        colors = rng.sample(COLORS, rng.randint(3, len(COLORS)))
+        sizes = ALL_SIZES[rng.randint(0, 1):]
+        created_at = random_datetime(rng, now, args.days, growth=False)
+        products.append({
+            "id": stable_id(args.seed, "product", index),
+            "name": f"{rng.choice(['Oversized', 'Heavy Gauge', 'Premium', 'Classic', 'Essential'])} {category['name']} {index}",
+            "description": "Super fine stitched premium quality fabric, perfect for bulk orders.",
+            "category": category["name"],
+            "base_price": base_price,
+            "bulk_price": bulk_price,
+            "gsm": None,
+            "material": "100% Cotton",
+            "variants": [
+                {
+                    "color": color,
+                    "size": size,
+                    "stock_quantity": rng.choice([0, rng.randint(1, 20), rng.randint(20, 500), rng.randint(500, 5000)]),
+                    "sku": f"GEN-{index}-{color[:3].upper()}-{size}"
+                }
+                for color in colors for size in sizes
+            ],
+            "images": [f"https://example.com/products/{index}/front.jpg", f"https://example.com/products/{index}/back.jpg"],
+            "size_chart": {"colors": colors, "sizes": sizes, "chart_code": f"GEN{index % 50:02d}"},
+            "pricing_rules": {
+                "bulk_threshold": 15,
+                "bulk_price": bulk_price,
+                "regular_price": base_price,
+                "bulk_label": "More than 15pcs",
+                "regular_label": "Less than 15pcs"
+            },
+            "is_active": rng.random() > 0.05,
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+    return categories, products
+
+# ============================================================================
+# CHUNKED DOCUMENTS (users, carts, orders)
+# ============================================================================
+
+# Set in each worker by init_worker
+_state = {}
+
+def init_worker(args, products, hashed_password, now):
+    from shipping_rates import shipping_engine
+
+    shipping_engine.load()
+    _state.update(args=args, products=products, hashed_password=hashed_password, now=now,
+                  shipping=shipping_engine, collections={})
+    if not args.dry_run:
+        from pymongo import MongoClient
+        _state["database"] = MongoClient(args.mongo_url)[args.db_name]
+
+def generate_users(rng, start, count):
+    args, now = _state["args"], _state["now"]
+    users = []
+    for index in range(start, start + count):
+        full_name, email, phone = user_profile(args.seed, index)
+        users.append({
+            "id": stable_id(args.seed, "user", index),
+            "email": email,
+            "full_name": full_name,
+            "phone": phone,
+            "is_active": rng.random() > 0.01,
+            "is_admin": index == 0,
+            "created_at": random_datetime(rng, now, args.days),
+            "hashed_password": _state["hashed_password"]
+        })
+    return users
+
+def pick_product(rng):
+    # Popularity skew: low indexes sell far more than the tail
+    products = _state["products"]
+    return products[int(len(products) * rng.random() ** 2.5)]
+
+def random_lines(rng, bulk):
+    lines = []
+    for _ in range(rng.choices(range(1, 5), LINE_COUNT_WEIGHTS)[0]):
+        product = pick_product(rng)
+        size = rng.choices(ALL_SIZES, SIZE_WEIGHTS)[0]
+        if size not in product["size_chart"]["sizes"]:
+            size = "M"
+        lines.append((product, rng.choice(product["size_chart"]["colors"]), size,
+                      rng.randint(10, 60) if bulk else rng.randint(1, 6)))
+    return lines
+
+def generate_carts(rng, start, count):
+    args, now = _state["args"], _state["now"]
+    carts = []
+    for index in range(start, start + count):
+        # Two thirds belong to users, the rest to anonymous sessions
+        owned = index % 3 != 2
+        updated_at = now - timedelta(days=rng.uniform(0, 30))
+        carts.append({
+            "id": stable_id(args.seed, "cart", index),
+            "user_id": stable_id(args.seed, "user", rng.randrange(args.users)) if owned else None,
+            "session_id": None if owned else stable_id(args.seed, "session", index),
+            "items": [
+                {"product_id": product["id"], "color": color, "size": size, "quantity": quantity}
+                for product, color, size, quantity in random_lines(rng, rng.random() < 0.2)
+            ],
+            "version": rng.randint(1, 20),
+            "created_at": updated_at - timedelta(hours=rng.uniform(0, 72)),
+            "updated_at": updated_at
+        })
+    return carts
+
+def order_status(rng, age):
+    """(status, payment_status) for an order placed ``age`` ago."""
+    if rng.random() < 0.06:
+        return "cancelled", rng.choice(["refunded", "failed"])
+    days = age.total_seconds() / 86400
+    if days < 1:
+        status = rng.choices(["pending", "confirmed", "processing"], [30, 40, 30])[0]
+    elif days < 3:
+        status = rng.choices(["confirmed", "processing", "shipped"], [20, 40, 40])[0]
+    elif days < 10:
+        status = rng.choices(["shipped", "delivered"], [40, 60])[0]
+    else:
+        status = "delivered"
+    if status == "pending":
+        return status, rng.choices(["pending", "failed"], [80, 20])[0]
+    return status, "completed"
+
+def generate_orders(rng, start, count):
+    from order_summary import order_summary_fields
+
+    args, now, shipping = _state["args"], _state["now"], _state["shipping"]
+    orders = []
+    for index in range(start, start + count):
+        if rng.random() < 0.15:
+            user_id = None
+            full_name, email, phone = "Guest Buyer", f"guest{index}@example.com", "+91 9000000000"
+        else:
+            user_index = rng.randrange(args.users)
+            user_id = stable_id(args.seed, "user", user_index)
+            full_name, email, phone = user_profile(args.seed, user_index)
+
+        lines = random_lines(rng, rng.random() < 0.25)
+        is_bulk = sum(line[3] for line in lines) >= 15
+        items = []
+        for product, color, size, quantity in lines:
+            unit_price = product["bulk_price"] if is_bulk else product["base_price"]
+            items.append({
+                "product_id": product["id"],
+                "product_name": product["name"],
+                "color": color,
+                "size": size,
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "total_price": unit_price * quantity
+            })
+
+        address = random_address(rng, user_id, full_name, phone)
+        subtotal = sum(item["total_price"] for item in items)
+        tax_amount = subtotal * 0.18
+        shipping_amount = shipping.order_shipping_amount(address["postal_code"], subtotal)
+        created_at = random_datetime(rng, now, args.days)
+        status, payment_status = order_status(rng, now - created_at)
+
+        orders.append({
+            "id": stable_id(args.seed, "order", index),
+            "user_id": user_id,
+            "email": email,
+            "phone": phone,
+            "items": items,
+            "subtotal": subtotal,
+            "tax_amount": tax_amount,
+            "shipping_amount": shipping_amount,
+            "total_amount": subtotal + tax_amount + shipping_amount,
+            "shipping_address": address,
+            "billing_address": address,
+            "status": status,
+            "payment_status": payment_status,
+            "payment_id": f"pay_{rng.getrandbits(56):014x}" if payment_status in ("completed", "refunded") else None,
+            "razorpay_order_id": f"order_{rng.getrandbits(56):014x}",
+            "notes": None,
+            "created_at": created_at,
+            "updated_at": min(now, created_at + timedelta(hours=rng.uniform(0, 240))),
+            **order_summary_fields(items, created_at)
+        })
+    return orders
+
+GENERATORS = {"users": generate_users, "carts": generate_carts, "orders": generate_orders}
+
+def run_chunk(task):
+    kind, chunk, start, count = task
+    documents = GENERATORS[kind](chunk_rng(_state["args"].seed, kind, chunk), start, count)
+    if "database" in _state:
+        collection = _state["database"][kind]
+        batch_size = _state["args"].batch_size
+        for offset in range(0, len(documents), batch_size):
+            collection.insert_many(documents[offset:offset + batch_size], ordered=False)
+    return kind, len(documents)
+
+def chunk_tasks(kind, total):
+    return [(kind, chunk, start, min(CHUNK_SIZE, total - start))
+            for chunk, start in enumerate(range(0, total, CHUNK_SIZE))]
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def validate_samples(categories, products, hashed_password, args, now):
+    """Check one generated document of each kind against the API models."""
+    from models import Cart, Category, Order, Product, UserInDB
+
+    init_worker(args, products, hashed_password, now)
+    rng = chunk_rng(args.seed, "validate", 0)
+    Category(**categories[0])
+    Product(**products[0])
+    if args.users:
+        UserInDB(**generate_users(rng, 0, 1)[0])
+    if args.carts:
+        Cart(**generate_carts(rng, 0, 1)[0])
+    if args.orders:
+        Order(**generate_orders(rng, 0, 1)[0])
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="dribble_scale")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=19)
+    parser.add_argument("--products", type=int, default=2_000)
+    parser.add_argument("--carts", type=int, default=50_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=730, help="history length for created_at values")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--now", type=datetime.fromisoformat, default=DEFAULT_NOW,
+                        help="reference time for generated timestamps (ISO 8601, UTC); pass today to get recent data")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=1_000, help="documents per insert_many")
+    parser.add_argument("--dry-run", action="store_true", help="generate and validate without writing")
+    args = parser.parse_args()
+    if args.users < 1 or args.categories < 1 or args.products < 1:
+        parser.error("--users, --categories and --products must be at least 1")
+
+    from auth import get_password_hash
+
+    now = args.now
+    hashed_password = get_password_hash("password123")
+    categories, products = generate_catalog(args, now)
+    validate_samples(categories, products, hashed_password, args, now)
+
+    if not args.dry_run:
+        from pymongo import MongoClient
+
+        database = MongoClient(args.mongo_url)[args.db_name]
+        for name in ["users", "categories", "products", "carts", "orders", "cache_versions"]:
+            database.drop_collection(name)
+        database.categories.insert_many(categories)
+        for offset in range(0, len(products), args.batch_size):
+            database.products.insert_many(products[offset:offset + args.batch_size], ordered=False)
+    print(f"categories: {len(categories)}, products: {len(products)} "
+          f"({sum(len(p['variants']) for p in products)} variants)", file=sys.stderr)
+
+    tasks = chunk_tasks("users", args.users) + chunk_tasks("carts", args.carts) + chunk_tasks("orders", args.orders)
+    totals = {"users": 0, "carts": 0, "orders": 0}
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args, products, hashed_password, now)) as pool:
+        for done, (kind, count) in enumerate(pool.imap_unordered(run_chunk, tasks), start=1):
+            totals[kind] += count
+            if done % 10 == 0 or done == len(tasks):
+                elapsed = time.perf_counter() - started
+                written = sum(totals.values())
+                print(f"  {done}/{len(tasks)} chunks, {written} documents, {written / elapsed:,.0f} docs/s", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    action = "generated" if args.dry_run else f"written to {args.db_name}"
+    print(f"{totals['users']} users, {totals['carts']} carts, {totals['orders']} orders {action} in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
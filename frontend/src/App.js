@@ -40,10 +40,11 @@ const Home = () => {
     fetchDefaultProduct();
   }, []);
 
-  const handleCategorySelection = (categoryName) => {
+  const handleCategorySelection = (categoryName, featuredProductId) => {
     setSelectedCategory(categoryName);
-    // Clear current product ID to force refetch
-    setCurrentProductId(null);
+    // Load the category's featured product directly; without one the
+    // size chart falls back to looking the category up
+    setCurrentProductId(featuredProductId || null);
   };
 
   return (
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useContext, createContext, useRef } from 'react';
+import React, { useState, useEffect, useContext, createContext, useRef, useCallback } from 'react';
 import axios from 'axios';
 import toast from 'react-hot-toast';
 import { 
@@ -26,20 +26,42 @@ const API_URL = `${API_BASE}/api`;
 // Context for global state
 const AppContext = createContext();
 
+// Send the token with every request so cart calls use the user's cart
+const setAuthToken = (token) => {
+  if (token) {
+    axios.defaults.headers.common['Authorization'] = `Bearer ${token}`;
+  } else {
+    delete axios.defaults.headers.common['Authorization'];
+  }
+};
+setAuthToken(localStorage.getItem('token'));
+
 export const AppProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [cart, setCart] = useState({ items: [], total: 0 });
   const [loading, setLoading] = useState(false);
+  const cartEtag = useRef(null);
+  // Bumped when the cart owner changes so in-flight polls for the old owner are ignored
+  const cartOwner = useRef(0);
+
+  // The server merges the guest cart into the user's cart at login and
+  // registration and returns the result, so no follow-up fetch is needed
+  const switchCartOwner = (token, newCart) => {
+    setAuthToken(token);
+    cartOwner.current += 1;
+    cartEtag.current = null;
+    setCart(newCart || { items: [], total: 0 });
+  };
 
   // Authentication functions
   const login = async (email, password) => {
     try {
       setLoading(true);
       const response = await axios.post(`${API_URL}/auth/login`, { email, password });
-      const { access_token, user: userData } = response.data;
+      const { access_token, user: userData, cart: mergedCart } = response.data;
       localStorage.setItem('token', access_token);
+      switchCartOwner(access_token, mergedCart);
       setUser(userData);
-      await fetchCart();
       toast.success('Login successful!');
       return true;
     } catch (error) {
@@ -54,10 +76,10 @@ export const AppProvider = ({ children }) => {
     try {
       setLoading(true);
       const response = await axios.post(`${API_URL}/auth/register`, userData);
-      const { access_token, user: userResponse } = response.data;
+      const { access_token, user: userResponse, cart: mergedCart } = response.data;
       localStorage.setItem('token', access_token);
+      switchCartOwner(access_token, mergedCart);
       setUser(userResponse);
-      await fetchCart();
       toast.success('Registration successful!');
       return true;
     } catch (error) {
@@ -70,117 +92,80 @@ export const AppProvider = ({ children }) => {
 
   const logout = () => {
     localStorage.removeItem('token');
+    switchCartOwner(null, null);
     setUser(null);
-    setCart({ items: [], total: 0 });
     toast.success('Logged out successfully');
   };
 
   // Cart operations
-  const fetchCart = async () => {
+  // Stable identity so effects that depend on it don't refetch on every render
+  const fetchCart = useCallback(async () => {
     try {
       const response = await axios.get(`${API_URL}/cart`);
+      cartEtag.current = response.headers.etag || null;
       setCart(response.data);
     } catch (error) {
       console.error('Error fetching cart:', error);
     }
+  }, []);
+
+  // Long-poll the cart: the server holds the request and answers 304
+  // until the cart changes, so idle tabs cost almost nothing
+  useEffect(() => {
+    let cancelled = false;
+    const pause = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+    const watchCart = async () => {
+      while (!cancelled) {
+        try {
+          const owner = cartOwner.current;
+          const response = await axios.get(`${API_URL}/cart?wait=25`, {
+            headers: cartEtag.current ? { 'If-None-Match': cartEtag.current } : {},
+            validateStatus: status => status === 200 || status === 304
+          });
+          if (cancelled) break;
+          if (owner !== cartOwner.current) continue;
+          if (response.status === 200) {
+            cartEtag.current = response.headers.etag || null;
+            setCart(response.data);
+          }
+          if (!cartEtag.current) {
+            await pause(3000);
+          }
+        } catch (error) {
+          await pause(3000);
+        }
+      }
+    };
+
+    watchCart();
+    return () => { cancelled = true; };
+  }, []);
+
+  // Cart writes ask for the repriced cart back (?return_cart=true) so each
+  // action is a single request instead of a write followed by a GET
+  const applyCartResponse = (response) => {
+    cartEtag.current = response.headers.etag || null;
+    setCart(response.data.cart);
+    // Let other tabs know the cart changed
+    localStorage.setItem('cartUpdate', Date.now().toString());
   };
 
   const addToCart = async (productId, color, size, quantity) => {
     try {
-      // Get product details for immediate UI update
-      const productResponse = await axios.get(`${API_URL}/products?limit=100`);
-      const product = productResponse.data.find(p => p.id === productId);
-      
-      if (!product) {
-        toast.error('Product not found');
-        return false;
-      }
-      
-      // Calculate pricing for immediate display
-      const currentCartQuantity = cart.items.reduce((sum, item) => sum + item.quantity, 0);
-      const totalQuantityAfterAdd = currentCartQuantity + quantity;
-      const unitPrice = totalQuantityAfterAdd >= 15 ? product.bulk_price : product.base_price;
-      
-      // Create new cart item for immediate UI update
-      const newCartItem = {
-        product_id: productId,
-        color,
-        size,
-        quantity,
-        product_name: product.name,
-        product_image: product.images?.[0],
-        unit_price: unitPrice,
-        total_price: unitPrice * quantity
-      };
-      
-      // Update cart state immediately for instant UI feedback
-      const updatedCart = { ...cart };
-      
-      // Check if item already exists in cart
-      const existingItemIndex = updatedCart.items.findIndex(item => 
-        item.product_id === productId && 
-        item.color === color && 
-        item.size === size
-      );
-      
-      if (existingItemIndex !== -1) {
-        // Update existing item
-        updatedCart.items[existingItemIndex].quantity += quantity;
-        updatedCart.items[existingItemIndex].total_price = updatedCart.items[existingItemIndex].unit_price * updatedCart.items[existingItemIndex].quantity;
-      } else {
-        // Add new item
-        updatedCart.items.push(newCartItem);
-      }
-      
-      // Recalculate total for bulk pricing
-      const newTotalQuantity = updatedCart.items.reduce((sum, item) => sum + item.quantity, 0);
-      const isBulkOrder = newTotalQuantity >= 15;
-      
-      // Update all item prices based on bulk pricing
-      updatedCart.items.forEach(item => {
-        const itemProduct = productResponse.data.find(p => p.id === item.product_id);
-        if (itemProduct) {
-          item.unit_price = isBulkOrder ? itemProduct.bulk_price : itemProduct.base_price;
-          item.total_price = item.unit_price * item.quantity;
-        }
-      });
-      
-      // Calculate new total
-      updatedCart.total = updatedCart.items.reduce((sum, item) => sum + item.total_price, 0);
-      
-      // Update cart state immediately
-      setCart(updatedCart);
-      
-      // Show success message immediately
-      toast.success('Added to cart!');
-      
-      // Trigger cart update events immediately
-      window.dispatchEvent(new Event('cartUpdated'));
-      localStorage.setItem('cartUpdate', Date.now().toString());
-      
-      // Send to backend in background
-      const response = await axios.post(`${API_URL}/cart/add`, {
+      const response = await axios.post(`${API_URL}/cart/add?return_cart=true`, {
         product_id: productId,
         color,
         size,
         quantity
       });
-      
-      if (response.data) {
-        // Sync with backend after a short delay
-        setTimeout(() => fetchCart(), 200);
-        return true;
-      } else {
-        // Revert on backend failure
-        await fetchCart();
-        toast.error('Failed to add to cart');
-        return false;
-      }
-      
+      applyCartResponse(response);
+      toast.success('Added to cart!');
+      return true;
     } catch (error) {
       console.error('Error adding to cart:', error);
       
-      // Revert cart state on error
+      // Resync on error
       await fetchCart();
       
       if (error.response?.status === 400 && error.response?.data?.detail?.includes('stock')) {
@@ -194,51 +179,14 @@ export const AppProvider = ({ children }) => {
 
   const updateCartQuantity = async (productId, color, size, quantity) => {
     try {
-      const response = await axios.put(`${API_URL}/cart/update`, {
+      const response = await axios.put(`${API_URL}/cart/update?return_cart=true`, {
         product_id: productId,
         color,
         size,
         quantity: parseInt(quantity)
       });
-      
-      if (response.data) {
-        // Don't wait for fetchCart - update locally first for instant UI
-        const updatedCart = { ...cart };
-        
-        // Find and update the item in local cart
-        const itemIndex = updatedCart.items.findIndex(item => 
-          item.product_id === productId && 
-          item.color === color && 
-          item.size === size
-        );
-        
-        if (itemIndex !== -1) {
-          if (quantity <= 0) {
-            // Remove item if quantity is 0
-            updatedCart.items.splice(itemIndex, 1);
-          } else {
-            // Update quantity and recalculate totals
-            updatedCart.items[itemIndex].quantity = quantity;
-            updatedCart.items[itemIndex].total_price = updatedCart.items[itemIndex].unit_price * quantity;
-          }
-          
-          // Recalculate cart total
-          updatedCart.total = updatedCart.items.reduce((sum, item) => sum + item.total_price, 0);
-          
-          // Update cart state immediately
-          setCart(updatedCart);
-        }
-        
-        // Trigger cart update events immediately
-        window.dispatchEvent(new Event('cartUpdated'));
-        localStorage.setItem('cartUpdate', Date.now().toString());
-        
-        // Fetch from server in background to sync
-        setTimeout(() => fetchCart(), 100);
-        
-        return true;
-      }
-      return false;
+      applyCartResponse(response);
+      return true;
     } catch (error) {
       console.error('Error updating cart quantity:', error);
       
@@ -251,42 +199,15 @@ export const AppProvider = ({ children }) => {
 
   const removeFromCart = async (productId, color, size) => {
     try {
-      // Update UI immediately
-      const updatedCart = { ...cart };
-      const itemIndex = updatedCart.items.findIndex(item => 
-        item.product_id === productId && 
-        item.color === color && 
-        item.size === size
-      );
-      
-      if (itemIndex !== -1) {
-        // Remove item from local cart
-        updatedCart.items.splice(itemIndex, 1);
-        
-        // Recalculate total
-        updatedCart.total = updatedCart.items.reduce((sum, item) => sum + item.total_price, 0);
-        
-        // Update cart state immediately
-        setCart(updatedCart);
-        
-        // Show success message immediately
-        toast.success('Removed from cart');
-        
-        // Trigger cart update events
-        window.dispatchEvent(new Event('cartUpdated'));
-        localStorage.setItem('cartUpdate', Date.now().toString());
-      }
-      
-      // Send to backend
-      await axios.delete(`${API_URL}/cart/remove/${productId}?color=${color}&size=${size}`);
-      
-      // Sync with backend after short delay
-      setTimeout(() => fetchCart(), 200);
-      
+      const response = await axios.delete(`${API_URL}/cart/remove/${productId}`, {
+        params: { color, size, return_cart: true }
+      });
+      applyCartResponse(response);
+      toast.success('Removed from cart');
     } catch (error) {
       console.error('Error removing from cart:', error);
       
-      // Revert on error
+      // Resync on error
       await fetchCart();
       toast.error('Failed to remove from cart');
     }
@@ -296,13 +217,13 @@ export const AppProvider = ({ children }) => {
   useEffect(() => {
     const token = localStorage.getItem('token');
     if (token) {
-      axios.get(`${API_URL}/auth/me`, {
-        headers: { Authorization: `Bearer ${token}` }
-      }).then(response => {
+      axios.get(`${API_URL}/auth/me`).then(response => {
         setUser(response.data);
         fetchCart();
       }).catch(() => {
         localStorage.removeItem('token');
+        switchCartOwner(null, null);
+        fetchCart();
       });
     } else {
       fetchCart();
@@ -359,15 +280,11 @@ export const Header = () => {
     };
     window.addEventListener('storage', handleStorageChange);
     
-    // More frequent refresh to ensure cart stays in sync
-    const intervalId = setInterval(() => {
-      fetchCart();
-    }, 3000); // Every 3 seconds
+    // Server-side changes arrive through the cart long-poll in AppProvider
     
     return () => {
       window.removeEventListener('cartUpdated', handleCartUpdate);
       window.removeEventListener('storage', handleStorageChange);
-      clearInterval(intervalId);
     };
   }, [fetchCart]);
 
@@ -478,20 +395,25 @@ export const CartModal = ({ onClose }) => {
   const fetchStockInfo = async () => {
     if (!cart.items || cart.items.length === 0) return;
     
-    const stockData = {};
-    for (const item of cart.items) {
-      try {
-        const response = await axios.get(`${API_URL}/products/${item.product_id}/stock`);
-        const variantKey = `${item.color}-${item.size}`;
-        if (response.data.variants[variantKey]) {
-          const key = `${item.product_id}-${item.color}-${item.size}`;
-          stockData[key] = response.data.variants[variantKey].stock_quantity;
+    try {
+      const response = await axios.post(`${API_URL}/products/stock/batch`, {
+        items: cart.items.map(item => ({
+          product_id: item.product_id,
+          color: item.color,
+          size: item.size
+        }))
+      });
+      const stockData = {};
+      response.data.items.forEach(entry => {
+        if (entry.found) {
+          const key = `${entry.product_id}-${entry.color}-${entry.size}`;
+          stockData[key] = entry.stock_quantity;
         }
-      } catch (error) {
-        console.error('Error fetching stock info:', error);
-      }
+      });
+      setStockInfo(stockData);
+    } catch (error) {
+      console.error('Error fetching stock info:', error);
     }
-    setStockInfo(stockData);
   };
 
   const handleRemoveItem = async (productId, color, size) => {
@@ -1021,7 +943,7 @@ export const Navigation = ({ onCategorySelect, selectedCategory }) => {
 
   const handleCategoryClick = (category) => {
     if (onCategorySelect) {
-      onCategorySelect(category.name);
+      onCategorySelect(category.name, category.featured_product_id);
     }
   };
 
@@ -1100,44 +1022,29 @@ export const SizeChart = ({ productId, selectedCategory }) => {
     const fetchProductData = async () => {
       setIsLoading(true);
       try {
-        let productToLoad = null;
-        
-        if (selectedCategory) {
-          console.log('Fetching product for category:', selectedCategory);
-          const response = await axios.get(`${API_URL}/products?category=${encodeURIComponent(selectedCategory)}&limit=1`);
-          if (response.data && response.data.length > 0) {
-            productToLoad = response.data[0];
-            console.log('Loaded product for category:', productToLoad.name);
-          }
-        }
-        
-        if (!productToLoad) {
-          console.log('Fetching default product...');
-          const response = await axios.get(`${API_URL}/products?limit=1`);
-          if (response.data && response.data.length > 0) {
-            productToLoad = response.data[0];
-            console.log('Loaded default product:', productToLoad.name);
-          }
-        }
+        // Product, size chart and stock come back in one request. Categories
+        // carry their featured product id, so this is usually a lookup by id.
+        const params = productId
+          ? { product_id: productId }
+          : (selectedCategory ? { category: selectedCategory } : {});
+        const response = await axios.get(`${API_URL}/products/view`, {
+          params,
+          validateStatus: status => status === 200 || status === 404
+        });
+        const productToLoad = response.status === 200 ? response.data.product : null;
 
         if (productToLoad) {
+          console.log('Loaded product:', productToLoad.name);
           setProduct(productToLoad);
           
           const inventoryMap = {};
-          if (productToLoad.variants) {
-            productToLoad.variants.forEach(variant => {
-              const key = `${variant.color}-${variant.size}`;
-              inventoryMap[key] = variant.stock_quantity || 0;
+          Object.entries(response.data.stock).forEach(([color, sizes]) => {
+            Object.entries(sizes).forEach(([size, stockQuantity]) => {
+              inventoryMap[`${color}-${size}`] = stockQuantity || 0;
             });
-          }
+          });
           setInventory(inventoryMap);
-          
-          try {
-            const sizeChartResponse = await axios.get(`${API_URL}/products/${productToLoad.id}/sizechart`);
-            setSizeChartData(sizeChartResponse.data);
-          } catch (error) {
-            console.log('Using default size chart data');
-          }
+          setSizeChartData(response.data.size_chart);
         } else {
           console.log('No product found, using fallback');
           const fallbackProduct = {
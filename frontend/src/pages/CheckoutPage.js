@@ -39,6 +39,7 @@ export const CheckoutPage = () => {
     postal_code: '',
     country: 'India'
   });
+  const [shippingRate, setShippingRate] = useState(null);
 
   useEffect(() => {
     fetchCart();
@@ -47,14 +48,24 @@ export const CheckoutPage = () => {
 
   useEffect(() => {
     calculateOrderSummary();
-  }, [cart]);
+  }, [cart, shippingRate]);
+
+  // Quote shipping with the same rate table the server uses at checkout
+  useEffect(() => {
+    const pincode = shippingAddress.postal_code.trim();
+    if (pincode.length !== 0 && pincode.length !== 6) return;
+
+    axios.post(`${API_URL}/info/shipping-calculator`, { pincode })
+      .then(response => setShippingRate(response.data.base_shipping_cost))
+      .catch(error => console.error('Error fetching shipping rate:', error));
+  }, [shippingAddress.postal_code]);
 
   const calculateOrderSummary = () => {
     if (!cart.items || cart.items.length === 0) return;
     
     const subtotal = cart.items.reduce((sum, item) => sum + (item.unit_price * item.quantity), 0);
     const taxAmount = subtotal * 0.18; // 18% GST
-    const shippingAmount = subtotal > 500 ? 0 : 50; // Free shipping above ₹500
+    const shippingAmount = subtotal > 500 ? 0 : (shippingRate ?? 0); // Free shipping above ₹500
     const totalAmount = subtotal + taxAmount + shippingAmount;
     
     setOrderSummary({
@@ -427,11 +427,18 @@ export const OrdersTrackingModal = ({ onClose }) => {
     }
   };
 
-  const handleTrackOrder = () => {
-    if (trackingId.trim()) {
-      toast.info(`Tracking order: ${trackingId}. Feature coming soon!`);
-    } else {
+  const handleTrackOrder = async () => {
+    if (!trackingId.trim()) {
       toast.error('Please enter a valid order ID');
+      return;
+    }
+    try {
+      const response = await axios.get(`${API_URL}/tracking`, { params: { order_id: trackingId.trim() } });
+      const [order] = response.data.orders;
+      const eta = order.estimated_delivery ? `, expected by ${new Date(order.estimated_delivery).toLocaleDateString()}` : '';
+      toast.success(`Order ${order.status} (payment ${order.payment_status})${eta}`);
+    } catch (error) {
+      toast.error(error.response?.status === 404 ? 'No order found with that ID' : 'Failed to track order');
     }
   };
 
@@ -0,0 +1,36 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The backend modules import each other by bare name, as they do when the server runs
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+@pytest.fixture(scope="session")
+def server():
+    """The API module, imported with its Mongo client swapped for mongomock."""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "api_test")
+    import motor.motor_asyncio
+    real_client = motor.motor_asyncio.AsyncIOMotorClient
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    try:
+        import server
+    finally:
+        motor.motor_asyncio.AsyncIOMotorClient = real_client
+    return server
+
+@pytest.fixture
+def api(server, monkeypatch):
+    """The app and a fresh database it serves from, with per-process caches emptied."""
+    import http_cache
+    from shared_cache import MemoryCache
+
+    database = AsyncMongoMockClient()["api_test"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server.app.state, "db", database)
+    monkeypatch.setattr(server, "shared_cache", MemoryCache())
+    monkeypatch.setattr(http_cache, "_versions", {})
+    return server.app, database
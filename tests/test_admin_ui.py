@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from admin_ui_routes import admin_ui_router
+from auth import create_access_token
+
+def user(email, is_admin, is_active=True):
+    return {
+        "id": email,
+        "email": email,
+        "full_name": email.split("@")[0],
+        "hashed_password": "x",
+        "is_admin": is_admin,
+        "is_active": is_active,
+        "created_at": datetime(2025, 1, 1)
+    }
+
+def product(product_id, name, stock):
+    return {
+        "id": product_id,
+        "name": name,
+        "category": "T-Shirts",
+        "gsm": "180 GSM",
+        "base_price": 319.0,
+        "bulk_price": 279.0,
+        "is_active": True,
+        "created_at": datetime(2025, 1, int(product_id)),
+        "variants": [{"color": "Black", "size": "M", "stock_quantity": stock, "sku": f"{product_id}-BLK-M"}]
+    }
+
+def bearer(email):
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+@pytest.fixture
+def client():
+    database = AsyncMongoMockClient()["admin_ui_test"]
+
+    async def seed():
+        await database.users.insert_many([
+            user("admin@example.com", True),
+            user("shopper@example.com", False),
+            user("former@example.com", True, is_active=False)
+        ])
+        await database.categories.insert_one({"id": "c1", "name": "T-Shirts", "is_active": True, "sort_order": 0})
+        await database.products.insert_many([product("1", "Plain Tee", 20), product("2", "Oversized Tee", 3)])
+        await database.orders.insert_one({"id": "o1"})
+
+    asyncio.run(seed())
+    app = FastAPI()
+    app.state.db = database
+    app.include_router(admin_ui_router)
+    return TestClient(app)
+
+def test_dashboard_renders_counts_for_admin(client):
+    response = client.get("/admin-ui/dashboard", headers=bearer("admin@example.com"))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
+    counts = [line.strip() for line in response.text.splitlines() if 'class="text-3xl font-bold"' in line]
+    assert counts == [
+        '<p class="text-3xl font-bold">2</p>',
+        '<p class="text-3xl font-bold">1</p>',
+        '<p class="text-3xl font-bold">1</p>',
+        '<p class="text-3xl font-bold">1</p>'
+    ]
+
+def test_products_page_streams_filtered_grid_rows(client):
+    response = client.get("/admin-ui/products?sort=name&order=asc", headers=bearer("admin@example.com"))
+
+    assert response.status_code == 200
+    assert response.text.index("Oversized Tee") < response.text.index("Plain Tee")
+    assert "Low stock" in response.text
+
+    response = client.get("/admin-ui/products?stock=low_stock", headers=bearer("admin@example.com"))
+    assert "Oversized Tee" in response.text
+    assert "Plain Tee" not in response.text
+
+def test_products_page_rejects_a_bad_cursor(client):
+    response = client.get("/admin-ui/products?after=not-a-cursor", headers=bearer("admin@example.com"))
+    assert response.status_code == 400
+
+def test_admin_pages_need_an_active_admin(client):
+    assert client.get("/admin-ui/dashboard").status_code == 401
+    assert client.get("/admin-ui/dashboard", headers=bearer("shopper@example.com")).status_code == 403
+    response = client.get("/admin-ui/products", headers=bearer("former@example.com"))
+    assert (response.status_code, response.json()["detail"]) == (403, "Account is disabled")
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from cart_sessions import (
+    ANONYMOUS_CART_TTL,
+    ANONYMOUS_CART_TTL_INDEX,
+    compact_carts,
+    ensure_cart_indexes,
+    merge_cart_items,
+    merge_guest_cart,
+)
+
+def line(product_id, quantity, size="M"):
+    return {"product_id": product_id, "color": "Black", "size": size, "quantity": quantity}
+
+def cart(cart_id, items, version=1, **owner):
+    return {"id": cart_id, "items": items, "version": version, "updated_at": datetime.utcnow(), **owner}
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["cart_sessions_test"]
+
+def test_merge_sums_the_same_variant_and_appends_others():
+    items = [line("a", 1)]
+    merged = merge_cart_items(items, [line("a", 2), line("a", 1, size="L"), line("b", 4)])
+
+    assert merged == [line("a", 3), line("a", 1, size="L"), line("b", 4)]
+    # The user's lines are copied, not changed in place
+    assert items == [line("a", 1)]
+
+def test_guest_cart_is_merged_into_the_user_cart_and_deleted(database):
+    async def run():
+        await database.carts.insert_many([
+            cart("user-cart", [line("a", 1)], version=4, user_id="u1", merged_cart_ids=[]),
+            cart("guest-cart", [line("a", 2), line("b", 1)], session_id="s1")
+        ])
+
+        merged, guest_gone = await merge_guest_cart(database, "s1", "u1")
+
+        assert guest_gone is True
+        assert merged["items"] == [line("a", 3), line("b", 1)]
+        assert (merged["version"], merged["merged_cart_ids"]) == (5, ["guest-cart"])
+        assert await database.carts.count_documents({"session_id": "s1"}) == 0
+
+    asyncio.run(run())
+
+def test_guest_cart_becomes_the_cart_of_a_user_without_one(database):
+    async def run():
+        await database.carts.insert_one(cart("guest-cart", [line("a", 2)], session_id="s1"))
+
+        merged, guest_gone = await merge_guest_cart(database, "s1", "u1")
+
+        assert guest_gone is True
+        stored = await database.carts.find_one({"user_id": "u1"})
+        assert stored["items"] == [line("a", 2)]
+        assert stored["merged_cart_ids"] == ["guest-cart"]
+        assert merged["id"] == stored["id"] != "guest-cart"
+
+    asyncio.run(run())
+
+def test_guest_cart_already_merged_is_not_added_twice(database):
+    async def run():
+        # An earlier login merged it, then failed before deleting it
+        await database.carts.insert_many([
+            cart("user-cart", [line("a", 3)], user_id="u1", merged_cart_ids=["guest-cart"]),
+            cart("guest-cart", [line("a", 2)], session_id="s1")
+        ])
+
+        merged, guest_gone = await merge_guest_cart(database, "s1", "u1")
+
+        assert guest_gone is True
+        assert merged["items"] == [line("a", 3)]
+        assert await database.carts.count_documents({"session_id": "s1"}) == 0
+
+    asyncio.run(run())
+
+def test_guest_cart_edited_during_the_merge_is_kept(database, monkeypatch):
+    async def run():
+        await database.carts.insert_many([
+            cart("user-cart", [], user_id="u1", merged_cart_ids=[]),
+            cart("guest-cart", [line("a", 2)], session_id="s1")
+        ])
+        carts_type = type(database.carts)
+        real_delete_one = carts_type.delete_one
+
+        async def edit_then_delete(self, query, *args, **kwargs):
+            # The guest adds a line in another tab before the delete lands
+            await database.carts.update_one({"session_id": "s1"}, {"$push": {"items": line("b", 1)}, "$inc": {"version": 1}})
+            return await real_delete_one(self, query, *args, **kwargs)
+
+        monkeypatch.setattr(carts_type, "delete_one", edit_then_delete)
+        merged, guest_gone = await merge_guest_cart(database, "s1", "u1")
+
+        assert guest_gone is False
+        assert merged["items"] == [line("a", 2)]
+        guest = await database.carts.find_one({"session_id": "s1"})
+        assert guest["items"] == [line("a", 2), line("b", 1)]
+
+    asyncio.run(run())
+
+def test_anonymous_carts_expire_through_a_partial_ttl_index(database):
+    async def run():
+        await ensure_cart_indexes(database)
+        # Running it again, as every worker does at startup, is a no-op
+        await ensure_cart_indexes(database)
+
+        ttl_index = (await database.carts.index_information())[ANONYMOUS_CART_TTL_INDEX]
+        assert ttl_index["key"] == [("updated_at", 1)]
+        assert ttl_index["expireAfterSeconds"] == int(ANONYMOUS_CART_TTL.total_seconds())
+        assert ttl_index["partialFilterExpression"] == {"session_id": {"$type": "string"}}
+
+    asyncio.run(run())
+
+def test_compaction_drops_old_empty_carts_and_missing_products(database):
+    async def run():
+        await database.products.insert_one({"id": "kept"})
+        stale = datetime.utcnow() - timedelta(days=1)
+        await database.carts.insert_many([
+            {**cart("old-empty", []), "updated_at": stale},
+            cart("fresh-empty", []),
+            cart("mixed", [line("kept", 1), line("deleted", 2)], session_id="s1")
+        ])
+
+        assert await compact_carts(database) == {"deleted_empty": 1, "pruned": 1}
+
+        remaining = {document["id"]: document async for document in database.carts.find({})}
+        assert set(remaining) == {"fresh-empty", "mixed"}
+        assert remaining["mixed"]["items"] == [line("kept", 1)]
+        assert remaining["mixed"]["version"] == 2
+
+    asyncio.run(run())
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from datetime import datetime
+
+import fakeredis
+import httpx
+import pytest
+
+from auth import create_access_token
+from cart_versions import CART_EVENTS_TOPIC, CartChangeNotifier
+from shared_cache import MemoryCache, RedisCache
+
+def user(email, is_active=True):
+    return {
+        "id": email,
+        "email": email,
+        "full_name": "Buyer",
+        "hashed_password": "x",
+        "is_admin": False,
+        "is_active": is_active,
+        "created_at": datetime(2025, 1, 1)
+    }
+
+PRODUCT = {
+    "id": "p1",
+    "name": "Tee",
+    "description": "Plain tee",
+    "category": "T-Shirts",
+    "base_price": 319.0,
+    "bulk_price": 279.0,
+    "images": [],
+    "is_active": True,
+    "variants": [{"color": "Black", "size": "M", "stock_quantity": 10, "sku": "p1-BLK-M"}]
+}
+LINE = {"product_id": "p1", "color": "Black", "size": "M", "quantity": 1}
+
+def bearer(email):
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+
+def api_client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+@pytest.fixture
+def shopper(api):
+    app, database = api
+    asyncio.run(database.users.insert_many([user("buyer@example.com"), user("gone@example.com", is_active=False)]))
+    asyncio.run(database.products.insert_one(dict(PRODUCT)))
+    return app, bearer("buyer@example.com")
+
+def test_unchanged_cart_long_poll_times_out_with_304(shopper):
+    app, headers = shopper
+
+    async def run():
+        async with api_client(app) as client:
+            await client.post("/api/cart/add", json=LINE, headers=headers)
+            etag = (await client.get("/api/cart", headers=headers)).headers["etag"]
+
+            started = time.monotonic()
+            response = await client.get("/api/cart?wait=1", headers={**headers, "If-None-Match": etag})
+            assert time.monotonic() - started >= 0.9
+            assert (response.status_code, response.content, response.headers["etag"]) == (304, b"", etag)
+
+    asyncio.run(run())
+
+def test_cart_write_wakes_the_long_poll_with_the_current_cart(shopper):
+    app, headers = shopper
+
+    async def run():
+        async with api_client(app) as client:
+            await client.post("/api/cart/add", json=LINE, headers=headers)
+            etag = (await client.get("/api/cart", headers=headers)).headers["etag"]
+
+            started = time.monotonic()
+            poll = asyncio.create_task(client.get("/api/cart?wait=10", headers={**headers, "If-None-Match": etag}))
+            await asyncio.sleep(0.2)
+            await client.post("/api/cart/add", json=LINE, headers=headers)
+            response = await poll
+
+            assert time.monotonic() - started < 5
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            assert response.json()["items"][0]["quantity"] == 2
+
+    asyncio.run(run())
+
+def test_stale_etag_gets_the_current_cart_at_once(shopper):
+    app, headers = shopper
+
+    async def run():
+        async with api_client(app) as client:
+            await client.post("/api/cart/add", json=LINE, headers=headers)
+            response = await client.get("/api/cart?wait=10", headers={**headers, "If-None-Match": 'W/"cart-old"'})
+            assert response.status_code == 200
+            assert response.json()["items"][0]["quantity"] == 1
+
+    asyncio.run(run())
+
+def test_disabled_account_cannot_read_its_cart(shopper):
+    app, _ = shopper
+
+    async def run():
+        async with api_client(app) as client:
+            response = await client.get("/api/cart", headers=bearer("gone@example.com"))
+            assert (response.status_code, response.json()["detail"]) == (403, "Account is disabled")
+
+    asyncio.run(run())
+
+def test_notifier_wakes_waiters_for_the_changed_cart_only():
+    async def run():
+        notifier = CartChangeNotifier(MemoryCache())
+        other = asyncio.create_task(notifier.wait("user:b", 0.3))
+        woken = asyncio.create_task(notifier.wait("user:a", 5))
+        await asyncio.sleep(0)
+        await notifier.notify("user:a")
+        assert await woken is True
+        assert await other is False
+
+    asyncio.run(run())
+
+def test_write_on_another_worker_wakes_the_long_poll_over_redis():
+    async def run():
+        server = fakeredis.FakeServer()
+        writer_cache = RedisCache(fakeredis.FakeAsyncRedis(server=server))
+        reader_cache = RedisCache(fakeredis.FakeAsyncRedis(server=server))
+        writer = CartChangeNotifier(writer_cache)
+        reader = CartChangeNotifier(reader_cache)
+        await reader_cache.start()
+        try:
+            waiting = asyncio.create_task(reader.wait("user:a", 5))
+            # Let the reader's subscription settle before the other worker publishes
+            await asyncio.sleep(0.2)
+            await writer.notify("user:a")
+            assert await asyncio.wait_for(waiting, 5) is True
+        finally:
+            await reader_cache.stop()
+
+    asyncio.run(run())
+
+def test_events_from_this_worker_are_not_delivered_twice():
+    async def run():
+        cache = RedisCache(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        received = []
+        cache.subscribe(CART_EVENTS_TOPIC, received.append)
+        await cache.start()
+        try:
+            await asyncio.sleep(0.2)
+            await cache.publish(CART_EVENTS_TOPIC, "user:a")
+            await asyncio.sleep(0.2)
+            assert received == []
+        finally:
+            await cache.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import checkout
+from checkout import (
+    PAYMENT_ALREADY_APPLIED,
+    PAYMENT_CONFIRMED,
+    PAYMENT_NEEDS_REVIEW,
+    CheckoutBusyError,
+    InsufficientStockError,
+    confirm_order_payment,
+    place_order,
+    release_stock_holds,
+)
+
+CART_FILTER = {"user_id": "user-1"}
+
+def product(product_id, stock):
+    return {
+        "id": product_id,
+        "name": f"Tee {product_id}",
+        "base_price": 319.0,
+        "bulk_price": 279.0,
+        "variants": [{"color": "Black", "size": "M", "stock_quantity": stock, "sku": f"{product_id}-BLK-M"}]
+    }
+
+def line(product_id, quantity):
+    return {"product_id": product_id, "color": "Black", "size": "M", "quantity": quantity}
+
+def build_order(order_items, subtotal):
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": CART_FILTER["user_id"],
+        "items": order_items,
+        "subtotal": subtotal,
+        "total_amount": subtotal,
+        "status": "pending",
+        "payment_status": "pending",
+        "razorpay_order_id": "rzp-1",
+        "created_at": datetime.utcnow()
+    }
+
+async def stock_of(database, product_id):
+    found = await database.products.find_one({"id": product_id})
+    return found["variants"][0]["stock_quantity"]
+
+@pytest.fixture
+def database():
+    return AsyncMongoMockClient()["checkout_test"]
+
+@pytest.fixture
+def client():
+    return AsyncMongoMockClient()
+
+@pytest.fixture(autouse=True)
+def no_transactions(monkeypatch):
+    # mongomock has no transactions, so checkout takes the compensating path
+    monkeypatch.setattr(checkout, "_transactions_supported", False)
+    monkeypatch.setattr(checkout, "CHECKOUT_RETRY_DELAY", 0)
+
+async def seed(database, stocks, cart_lines):
+    await database.products.insert_many([product(product_id, stock) for product_id, stock in stocks.items()])
+    await database.carts.insert_one({**CART_FILTER, "id": "cart-1", "items": cart_lines, "version": 1})
+
+def test_place_order_holds_stock_and_marks_cart(client, database):
+    async def run():
+        await seed(database, {"a": 5, "b": 5}, [line("a", 2), line("b", 1)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+
+        assert order["stock_held"] is True
+        assert await stock_of(database, "a") == 3
+        assert await stock_of(database, "b") == 4
+        cart = await database.carts.find_one(CART_FILTER)
+        assert cart["checkout_order_id"] == order["id"]
+        assert cart["version"] == 2
+
+    asyncio.run(run())
+
+def test_short_stock_is_409_and_restores_earlier_holds(client, database):
+    async def run():
+        await seed(database, {"a": 5, "b": 1}, [line("a", 2), line("b", 3)])
+        with pytest.raises(InsufficientStockError) as raised:
+            await place_order(client, database, CART_FILTER, build_order)
+
+        assert raised.value.status_code == 409
+        # The hold on "a" applied before "b" came up short, and was put back
+        assert await stock_of(database, "a") == 5
+        assert await stock_of(database, "b") == 1
+        assert await database.orders.count_documents({}) == 0
+
+    asyncio.run(run())
+
+def test_cart_version_change_retries_and_compensates(client, database, monkeypatch):
+    async def run():
+        await seed(database, {"a": 5}, [line("a", 2)])
+        real_write = checkout._write_checkout
+        attempts = []
+
+        async def edit_then_write(database_, session, order, cart):
+            attempts.append(order)
+            if len(attempts) == 1:
+                # Another request edits the cart between the reads and the commit
+                await database.carts.update_one(CART_FILTER, {"$set": {"items": [line("a", 3)]}, "$inc": {"version": 1}})
+            await real_write(database_, session, order, cart)
+
+        monkeypatch.setattr(checkout, "_write_checkout", edit_then_write)
+        order = await place_order(client, database, CART_FILTER, build_order)
+
+        assert len(attempts) == 2
+        assert order["items"][0]["quantity"] == 3
+        # The first attempt's order and hold were undone; only the retry's remain
+        assert await database.orders.count_documents({}) == 1
+        assert await stock_of(database, "a") == 2
+
+    asyncio.run(run())
+
+def test_cart_that_keeps_changing_gives_up_busy(client, database, monkeypatch):
+    async def run():
+        await seed(database, {"a": 5}, [line("a", 1)])
+
+        async def always_changed(*args):
+            raise checkout.CartChangedError()
+
+        monkeypatch.setattr(checkout, "_write_checkout", always_changed)
+        with pytest.raises(CheckoutBusyError):
+            await place_order(client, database, CART_FILTER, build_order)
+        assert await stock_of(database, "a") == 5
+
+    asyncio.run(run())
+
+def test_payment_confirms_order_with_stock_held(client, database):
+    async def run():
+        await seed(database, {"a": 5}, [line("a", 2)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+
+        assert await confirm_order_payment(database, {"razorpay_order_id": "rzp-1"}, "pay-1") == PAYMENT_CONFIRMED
+        assert await confirm_order_payment(database, {"razorpay_order_id": "rzp-1"}, "pay-1") == PAYMENT_ALREADY_APPLIED
+        paid = await database.orders.find_one({"id": order["id"]})
+        assert (paid["payment_status"], paid["status"]) == ("completed", "confirmed")
+        assert paid["invoice_number"].endswith("/000001")
+        assert await stock_of(database, "a") == 3
+
+    asyncio.run(run())
+
+def test_payment_after_released_hold_takes_stock_again(client, database):
+    async def run():
+        await seed(database, {"a": 5}, [line("a", 2)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+        await release_stock_holds(database, {"id": order["id"]}, {"status": "cancelled", "payment_status": "failed"})
+        assert await stock_of(database, "a") == 5
+
+        assert await confirm_order_payment(database, {"razorpay_order_id": "rzp-1"}, "pay-1") == PAYMENT_CONFIRMED
+        paid = await database.orders.find_one({"id": order["id"]})
+        assert (paid["status"], paid["stock_held"]) == ("confirmed", True)
+        assert await stock_of(database, "a") == 3
+
+    asyncio.run(run())
+
+def test_payment_after_stock_sold_out_is_flagged_not_confirmed(client, database):
+    async def run():
+        await seed(database, {"a": 2}, [line("a", 2)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+        await release_stock_holds(database, {"id": order["id"]}, {"status": "cancelled", "payment_status": "failed"})
+        # Someone else buys the released stock
+        await database.products.update_one({"id": "a"}, {"$set": {"variants.0.stock_quantity": 0}})
+
+        assert await confirm_order_payment(database, {"razorpay_order_id": "rzp-1"}, "pay-1") == PAYMENT_NEEDS_REVIEW
+        flagged = await database.orders.find_one({"id": order["id"]})
+        assert (flagged["payment_status"], flagged["status"]) == ("completed", "cancelled")
+        assert flagged["needs_review"]
+        assert await stock_of(database, "a") == 0
+
+    asyncio.run(run())
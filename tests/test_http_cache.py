@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from http_cache import bump_catalog_version, etag_matches, make_etag
+
+ETAG = make_etag("catalog", 3)
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (ETAG, True),
+    (ETAG[2:], True),
+    (f'"other", {ETAG}', True),
+    (f'W/"other",W/{ETAG[2:]}', True),
+    ("*", True),
+    (" * ", True),
+    ('W/"other"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches_weakly_against_a_list(if_none_match, expected):
+    assert etag_matches(if_none_match, ETAG) is expected
+
+def test_strong_etag_matches_a_weak_validator():
+    assert etag_matches('W/"abc"', '"abc"')
+
+def test_catalog_read_is_304_without_a_body_until_the_catalog_changes(api):
+    app, database = api
+
+    async def run():
+        await database.categories.insert_one({"id": "c1", "name": "T-Shirts", "is_active": True, "sort_order": 0})
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/api/categories")
+            etag = first.headers["etag"]
+            assert first.status_code == 200 and first.json()[0]["name"] == "T-Shirts"
+
+            cached = await client.get("/api/categories", headers={"If-None-Match": f'W/"other", {etag}'})
+            assert cached.status_code == 304
+            assert cached.content == b""
+            assert cached.headers["etag"] == etag
+            assert cached.headers["cache-control"].startswith("public")
+
+            await bump_catalog_version(database)
+            changed = await client.get("/api/categories", headers={"If-None-Match": etag})
+            assert changed.status_code == 200
+            assert changed.headers["etag"] != etag
+
+    asyncio.run(run())
+
+def test_catalog_etags_are_scoped_to_the_resource(api):
+    app, database = api
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            categories = (await client.get("/api/categories")).headers["etag"]
+            products = (await client.get("/api/products")).headers["etag"]
+            filtered = (await client.get("/api/products?category=Polo")).headers["etag"]
+            assert len({categories, products, filtered}) == 3
+
+            # One resource's ETag never validates another
+            response = await client.get("/api/products", headers={"If-None-Match": categories})
+            assert response.status_code == 200
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from invoices import assign_invoice_number, backfill_invoice_numbers, financial_year
+
+def test_financial_year_starts_in_april():
+    assert financial_year(datetime(2025, 3, 31)) == "24-25"
+    assert financial_year(datetime(2025, 4, 1)) == "25-26"
+    assert financial_year(datetime(2099, 12, 1)) == "99-00"
+
+def test_invoice_numbers_are_consecutive_per_financial_year():
+    async def run():
+        database = AsyncMongoMockClient()["invoices_test"]
+        await database.orders.insert_many([{"id": order_id} for order_id in "abcd"])
+
+        assert await assign_invoice_number(database, "a", datetime(2025, 3, 30)) == "INV/24-25/000001"
+        assert await assign_invoice_number(database, "b", datetime(2025, 4, 2)) == "INV/25-26/000001"
+        assert await assign_invoice_number(database, "c", datetime(2025, 5, 9)) == "INV/25-26/000002"
+        assert len(await assign_invoice_number(database, "d", datetime(2025, 5, 9))) <= 16
+
+    asyncio.run(run())
+
+def test_backfill_numbers_paid_orders_oldest_first():
+    async def run():
+        database = AsyncMongoMockClient()["invoices_test"]
+        await database.orders.insert_many([
+            {"id": "late", "payment_status": "completed", "created_at": datetime(2025, 6, 2)},
+            {"id": "early", "payment_status": "completed", "created_at": datetime(2025, 6, 1)},
+            {"id": "unpaid", "payment_status": "pending", "created_at": datetime(2025, 6, 1)},
+        ])
+
+        assert await backfill_invoice_numbers(database) == 2
+        numbers = {order["id"]: order.get("invoice_number") async for order in database.orders.find({})}
+        assert numbers == {"early": "INV/25-26/000001", "late": "INV/25-26/000002", "unpaid": None}
+        assert await backfill_invoice_numbers(database) == 0
+
+    asyncio.run(run())
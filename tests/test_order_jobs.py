@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import checkout
+from checkout import place_order
+from job_queue import MemoryJobQueue
+from order_jobs import CLEAR_CHECKOUT_CART, clear_checkout_cart, commit_order_stock
+from .test_checkout import CART_FILTER, build_order, line, seed, stock_of
+
+@pytest.fixture
+def client():
+    return AsyncMongoMockClient()
+
+@pytest.fixture
+def database(client):
+    return client["order_jobs_test"]
+
+@pytest.fixture(autouse=True)
+def no_transactions(monkeypatch):
+    monkeypatch.setattr(checkout, "_transactions_supported", False)
+
+def test_clear_checkout_cart_deletes_untouched_cart(client, database):
+    async def run():
+        await seed(database, {"a": 5}, [line("a", 1)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+
+        await clear_checkout_cart(database, {"order_id": order["id"]})
+        assert await database.carts.count_documents({}) == 0
+
+    asyncio.run(run())
+
+def test_clear_checkout_cart_keeps_cart_edited_after_checkout(client, database):
+    async def run():
+        await seed(database, {"a": 5, "b": 5}, [line("a", 1)])
+        order = await place_order(client, database, CART_FILTER, build_order)
+        # The buyer adds a line in another tab before the payment lands
+        await database.carts.update_one(CART_FILTER, {"$push": {"items": line("b", 1)}, "$inc": {"version": 1}})
+
+        await clear_checkout_cart(database, {"order_id": order["id"]})
+        cart = await database.carts.find_one(CART_FILTER)
+        assert len(cart["items"]) == 2
+        assert "checkout_order_id" not in cart
+
+    asyncio.run(run())
+
+def test_commit_order_stock_takes_stock_once(database):
+    async def run():
+        await seed(database, {"a": 5}, [])
+        await database.orders.insert_one({"id": "o1", "items": [line("a", 2)], "status": "confirmed", "payment_status": "completed"})
+
+        await commit_order_stock(database, {"order_id": "o1"})
+        await commit_order_stock(database, {"order_id": "o1"})
+        assert await stock_of(database, "a") == 3
+        assert (await database.orders.find_one({"id": "o1"}))["stock_held"] is True
+
+    asyncio.run(run())
+
+def test_commit_order_stock_flags_sold_out_order_instead_of_overselling(database):
+    async def run():
+        await seed(database, {"a": 5, "b": 1}, [])
+        await database.orders.insert_one({
+            "id": "o1", "items": [line("a", 2), line("b", 3)], "status": "confirmed", "payment_status": "completed"
+        })
+
+        await commit_order_stock(database, {"order_id": "o1"})
+        # A rerun after the flag must not take stock either
+        await commit_order_stock(database, {"order_id": "o1"})
+
+        assert (await stock_of(database, "a"), await stock_of(database, "b")) == (5, 1)
+        flagged = await database.orders.find_one({"id": "o1"})
+        assert (flagged["status"], flagged["stock_held"]) == ("cancelled", False)
+        assert flagged["needs_review"]
+
+    asyncio.run(run())
+
+def test_memory_queue_refuses_transactional_jobs():
+    class Session:
+        in_transaction = True
+
+    async def run():
+        queue = MemoryJobQueue()
+        with pytest.raises(RuntimeError):
+            await queue.enqueue(CLEAR_CHECKOUT_CART, {"order_id": "o1"}, session=Session())
+
+    asyncio.run(run())
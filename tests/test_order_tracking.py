@@ -0,0 +1,129 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from order_tracking import (
+    ORDER_TRACKING_COLLECTION,
+    backfill_order_tracking,
+    ensure_tracking_indexes,
+    find_tracking_summaries,
+    normalize_email,
+    normalize_phone,
+    sync_order_tracking,
+)
+
+def order(order_id, status="pending", **fields):
+    return {
+        "id": order_id,
+        "email": "Buyer@Example.com ",
+        "phone": "+91 98765 43210",
+        "status": status,
+        "payment_status": "pending",
+        "total_amount": 638.0,
+        "item_count": 1,
+        "unit_count": 2,
+        "shipping_address": {"postal_code": "400001"},
+        "created_at": datetime(2025, 5, 1, 10, 0),
+        "updated_at": datetime(2025, 5, 1, 10, 0),
+        **fields
+    }
+
+@pytest.fixture
+def database():
+    database = AsyncMongoMockClient()["tracking_test"]
+    asyncio.run(ensure_tracking_indexes(database))
+    return database
+
+async def tracking_of(database, order_id):
+    return await database[ORDER_TRACKING_COLLECTION].find_one({"order_id": order_id})
+
+def test_contact_details_normalize():
+    assert normalize_email("  Buyer@Example.COM ") == "buyer@example.com"
+    assert normalize_email(None) == ""
+    assert normalize_phone("+91 98765-43210") == "9876543210"
+    assert normalize_phone("09876543210") == "9876543210"
+    assert normalize_phone(None) == ""
+
+def test_status_change_appends_to_the_timeline(database):
+    async def run():
+        await database.orders.insert_one(order("o1"))
+        await sync_order_tracking(database, {"id": "o1"})
+        first = await tracking_of(database, "o1")
+        assert [entry["status"] for entry in first["timeline"]] == ["pending"]
+        assert first["revision"] == 1
+
+        confirmed_at = datetime(2025, 5, 1, 10, 5)
+        await database.orders.update_one({"id": "o1"}, {"$set": {"status": "confirmed", "updated_at": confirmed_at}})
+        await sync_order_tracking(database, {"id": "o1"})
+        # Unchanged orders are not rewritten
+        await sync_order_tracking(database, {"id": "o1"})
+
+        tracked = await tracking_of(database, "o1")
+        assert [(entry["status"], entry["at"]) for entry in tracked["timeline"]] == [
+            ("pending", datetime(2025, 5, 1, 10, 0)), ("confirmed", confirmed_at)
+        ]
+        assert tracked["revision"] == 2
+        summary = json.loads(tracked["summary"])
+        assert summary["status"] == "confirmed"
+        assert summary["estimated_delivery"] is not None
+
+    asyncio.run(run())
+
+def test_concurrent_refresh_is_retried_at_the_new_revision(database, monkeypatch):
+    async def run():
+        await database.orders.insert_one(order("o1"))
+        await sync_order_tracking(database, {"id": "o1"})
+        await database.orders.update_one({"id": "o1"}, {"$set": {"status": "confirmed"}})
+
+        collection_type = type(database[ORDER_TRACKING_COLLECTION])
+        real_bulk_write = collection_type.bulk_write
+        calls = []
+
+        async def raced_bulk_write(self, operations, **kwargs):
+            calls.append(len(operations))
+            if len(calls) == 1:
+                # Another worker refreshes the document between our read and write
+                await database[ORDER_TRACKING_COLLECTION].update_one({"order_id": "o1"}, {"$inc": {"revision": 1}})
+            return await real_bulk_write(self, operations, **kwargs)
+
+        monkeypatch.setattr(collection_type, "bulk_write", raced_bulk_write)
+        await sync_order_tracking(database, {"id": "o1"})
+
+        assert calls == [1, 1]
+        tracked = await tracking_of(database, "o1")
+        assert tracked["revision"] == 3
+        assert [entry["status"] for entry in tracked["timeline"]] == ["pending", "confirmed"]
+
+    asyncio.run(run())
+
+def test_lookup_by_contact_matches_normalized_details(database):
+    async def run():
+        await database.orders.insert_many([
+            order("older", created_at=datetime(2025, 4, 1)),
+            order("newer"),
+            order("someone-else", email="other@example.com")
+        ])
+        await sync_order_tracking(database, {})
+
+        summaries = await find_tracking_summaries(database, email="buyer@EXAMPLE.com", phone="98765 43210")
+        assert [json.loads(summary)["order_id"] for summary in summaries] == ["newer", "older"]
+        assert await find_tracking_summaries(database, email="buyer@example.com", phone="") == []
+        assert len(await find_tracking_summaries(database, order_id="someone-else")) == 1
+
+    asyncio.run(run())
+
+def test_backfill_tracks_only_untracked_orders(database):
+    async def run():
+        await database.orders.insert_many([order("o1"), order("o2"), order("o3"), order("bad", created_at="not a date")])
+        await sync_order_tracking(database, {"id": "o1"})
+
+        await backfill_order_tracking(database, batch_size=2)
+        tracked = {document["order_id"] async for document in database[ORDER_TRACKING_COLLECTION].find({})}
+        # The order without a usable created_at is skipped
+        assert tracked == {"o1", "o2", "o3"}
+        assert (await tracking_of(database, "o1"))["revision"] == 1
+
+    asyncio.run(run())
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from product_grid import (
+    SUPERSEDED_PRODUCT_INDEX,
+    ProductGridPage,
+    decode_grid_cursor,
+    encode_grid_cursor,
+    ensure_product_grid_indexes,
+    stock_status,
+)
+
+def product(product_id, base_price, stocks=(10,), day=1):
+    return {
+        "id": product_id,
+        "name": f"Tee {product_id}",
+        "category": "T-Shirts",
+        "base_price": base_price,
+        "bulk_price": base_price - 40,
+        "is_active": True,
+        "created_at": datetime(2025, 1, day),
+        "variants": [{"color": "Black", "size": "M", "stock_quantity": stock, "sku": f"{product_id}-{i}"}
+                     for i, stock in enumerate(stocks)]
+    }
+
+async def all_pages(database, sort, order, limit, **filters):
+    ids, after = [], None
+    while True:
+        page = ProductGridPage(database, sort, order, limit=limit, after=after, **filters)
+        ids.extend(row["id"] for row in await page.rows())
+        if page.next_cursor is None:
+            return ids
+        after = page.next_cursor
+
+def test_cursor_round_trips_each_sort():
+    created = datetime(2025, 3, 4, 5, 6, 7)
+    row = {"id": "p1", "created_at": created, "name": "Tee", "base_price": 319.0}
+
+    assert decode_grid_cursor("created_at", encode_grid_cursor("created_at", row)) == (created, "p1")
+    assert decode_grid_cursor("name", encode_grid_cursor("name", row)) == ("Tee", "p1")
+    assert decode_grid_cursor("base_price", encode_grid_cursor("base_price", row)) == (319.0, "p1")
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", "W10=", encode_grid_cursor("name", {"id": "p1", "name": "Tee"})])
+def test_bad_cursor_is_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_grid_cursor("created_at", cursor)
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_continue_past_ties_on_the_sort_value(order):
+    async def run():
+        database = AsyncMongoMockClient()["grid_test"]
+        # Five products share a price, so pages split inside the tie
+        prices = {"a": 299.0, "b": 319.0, "c": 319.0, "d": 319.0, "e": 319.0, "f": 319.0, "g": 349.0}
+        await database.products.insert_many([product(product_id, price) for product_id, price in prices.items()])
+
+        expected = sorted(prices, key=lambda product_id: (prices[product_id], product_id), reverse=order == "desc")
+        for limit in (1, 2, 3):
+            assert await all_pages(database, "base_price", order, limit) == expected
+
+    asyncio.run(run())
+
+def test_stock_status_boundaries():
+    assert stock_status([0]) == "out_of_stock"
+    assert stock_status([0, 0]) == "out_of_stock"
+    assert stock_status([5]) == "low_stock"
+    assert stock_status([6, 5]) == "low_stock"
+    assert stock_status([6]) == "in_stock"
+    assert stock_status([6, 0]) == "low_stock"
+
+def test_stock_filters_agree_with_row_status():
+    async def run():
+        database = AsyncMongoMockClient()["grid_test"]
+        stocks = {"none": (0,), "five": (5,), "six": (6,), "mixed": (6, 0)}
+        await database.products.insert_many([product(product_id, 319.0, levels) for product_id, levels in stocks.items()])
+
+        for status in ("in_stock", "low_stock", "out_of_stock"):
+            rows = await ProductGridPage(database, "name", "asc", stock=status).rows()
+            assert rows and all(row["stock_status"] == status for row in rows)
+            assert {row["id"] for row in rows} == {product_id for product_id, levels in stocks.items() if stock_status(list(levels)) == status}
+
+    asyncio.run(run())
+
+def test_superseded_index_is_dropped_once_present():
+    async def run():
+        database = AsyncMongoMockClient()["grid_test"]
+        # A fresh database has nothing to drop
+        await ensure_product_grid_indexes(database)
+
+        await database.products.create_index([("category", 1), ("is_active", 1), ("created_at", 1)])
+        await ensure_product_grid_indexes(database)
+        indexes = await database.products.index_information()
+        assert SUPERSEDED_PRODUCT_INDEX not in indexes
+        assert "category_1_is_active_1_created_at_1_id_1" in indexes
+
+    asyncio.run(run())
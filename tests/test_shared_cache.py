@@ -0,0 +1,99 @@
+import asyncio
+
+import fakeredis
+
+from shared_cache import MemoryCache, RedisCache, load_redis
+
+def test_memory_cache_evicts_least_recently_used_bytes():
+    async def run():
+        cache = MemoryCache(max_bytes=10)
+        await cache.set("ns", "a", b"aaaa")
+        await cache.set("ns", "b", b"bbbb")
+        # Reading "a" makes "b" the oldest entry
+        assert await cache.get("ns", "a") == b"aaaa"
+
+        await cache.set("ns", "c", b"cccc")
+        assert await cache.get("ns", "b") is None
+        assert await cache.get("ns", "a") == b"aaaa"
+        assert await cache.get("ns", "c") == b"cccc"
+        assert cache.size == 8
+
+    asyncio.run(run())
+
+def test_memory_cache_skips_values_larger_than_the_bound():
+    async def run():
+        cache = MemoryCache(max_bytes=10)
+        await cache.set("ns", "a", b"aaaa")
+        await cache.set("ns", "a", b"x" * 11)
+        # The oversized value also drops the stale one under that key
+        assert await cache.get("ns", "a") is None
+        assert (cache.size, cache.stats()["entries"]) == (0, 0)
+
+    asyncio.run(run())
+
+def test_memory_cache_replacing_a_key_counts_its_bytes_once():
+    async def run():
+        cache = MemoryCache(max_bytes=10)
+        await cache.set("ns", "a", b"aaaa")
+        await cache.set("ns", "a", b"aaaaaa")
+        assert cache.size == 6
+
+    asyncio.run(run())
+
+def test_memory_cache_invalidation_hides_only_that_namespace():
+    async def run():
+        cache = MemoryCache()
+        await cache.set("catalog", "k", b"old")
+        await cache.set("info", "k", b"kept")
+        await cache.invalidate("catalog")
+        assert await cache.get("catalog", "k") is None
+        assert await cache.get("info", "k") == b"kept"
+
+    asyncio.run(run())
+
+def test_invalidation_drops_the_local_copy_on_other_workers():
+    async def run():
+        load_redis()
+        server = fakeredis.FakeServer()
+        writer = RedisCache(fakeredis.FakeAsyncRedis(server=server))
+        reader = RedisCache(fakeredis.FakeAsyncRedis(server=server), local_ttl=60)
+        rebuilt = asyncio.Event()
+        reader.on_invalidate("catalog", rebuilt.set)
+        await reader.start()
+        try:
+            await writer.set("catalog", "k", b"old")
+            assert await reader.get("catalog", "k") == b"old"
+            assert await reader.local.get("catalog", "k") == b"old"
+
+            # Let the reader's subscription settle before the other worker publishes
+            await asyncio.sleep(0.2)
+            await writer.invalidate("catalog")
+            await asyncio.wait_for(rebuilt.wait(), 5)
+
+            assert await reader.local.get("catalog", "k") is None
+            assert await reader.get("catalog", "k") is None
+            await writer.set("catalog", "k", b"new")
+            assert await reader.get("catalog", "k") == b"new"
+        finally:
+            await reader.stop()
+
+    asyncio.run(run())
+
+def test_worker_does_not_rerun_listeners_for_its_own_invalidation():
+    async def run():
+        load_redis()
+        cache = RedisCache(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+        calls = []
+        cache.on_invalidate("catalog", lambda: calls.append("catalog"))
+        await cache.start()
+        try:
+            await asyncio.sleep(0.2)
+            await cache.set("catalog", "k", b"old")
+            await cache.invalidate("catalog")
+            await asyncio.sleep(0.2)
+            assert calls == []
+            assert await cache.get("catalog", "k") is None
+        finally:
+            await cache.stop()
+
+    asyncio.run(run())
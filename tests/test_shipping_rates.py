@@ -0,0 +1,66 @@
+import pytest
+
+from shipping_rates import SHIPPING_RATES_FILE, PincodeTrie, ShippingRate, ShippingRateEngine
+
+def rate(prefix, zone):
+    return ShippingRate(
+        prefix=prefix,
+        zone=zone,
+        shipping_cost=50.0,
+        delivery_days=2,
+        is_cod_available=True,
+        is_express_available=False
+    )
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = ShippingRateEngine(SHIPPING_RATES_FILE)
+    engine.load()
+    return engine
+
+@pytest.mark.parametrize("pincode, zone", [
+    ("400001", "Mumbai"),
+    ("560034", "Bangalore"),
+    ("110001", "New Delhi"),
+    (" 400001 ", "Mumbai"),
+    # Unknown regions and pincodes too short for a zone prefix fall back to the default row
+    ("700001", "Rest of India"),
+    ("40", "Rest of India"),
+    ("4", "Rest of India"),
+    ("", "Rest of India"),
+])
+def test_shipping_rates_file_resolves_pincodes_to_zones(engine, pincode, zone):
+    assert engine.get_rate(pincode).zone == zone
+
+def test_shipping_rates_file_rates(engine):
+    mumbai = engine.get_rate("400001")
+    fallback = engine.get_rate("700001")
+    assert (mumbai.shipping_cost, mumbai.delivery_days, mumbai.is_express_available) == (50.0, 2, True)
+    assert (fallback.shipping_cost, fallback.delivery_days, fallback.is_express_available) == (75.0, 5, False)
+
+def test_trie_prefers_the_longest_matching_prefix():
+    trie = PincodeTrie()
+    trie.insert("", rate("", "default"))
+    trie.insert("4", rate("4", "west"))
+    trie.insert("4000", rate("4000", "south mumbai"))
+
+    assert trie.lookup("400001").zone == "south mumbai"
+    # "400" walks past "4" but stops short of "4000"
+    assert trie.lookup("400").zone == "west"
+    assert trie.lookup("401234").zone == "west"
+    assert trie.lookup("500001").zone == "default"
+
+def test_trie_rejects_duplicate_prefixes():
+    trie = PincodeTrie()
+    trie.insert("400", rate("400", "Mumbai"))
+    with pytest.raises(ValueError):
+        trie.insert("400", rate("400", "Mumbai again"))
+
+def test_rates_file_without_a_default_row_is_rejected(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(
+        "prefix,zone,shipping_cost,delivery_days,is_cod_available,is_express_available\n"
+        "400,Mumbai,50.0,2,true,true\n"
+    )
+    with pytest.raises(ValueError, match="missing default rate"):
+        ShippingRateEngine(path).load()
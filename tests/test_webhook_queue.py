@@ -0,0 +1,142 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import webhook_queue
+from job_queue import retry_delay
+from webhook_queue import (
+    WEBHOOK_CLAIM_LEASE,
+    WEBHOOK_EVENTS_COLLECTION,
+    WEBHOOK_MAX_ATTEMPTS,
+    WebhookConsumer,
+    ensure_webhook_indexes,
+    parse_webhook_payload,
+    process_webhook_batch,
+    record_malformed_webhook_event,
+    record_webhook_event,
+)
+
+def event(kind="payment.authorized", razorpay_order_id="rzp-1"):
+    return {"event": kind, "payload": {"payment": {"entity": {"id": "pay-1", "order_id": razorpay_order_id}}}}
+
+@pytest.fixture
+def database():
+    database = AsyncMongoMockClient()["webhooks_test"]
+    asyncio.run(ensure_webhook_indexes(database))
+    return database
+
+async def stored(database, event_id):
+    return await database[WEBHOOK_EVENTS_COLLECTION].find_one({"event_id": event_id})
+
+def test_redelivered_event_is_recorded_once(database):
+    async def run():
+        assert await record_webhook_event(database, "evt-1", event()) is True
+        assert await record_webhook_event(database, "evt-1", event()) is False
+        assert await database[WEBHOOK_EVENTS_COLLECTION].count_documents({}) == 1
+
+    asyncio.run(run())
+
+@pytest.mark.parametrize("body", [b"not json", b"\xff\xfe", b"[]", b'{"event": "payment.captured"}', b'{"event": 1, "payload": {}}'])
+def test_malformed_body_is_value_error(body):
+    with pytest.raises(ValueError):
+        parse_webhook_payload(body)
+
+def test_malformed_event_is_parked_and_never_claimed(database):
+    async def run():
+        assert await record_malformed_webhook_event(database, "evt-1", b"not json", "Webhook body is not JSON")
+        assert not await record_malformed_webhook_event(database, "evt-1", b"not json", "Webhook body is not JSON")
+
+        parked = await stored(database, "evt-1")
+        assert (parked["status"], parked["body"]) == ("failed", "not json")
+        assert await process_webhook_batch(database, "claim-1") == 0
+
+    asyncio.run(run())
+
+def test_failed_payment_is_applied_and_marked_processed(database):
+    async def run():
+        await database.orders.insert_one({
+            "id": "o1", "razorpay_order_id": "rzp-1", "status": "pending", "payment_status": "pending",
+            "total_amount": 638.0, "created_at": datetime(2025, 5, 1)
+        })
+        await record_webhook_event(database, "evt-1", event("payment.failed"))
+
+        assert await process_webhook_batch(database, "claim-1") == 1
+        assert (await database.orders.find_one({"id": "o1"}))["payment_status"] == "failed"
+        assert (await stored(database, "evt-1"))["status"] == "processed"
+        assert await process_webhook_batch(database, "claim-2") == 0
+
+    asyncio.run(run())
+
+def test_claimed_batch_is_skipped_until_its_lease_expires(database):
+    async def run():
+        await record_webhook_event(database, "evt-1", event())
+        events = database[WEBHOOK_EVENTS_COLLECTION]
+        # Another worker claimed it a moment ago
+        await events.update_one({"event_id": "evt-1"}, {"$set": {
+            "status": "processing", "claim_id": "other", "claimed_at": datetime.utcnow()
+        }})
+        assert await process_webhook_batch(database, "claim-1") == 0
+
+        # That worker died and its lease ran out
+        await events.update_one({"event_id": "evt-1"}, {"$set": {
+            "claimed_at": datetime.utcnow() - WEBHOOK_CLAIM_LEASE - timedelta(seconds=1)
+        }})
+        assert await process_webhook_batch(database, "claim-1") == 1
+        assert (await stored(database, "evt-1"))["status"] == "processed"
+
+    asyncio.run(run())
+
+def test_failing_event_backs_off_without_holding_back_its_batch(database, monkeypatch):
+    async def run():
+        await record_webhook_event(database, "bad", event(razorpay_order_id="rzp-bad"))
+        await record_webhook_event(database, "good", event())
+
+        async def fail_on_bad(database_, events):
+            if any(item["event_id"] == "bad" for item in events):
+                raise RuntimeError("boom")
+
+        monkeypatch.setattr(webhook_queue, "apply_webhook_events", fail_on_bad)
+        # Mongo keeps milliseconds, so the stored retry time can be below the raw clock reading
+        before = datetime.utcnow().replace(microsecond=0)
+        assert await process_webhook_batch(database, "claim-1") == 2
+
+        assert (await stored(database, "good"))["status"] == "processed"
+        bad = await stored(database, "bad")
+        assert (bad["status"], bad["attempts"], bad["last_error"]) == ("pending", 1, "boom")
+        assert "claim_id" not in bad
+        assert bad["retry_after"] >= before + timedelta(seconds=retry_delay(1))
+        # Not due yet
+        assert await process_webhook_batch(database, "claim-2") == 0
+
+    asyncio.run(run())
+
+def test_event_is_dead_lettered_after_max_attempts(database, monkeypatch):
+    async def run():
+        await record_webhook_event(database, "bad", event())
+        await database[WEBHOOK_EVENTS_COLLECTION].update_one({"event_id": "bad"}, {"$set": {"attempts": WEBHOOK_MAX_ATTEMPTS - 1}})
+
+        async def always_fail(database_, events):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(webhook_queue, "apply_webhook_events", always_fail)
+        await process_webhook_batch(database, "claim-1")
+
+        bad = await stored(database, "bad")
+        assert (bad["status"], bad["attempts"]) == ("failed", WEBHOOK_MAX_ATTEMPTS)
+        assert "failed_at" in bad
+        assert await process_webhook_batch(database, "claim-2") == 0
+
+    asyncio.run(run())
+
+def test_consumer_stops_right_after_a_notify(database):
+    async def run():
+        consumer = WebhookConsumer(database)
+        await consumer.start()
+        await asyncio.sleep(0)
+        await record_webhook_event(database, "evt-1", event())
+        consumer.notify()
+        await asyncio.wait_for(consumer.stop(), timeout=5)
+
+    asyncio.run(run())